@@ -3,7 +3,16 @@ import sys
 import math
 import random
 import os
+import io
 import json
+import zipfile
+import mmap
+import struct
+import time
+import queue
+import shutil
+import threading
+from collections import OrderedDict
 from pygame.locals import *
 
 # Constants
@@ -13,6 +22,11 @@ WIDTH = int(300 * SCALE)
 HEIGHT = int(200 * SCALE)
 FPS = 60
 
+# Simulation runs in fixed steps, independent of the render frame rate
+SIM_HZ = 120
+SIM_DT = 1 / SIM_HZ
+MAX_SIM_STEPS = 8  # Catch-up steps per rendered frame before dropping time
+
 # NES Palette
 NES_PALETTE = [
     (84, 84, 84), (0, 30, 116), (8, 16, 144), (48, 0, 136), 
@@ -57,10 +71,35 @@ def push(scene): SCENES.append(scene)
 def pop(): SCENES.pop()
 
 class Scene:
+    alpha = 1.0  # How far rendering is between the last two simulation steps
+    
     def handle(self, events, keys): ...
     def update(self, dt): ...
     def draw(self, surf): ...
 
+# Text rendering: each (name, size) font is resolved once, and rendered
+# strings are cached by (font, text, color) with least-recently-used eviction
+FONTS = {}
+TEXT_CACHE = OrderedDict()
+TEXT_CACHE_SIZE = 256
+
+def get_font(size, name=None):
+    font = FONTS.get((name, size))
+    if font is None:
+        font = FONTS[(name, size)] = pygame.font.SysFont(name, size)
+    return font
+
+def render_text(font, text, color):
+    key = (font, text, color)
+    surface = TEXT_CACHE.get(key)
+    if surface is None:
+        surface = TEXT_CACHE[key] = font.render(text, True, color)
+        if len(TEXT_CACHE) > TEXT_CACHE_SIZE:
+            TEXT_CACHE.popitem(last=False)
+    else:
+        TEXT_CACHE.move_to_end(key)
+    return surface
+
 # World themes
 WORLD_THEMES = {
     1: {"sky": 27, "ground": 20, "pipe": 14, "block": 33, "water": None, "enemy": "g", "name": "GRASS LAND"},
@@ -73,6 +112,285 @@ WORLD_THEMES = {
     8: {"sky": 20, "ground": 27, "pipe": 21, "block": 40, "water": None, "enemy": "w", "name": "FINAL FORTRESS"}
 }
 
+# Binary .klevel format: a header, the tile grid stored column-major with one
+# byte per cell (so any run of columns is one contiguous slice), then a table
+# of entity spawns. Older .klevel files are JSON lists of row strings.
+KLEVEL_MAGIC = b"KLVL"
+KLEVEL_VERSION = 1
+KLEVEL_HEADER = struct.Struct("<4sHIHI")  # magic, version, cols, rows, entity count
+KLEVEL_ENTITY = struct.Struct("<cIH")     # char, column, row
+ENTITY_TILES = ("S", "F", "X", "g", "k", "f", "s")
+
+class LevelGrid:
+    # Mutable tile grid over a column-major byte buffer: a bytearray for levels
+    # built in memory, or a copy-on-write mmap of a .klevel file, so opening a
+    # level only pages in the columns that are actually read. The positions of
+    # ENTITY_TILES are indexed and kept up to date by set().
+    def __init__(self, cells, cols, rows, offset=0, spawns=None):
+        self.cells = cells
+        self.cols = cols
+        self.rows = rows
+        self.offset = offset
+        if spawns is None:
+            spawns = [(x, y, char) for char in ENTITY_TILES for x, y in self.scan(char)]
+        self.spawns = {char: set() for char in ENTITY_TILES}  # char -> {(x, y)}
+        for x, y, char in spawns:
+            self.spawns[char].add((x, y))
+    
+    @classmethod
+    def from_rows(cls, level_data):
+        # The widest row sets the width; shorter rows are padded with sky
+        cols = max(len(row) for row in level_data)
+        rows = len(level_data)
+        cells = bytearray(b" " * (cols * rows))
+        for y, row in enumerate(level_data):
+            row = row.encode("latin-1")
+            cells[y:y + len(row) * rows:rows] = row
+        return cls(cells, cols, rows)
+    
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            if f.read(1) == b"[":
+                # JSON .klevel from before the binary format
+                f.seek(0)
+                return cls.from_rows(json.load(f))
+            cells = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        try:
+            return cls.from_buffer(cells, path)
+        except ValueError:
+            cells.close()
+            raise
+    
+    @classmethod
+    def from_buffer(cls, cells, path="<level>"):
+        # Parse a binary .klevel held in a mutable buffer, which the grid
+        # keeps. On error the buffer is left for the caller to release.
+        try:
+            magic, version, cols, rows, entity_count = KLEVEL_HEADER.unpack_from(cells)
+        except struct.error:
+            raise ValueError(f"{path}: truncated .klevel header")
+        if magic != KLEVEL_MAGIC or version > KLEVEL_VERSION:
+            raise ValueError(f"{path}: not a version {KLEVEL_VERSION} .klevel file")
+        table = KLEVEL_HEADER.size + cols * rows
+        if len(cells) < table + entity_count * KLEVEL_ENTITY.size:
+            raise ValueError(f"{path}: truncated .klevel")
+        # The entity table seeds the spawn index without scanning the grid
+        spawns = [(x, y, char.decode("latin-1"))
+                  for char, x, y in KLEVEL_ENTITY.iter_unpack(cells[table:table + entity_count * KLEVEL_ENTITY.size])]
+        return cls(cells, cols, rows, KLEVEL_HEADER.size, spawns)
+    
+    def copy(self):
+        return LevelGrid(bytearray(self.cells[self.offset:self.offset + self.cols * self.rows]),
+                         self.cols, self.rows, spawns=self.entities())
+    
+    def close(self):
+        if isinstance(self.cells, mmap.mmap):
+            self.cells.close()
+    
+    def get(self, x, y):
+        return chr(self.cells[self.offset + x * self.rows + y])
+    
+    def set(self, x, y, char):
+        i = self.offset + x * self.rows + y
+        old = chr(self.cells[i])
+        self.cells[i] = ord(char)
+        if old in self.spawns:
+            self.spawns[old].discard((x, y))
+        if char in self.spawns:
+            self.spawns[char].add((x, y))
+    
+    def column(self, x):
+        start = self.offset + x * self.rows
+        return self.cells[start:start + self.rows]
+    
+    def tiles(self, first=0, last=None):
+        # (x, y, char) for every non-empty cell in columns first..last-1
+        last = self.cols if last is None else min(last, self.cols)
+        for x in range(max(first, 0), last):
+            for y, code in enumerate(self.column(x)):
+                if code != 32:
+                    yield x, y, chr(code)
+    
+    def find(self, char):
+        # (x, y) of every cell holding char, in column order
+        if char in self.spawns:
+            return sorted(self.spawns[char])
+        return list(self.scan(char))
+    
+    def scan(self, char):
+        code = char.encode("latin-1")
+        end = self.offset + self.cols * self.rows
+        i = self.cells.find(code, self.offset, end)
+        while i != -1:
+            x, y = divmod(i - self.offset, self.rows)
+            yield x, y
+            i = self.cells.find(code, i + 1, end)
+    
+    def to_rows(self):
+        grid = bytes(self.cells[self.offset:self.offset + self.cols * self.rows])
+        return [grid[y::self.rows].decode("latin-1") for y in range(self.rows)]
+    
+    def columns(self, first, last):
+        # Bytes of columns first..last-1, as stored in a .klevel
+        return bytes(self.cells[self.offset + first * self.rows:self.offset + last * self.rows])
+    
+    def entities(self):
+        # (x, y, char) of every spawn, in column order
+        return sorted((x, y, char) for char, cells in self.spawns.items() for x, y in cells)
+    
+    def detach(self):
+        # Copy a mapped grid into memory, since the file under it may be replaced
+        if isinstance(self.cells, mmap.mmap):
+            self.cells, mapped = self.copy().cells, self.cells
+            self.offset = 0
+            mapped.close()
+    
+    def to_bytes(self):
+        entities = self.entities()
+        data = [KLEVEL_HEADER.pack(KLEVEL_MAGIC, KLEVEL_VERSION, self.cols, self.rows, len(entities)),
+                self.columns(0, self.cols)]
+        data.extend(KLEVEL_ENTITY.pack(char.encode("latin-1"), x, y) for x, y, char in entities)
+        return b"".join(data)
+    
+    def save(self, path):
+        data = self.to_bytes()
+        self.detach()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+class LevelSaver:
+    # Writes .klevel files on a background thread so saving never stalls a
+    # frame. A job carries either the whole grid or only the column runs
+    # changed since the last save of that file. A patch keeps the main-thread
+    # snapshot small, but the write still copies the whole file and patches
+    # the copy before renaming it over the original, so the disk traffic of
+    # a save is the file size either way.
+    #
+    # A failed write leaves its path in failed until the editor takes the
+    # failure and resubmits the whole grid. Until then later patches for that
+    # path are dropped, since they would be applied to a file that is missing
+    # the failed columns.
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.failed = set()  # Paths with a failed write not yet taken by take_failure
+        self.stats = {"saves": 0, "pending": 0, "dropped": 0, "patched_bytes": 0, "file_bytes": 0,
+                      "snapshot_ms": 0.0, "write_ms": 0.0, "max_write_ms": 0.0}
+    
+    def submit(self, path, cols, rows, patches, entities, snapshot_ms):
+        # patches: (first column, column bytes) runs; [(0, whole grid)] for a full save
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="LevelSaver", daemon=True)
+            self.thread.start()
+        with self.lock:
+            self.stats["pending"] += 1
+            self.stats["snapshot_ms"] = snapshot_ms
+        self.jobs.put((path, cols, rows, patches, entities))
+    
+    def run(self):
+        while True:
+            path, cols, rows, patches, entities = self.jobs.get()
+            with self.lock:
+                dropped = path in self.failed and not self.is_full(cols, rows, patches)
+            start = time.perf_counter()
+            written = None
+            if not dropped:
+                try:
+                    written = self.write(path, cols, rows, patches, entities)
+                except (OSError, ValueError, struct.error):
+                    pass
+            elapsed = (time.perf_counter() - start) * 1000
+            with self.lock:
+                self.stats["pending"] -= 1
+                if dropped:
+                    self.stats["dropped"] += 1
+                elif written is None:
+                    self.failed.add(path)
+                else:
+                    self.stats["saves"] += 1
+                    self.stats["patched_bytes"], self.stats["file_bytes"] = written
+                    self.stats["write_ms"] = elapsed
+                    self.stats["max_write_ms"] = max(self.stats["max_write_ms"], elapsed)
+            self.jobs.task_done()
+    
+    @staticmethod
+    def is_full(cols, rows, patches):
+        return len(patches) == 1 and patches[0][0] == 0 and len(patches[0][1]) == cols * rows
+    
+    def write(self, path, cols, rows, patches, entities):
+        # Returns (column bytes patched, bytes written to disk)
+        temp_path = f"{path}.tmp"
+        full = self.is_full(cols, rows, patches)
+        if full:
+            f = open(temp_path, "wb")
+        else:
+            shutil.copyfile(path, temp_path)
+            f = open(temp_path, "r+b")
+        with f:
+            if not full:
+                magic, version, old_cols, old_rows, entity_count = KLEVEL_HEADER.unpack(f.read(KLEVEL_HEADER.size))
+                if (magic, old_cols, old_rows) != (KLEVEL_MAGIC, cols, rows):
+                    raise ValueError(f"{path}: changed on disk, cannot patch")
+            f.seek(0)
+            f.write(KLEVEL_HEADER.pack(KLEVEL_MAGIC, KLEVEL_VERSION, cols, rows, len(entities)))
+            written = 0
+            for first, data in patches:
+                f.seek(KLEVEL_HEADER.size + first * rows)
+                f.write(data)
+                written += len(data)
+            f.seek(KLEVEL_HEADER.size + cols * rows)
+            f.truncate()
+            f.write(b"".join(KLEVEL_ENTITY.pack(char.encode("latin-1"), x, y) for x, y, char in entities))
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        os.replace(temp_path, path)
+        # A patch first copied the whole file into temp_path
+        return written, size if full else size + written
+    
+    def take_failure(self, path):
+        with self.lock:
+            if path in self.failed:
+                self.failed.discard(path)
+                return True
+            return False
+    
+    def wait(self):
+        # Block until every queued save is on disk
+        self.jobs.join()
+
+LEVEL_SAVER = LevelSaver()
+
+def as_level_grid(level_data):
+    if isinstance(level_data, LevelGrid):
+        return level_data
+    return LevelGrid.from_rows(level_data)
+
+def read_klevel_entities(path):
+    # Entity table of a binary .klevel, without touching the grid
+    with open(path, "rb") as f:
+        magic, version, cols, rows, entity_count = KLEVEL_HEADER.unpack(f.read(KLEVEL_HEADER.size))
+        f.seek(cols * rows, os.SEEK_CUR)
+        table = f.read(entity_count * KLEVEL_ENTITY.size)
+    return [(char.decode("latin-1"), x, y) for char, x, y in KLEVEL_ENTITY.iter_unpack(table)]
+
+def new_level_grid(cols=100, rows=20):
+    # Empty level with ground along the bottom five rows
+    level_data = [" " * cols for _ in range(rows - 5)]
+    level_data.append("G" * cols)
+    level_data.extend("B" * cols for _ in range(4))
+    return LevelGrid.from_rows(level_data)
+
+def convert_klevel(path, dest=None):
+    # Rewrite a JSON .klevel (or any .klevel) in the binary format
+    grid = LevelGrid.open(path)
+    grid.save(dest or path)
+    return grid
+
 # Generate 32 levels (8 worlds * 4 levels)
 def generate_level_data():
     levels = {}
@@ -140,7 +458,11 @@ def generate_level_data():
     
     return levels
 
-LEVELS = generate_level_data()
+# An exported level package sets KOOPA_RUNTIME=1 so importing the engine skips
+# the built-in levels; the package supplies its own
+RUNTIME_ONLY = os.environ.get("KOOPA_RUNTIME") == "1"
+
+LEVELS = {} if RUNTIME_ONLY else generate_level_data()
 
 # Create thumbnails
 THUMBNAILS = {}
@@ -161,6 +483,39 @@ for level_id, level_data in LEVELS.items():
     
     THUMBNAILS[level_id] = thumb
 
+# Keep the levels as LevelGrids so each spawn index is built once
+for level_id, level_data in LEVELS.items():
+    LEVELS[level_id] = LevelGrid.from_rows(level_data)
+
+# Entity sprites: each (class, frame, facing, power state, palette) is drawn
+# once into a padded surface shared by every instance, so drawing is one blit.
+# The shapes are a few hard-edged primitives, so the sprites are colorkeyed
+# like the tile chunks; a per-pixel alpha blit costs more than drawing them.
+# The engine and 1.0A builds still use convert_alpha sprites; with no soft
+# edges either format blits the same pixels.
+SPRITE_PAD = 16  # Room for tails and arms drawn outside the hitbox
+SPRITE_PALETTES = {"nes": NES_PALETTE}
+SPRITE_CACHE_SIZE = 64
+SPRITE_CACHE = OrderedDict()
+
+def get_sprite(cls, frame, facing_right, power, palette="nes"):
+    key = (cls, frame, facing_right, power, palette)
+    sprite = SPRITE_CACHE.get(key)
+    if sprite is None:
+        width, height = cls.SPRITE_SIZE
+        sprite = pygame.Surface((width + 2 * SPRITE_PAD, height + 2 * SPRITE_PAD))
+        sprite.fill(COLORKEY)
+        cls.draw_sprite(sprite, SPRITE_PAD, SPRITE_PAD, SPRITE_PALETTES[palette], frame, facing_right, power)
+        sprite.set_colorkey(COLORKEY, RLEACCEL)
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert()
+        SPRITE_CACHE[key] = sprite
+        while len(SPRITE_CACHE) > SPRITE_CACHE_SIZE:
+            SPRITE_CACHE.popitem(last=False)
+    else:
+        SPRITE_CACHE.move_to_end(key)
+    return sprite
+
 # Entity classes
 class Entity:
     def __init__(self, x, y):
@@ -173,6 +528,8 @@ class Entity:
         self.on_ground = False
         self.facing_right = True
         self.active = True
+        self.prev_x = x
+        self.prev_y = y
         
     def get_rect(self):
         return pygame.Rect(self.x, self.y, self.width, self.height)
@@ -210,10 +567,21 @@ class Entity:
                 elif self.vx < 0 and self.x < rect.right and self.x + self.width > rect.right:
                     self.x = rect.right
                     self.vx = 0
-                    
-    def draw(self, surf, cam):
+
+    # Sprite cell size before padding; draw_sprite paints one frame into it
+    SPRITE_SIZE = (TILE, TILE)
+
+    def sprite_key(self):
+        return 0, True, None
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
         pass
 
+    def draw(self, surf, cam):
+        sprite = get_sprite(type(self), *self.sprite_key())
+        surf.blit(sprite, (int(self.x - cam) - SPRITE_PAD, int(self.y) - SPRITE_PAD))
+
 class Player(Entity):
     def __init__(self, x, y):
         super().__init__(x, y)
@@ -281,49 +649,57 @@ class Player(Entity):
                             self.vx = 0
                             self.vy = 0
                     
-    def draw(self, surf, cam):
-        if self.invincible > 0 and int(self.invincible * 10) % 2 == 0:
-            return  # Blink during invincibility
-            
-        x = int(self.x - cam)
-        y = int(self.y)
-        
+    SPRITE_SIZE = (TILE, TILE * 2)
+
+    def sprite_key(self):
+        if state.mario_size == "small":
+            return 0, True, "small"
+        return (self.animation_frame if self.vx != 0 else 0), self.facing_right, state.mario_size
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
         # Draw Mario based on size
-        if state.mario_size == "big":
+        if power == "big":
             # Body
-            pygame.draw.rect(surf, NES_PALETTE[33], (x+4, y+8, 8, 16))  # Red overalls
+            pygame.draw.rect(surf, palette[33], (x+4, y+8, 8, 16))  # Red overalls
             
             # Head
-            pygame.draw.rect(surf, NES_PALETTE[39], (x+4, y+4, 8, 4))  # Face
+            pygame.draw.rect(surf, palette[39], (x+4, y+4, 8, 4))  # Face
             
             # Hat
-            pygame.draw.rect(surf, NES_PALETTE[33], (x+2, y, 12, 4))  # Red hat
+            pygame.draw.rect(surf, palette[33], (x+2, y, 12, 4))  # Red hat
             
             # Arms
             arm_offset = 0
-            if self.animation_frame == 1 and self.vx != 0:
-                arm_offset = 2 if self.facing_right else -2
+            if frame == 1:
+                arm_offset = 2 if facing_right else -2
                 
-            pygame.draw.rect(surf, NES_PALETTE[39], (x+arm_offset, y+10, 4, 6))  # Left arm
-            pygame.draw.rect(surf, NES_PALETTE[39], (x+12-arm_offset, y+10, 4, 6))  # Right arm
+            pygame.draw.rect(surf, palette[39], (x+arm_offset, y+10, 4, 6))  # Left arm
+            pygame.draw.rect(surf, palette[39], (x+12-arm_offset, y+10, 4, 6))  # Right arm
             
             # Legs
             leg_offset = 0
-            if self.animation_frame == 2 and self.vx != 0:
-                leg_offset = 2 if self.facing_right else -2
+            if frame == 2:
+                leg_offset = 2 if facing_right else -2
                 
-            pygame.draw.rect(surf, NES_PALETTE[21], (x+2, y+24, 4, 8))  # Left leg
-            pygame.draw.rect(surf, NES_PALETTE[21], (x+10, y+24-leg_offset, 4, 8+leg_offset))  # Right leg
+            pygame.draw.rect(surf, palette[21], (x+2, y+24, 4, 8))  # Left leg
+            pygame.draw.rect(surf, palette[21], (x+10, y+24-leg_offset, 4, 8+leg_offset))  # Right leg
         else:
             # Small Mario
             # Body
-            pygame.draw.rect(surf, NES_PALETTE[33], (x+4, y+8, 8, 8))  # Red overalls
+            pygame.draw.rect(surf, palette[33], (x+4, y+8, 8, 8))  # Red overalls
             
             # Head
-            pygame.draw.rect(surf, NES_PALETTE[39], (x+4, y, 8, 8))  # Face
+            pygame.draw.rect(surf, palette[39], (x+4, y, 8, 8))  # Face
             
             # Hat
-            pygame.draw.rect(surf, NES_PALETTE[33], (x+2, y, 12, 2))  # Red hat
+            pygame.draw.rect(surf, palette[33], (x+2, y, 12, 2))  # Red hat
+
+    def draw(self, surf, cam):
+        if self.invincible > 0 and int(self.invincible * 10) % 2 == 0:
+            return  # Blink during invincibility
+
+        super().draw(surf, cam)
 
 class Goomba(Entity):
     def __init__(self, x, y):
@@ -356,46 +732,49 @@ class Goomba(Entity):
             self.walk_timer = 0
             self.animation_frame = (self.animation_frame + 1) % 2
             
-    def draw(self, surf, cam):
-        if not self.active:
-            return
-            
-        x = int(self.x - cam)
-        y = int(self.y)
-        
+    def sprite_key(self):
+        return self.animation_frame, self.vx > 0, None
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
         # Body
-        pygame.draw.ellipse(surf, NES_PALETTE[21], (x+2, y+4, 12, 12))  # Brown body
+        pygame.draw.ellipse(surf, palette[21], (x+2, y+4, 12, 12))  # Brown body
         
         # Feet
-        foot_offset = 2 if self.animation_frame == 0 else -2
-        pygame.draw.rect(surf, NES_PALETTE[21], (x+2, y+14, 4, 2))  # Left foot
-        pygame.draw.rect(surf, NES_PALETTE[21], (x+10, y+14+foot_offset, 4, 2))  # Right foot
+        foot_offset = 2 if frame == 0 else -2
+        pygame.draw.rect(surf, palette[21], (x+2, y+14, 4, 2))  # Left foot
+        pygame.draw.rect(surf, palette[21], (x+10, y+14+foot_offset, 4, 2))  # Right foot
         
         # Eyes
-        eye_dir = 0 if self.vx > 0 else 2
-        pygame.draw.rect(surf, NES_PALETTE[0], (x+4+eye_dir, y+6, 2, 2))  # Left eye
-        pygame.draw.rect(surf, NES_PALETTE[0], (x+10-eye_dir, y+6, 2, 2))  # Right eye
+        eye_dir = 0 if facing_right else 2
+        pygame.draw.rect(surf, palette[0], (x+4+eye_dir, y+6, 2, 2))  # Left eye
+        pygame.draw.rect(surf, palette[0], (x+10-eye_dir, y+6, 2, 2))  # Right eye
+
+    def draw(self, surf, cam):
+        if not self.active:
+            return
+        super().draw(surf, cam)
 
 class Koopa(Goomba):
+    SHELL_FRAME = "shell"  # Frame shown while retreated into the shell
+
     def __init__(self, x, y):
         super().__init__(x, y)
         self.shell_mode = False
         
-    def draw(self, surf, cam):
-        if not self.active:
-            return
-            
-        x = int(self.x - cam)
-        y = int(self.y)
-        
+    def sprite_key(self):
+        return Koopa.SHELL_FRAME if self.shell_mode else 0, True, None
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
         # Shell
-        pygame.draw.ellipse(surf, NES_PALETTE[14], (x+2, y+4, 12, 12))  # Green shell
+        pygame.draw.ellipse(surf, palette[14], (x+2, y+4, 12, 12))  # Green shell
         
         # Head and feet
-        if not self.shell_mode:
-            pygame.draw.rect(surf, NES_PALETTE[39], (x+4, y, 8, 4))  # Head
-            pygame.draw.rect(surf, NES_PALETTE[14], (x+2, y+14, 4, 2))  # Left foot
-            pygame.draw.rect(surf, NES_PALETTE[14], (x+10, y+14, 4, 2))  # Right foot
+        if frame != Koopa.SHELL_FRAME:
+            pygame.draw.rect(surf, palette[39], (x+4, y, 8, 4))  # Head
+            pygame.draw.rect(surf, palette[14], (x+2, y+14, 4, 2))  # Left foot
+            pygame.draw.rect(surf, palette[14], (x+10, y+14, 4, 2))  # Right foot
 
 class Fish(Entity):
     def __init__(self, x, y):
@@ -408,25 +787,25 @@ class Fish(Entity):
     def update(self, colliders, dt):
         # Move in sine wave pattern
         self.swim_timer += dt
-        self.y += math.sin(self.swim_timer * 5) * 0.5
+        self.y += math.sin(self.swim_timer * 5) * 0.5 * dt * 60
         
         super().update(colliders, dt)
         
-    def draw(self, surf, cam):
-        if not self.active:
-            return
-            
-        x = int(self.x - cam)
-        y = int(self.y)
-        
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
         # Body
-        pygame.draw.ellipse(surf, NES_PALETTE[31], (x, y, 16, 8))  # Blue fish
+        pygame.draw.ellipse(surf, palette[31], (x, y, 16, 8))  # Blue fish
         
         # Tail
-        pygame.draw.polygon(surf, NES_PALETTE[31], [(x, y+4), (x-5, y), (x-5, y+8)])
+        pygame.draw.polygon(surf, palette[31], [(x, y+4), (x-5, y), (x-5, y+8)])
         
         # Eye
-        pygame.draw.circle(surf, NES_PALETTE[0], (x+12, y+4), 2)
+        pygame.draw.circle(surf, palette[0], (x+12, y+4), 2)
+
+    def draw(self, surf, cam):
+        if not self.active:
+            return
+        super().draw(surf, cam)
 
 class Spike(Entity):
     def __init__(self, x, y):
@@ -434,39 +813,157 @@ class Spike(Entity):
         self.width = TILE
         self.height = TILE
         
-    def draw(self, surf, cam):
-        x = int(self.x - cam)
-        y = int(self.y)
-        
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
         # Spike base
-        pygame.draw.rect(surf, NES_PALETTE[33], (x, y, TILE, TILE))
+        pygame.draw.rect(surf, palette[33], (x, y, TILE, TILE))
         
         # Spike
-        pygame.draw.polygon(surf, NES_PALETTE[39], [
+        pygame.draw.polygon(surf, palette[39], [
             (x + TILE//2, y),
             (x, y + TILE),
             (x + TILE, y + TILE)
         ])
 
+# Tile rendering
+def draw_tile(surf, char, draw_x, y, theme):
+    if char == "G":  # Green ground top
+        pygame.draw.rect(surf, NES_PALETTE[theme["ground"]], (draw_x, y, TILE, TILE))
+        pygame.draw.rect(surf, NES_PALETTE[theme["ground"]-1], (draw_x, y+8, TILE, TILE-8))
+        pygame.draw.rect(surf, NES_PALETTE[theme["ground"]-2], (draw_x+4, y+4, TILE-8, 4))
+    elif char == "B":  # Brown block
+        pygame.draw.rect(surf, NES_PALETTE[theme["block"]], (draw_x, y, TILE, TILE))
+        pygame.draw.rect(surf, NES_PALETTE[theme["block"]-1], (draw_x+2, y+2, TILE-4, TILE-4))
+    elif char == "P":  # Platform
+        pygame.draw.rect(surf, NES_PALETTE[theme["ground"]], (draw_x, y, TILE, TILE))
+    elif char == "T":  # Pipe
+        pygame.draw.rect(surf, NES_PALETTE[theme["pipe"]], (draw_x, y, TILE, TILE))
+        pygame.draw.rect(surf, NES_PALETTE[theme["pipe"]-1], (draw_x+2, y+2, TILE-4, TILE-4))
+    elif char == "?":  # Question block
+        pygame.draw.rect(surf, NES_PALETTE[theme["block"]], (draw_x, y, TILE, TILE))
+        pygame.draw.rect(surf, NES_PALETTE[39], (draw_x+4, y+4, 8, 4))
+        pygame.draw.rect(surf, NES_PALETTE[39], (draw_x+4, y+8, 2, 2))
+        pygame.draw.rect(surf, NES_PALETTE[39], (draw_x+10, y+8, 2, 2))
+    elif char == "F":  # Flag
+        pygame.draw.rect(surf, NES_PALETTE[31], (draw_x+6, y, 4, TILE*4))
+        pygame.draw.rect(surf, NES_PALETTE[33], (draw_x, y, 10, 6))
+
+# Static tile layer is baked into column chunks this many pixels wide
+CHUNK_WIDTH = 256
+COLORKEY = (255, 0, 255)  # Not in NES_PALETTE, so safe as "no tile"
+
+# Tile atlases: every tile glyph rasterized once per theme, shared by all
+# TileMaps in the process. Glyphs taller than a tile (the flag) get a taller cell.
+ATLAS_TILES = "GBPT?F"
+ATLAS_GLYPH_HEIGHT = {"F": TILE * 4}
+ATLAS_CACHE_SIZE = 4  # Themes kept before the least recently used is dropped
+TILE_ATLASES = OrderedDict()
+
+# Atlas images loaded from an exported package, by theme name
+BAKED_ATLASES = {}
+
+class TileAtlas:
+    def __init__(self, theme):
+        cell_height = max(ATLAS_GLYPH_HEIGHT.values())
+        self.rects = {char: pygame.Rect(i * TILE, 0, TILE, ATLAS_GLYPH_HEIGHT.get(char, TILE))
+                      for i, char in enumerate(ATLAS_TILES)}
+        self.surface = BAKED_ATLASES.get(theme["name"])
+        if self.surface is None:
+            self.surface = pygame.Surface((TILE * len(ATLAS_TILES), cell_height))
+            self.surface.fill(COLORKEY)
+            for i, char in enumerate(ATLAS_TILES):
+                draw_tile(self.surface, char, i * TILE, 0, theme)
+        self.surface.set_colorkey(COLORKEY, RLEACCEL)
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+
+def get_tile_atlas(theme):
+    key = theme["name"]
+    atlas = TILE_ATLASES.get(key)
+    if atlas is None:
+        atlas = TILE_ATLASES[key] = TileAtlas(theme)
+        while len(TILE_ATLASES) > ATLAS_CACHE_SIZE:
+            TILE_ATLASES.popitem(last=False)
+    else:
+        TILE_ATLASES.move_to_end(key)
+    return atlas
+
 class TileMap:
+    # "chunks": blit pre-rendered chunks, "blits": one Surface.blits call over
+    # prebuilt per-chunk draw lists, "tiles": cull and blit every tile each frame
+    render_mode = "chunks"
+    
     def __init__(self, level_data, level_id):
         self.tiles = []
         self.colliders = []
-        self.width = len(level_data[0]) * TILE
-        self.height = len(level_data) * TILE
+        grid = as_level_grid(level_data)
+        self.width = grid.cols * TILE
+        self.height = grid.rows * TILE
         self.level_id = level_id
         world = int(level_id.split("-")[0])
         self.theme = WORLD_THEMES[world]
         
         # Parse level data
-        for y, row in enumerate(level_data):
-            for x, char in enumerate(row):
-                if char != " ":
-                    rect = pygame.Rect(x * TILE, y * TILE, TILE, TILE)
-                    self.tiles.append((x * TILE, y * TILE, char))
-                    
-                    if char in ("G", "B", "P", "T", "?"):
-                        self.colliders.append(rect)
+        for x, y, char in grid.tiles():
+            rect = pygame.Rect(x * TILE, y * TILE, TILE, TILE)
+            self.tiles.append((x * TILE, y * TILE, char))
+            
+            if char in ("G", "B", "P", "T", "?"):
+                self.colliders.append(rect)
+        # Collisions resolve in order, so keep the row-by-row order they had
+        self.colliders.sort(key=lambda rect: (rect.y, rect.x))
+        
+        self.batches = self.build_batches()
+        self.chunks = self.build_chunks()
+    
+    def build_batches(self):
+        # Per-chunk (atlas, (x, y), area) draw lists in level coordinates
+        atlas = get_tile_atlas(self.theme)
+        batches = [[] for _ in range(0, self.width, CHUNK_WIDTH)]
+        for x, y, char in self.tiles:
+            # Rows can run past the first row's length; the camera never shows that
+            if x < self.width and char in atlas.rects:
+                batches[x // CHUNK_WIDTH].append((atlas.surface, (x, y), atlas.rects[char]))
+        return batches
+    
+    def build_chunks(self):
+        # Bake the static tiles into colorkeyed column chunks once per level
+        return [self.bake_chunk(i * CHUNK_WIDTH, batch) for i, batch in enumerate(self.batches)]
+    
+    def bake_chunk(self, left, batch):
+        chunk = pygame.Surface((min(CHUNK_WIDTH, self.width - left), self.height))
+        chunk.fill(COLORKEY)
+        chunk.blits([(image, (x - left, y), area) for image, (x, y), area in batch], doreturn=False)
+        chunk.set_colorkey(COLORKEY, RLEACCEL)
+        if pygame.display.get_surface() is not None:
+            chunk = chunk.convert()
+        return chunk
+    
+    def draw_chunks(self, surf, cam):
+        # Blit only the chunks overlapping the camera
+        cam = int(cam)
+        first = max(cam // CHUNK_WIDTH, 0)
+        last = min((cam + WIDTH) // CHUNK_WIDTH, len(self.chunks) - 1)
+        for i in range(first, last + 1):
+            surf.blit(self.chunks[i], (i * CHUNK_WIDTH - cam, 0))
+    
+    def draw_batches(self, surf, cam):
+        # Submit the draw lists of the visible chunks in one blits call
+        first = max(int(cam) // CHUNK_WIDTH, 0)
+        last = min((int(cam) + WIDTH) // CHUNK_WIDTH, len(self.batches) - 1)
+        surf.blits([(image, (x - cam, y), area)
+                    for batch in self.batches[first:last + 1]
+                    for image, (x, y), area in batch], doreturn=False)
+    
+    def draw_tiles(self, surf, cam):
+        atlas = get_tile_atlas(self.theme)
+        batch = []
+        for x, y, char in self.tiles:
+            draw_x = x - cam
+            if draw_x < -TILE or draw_x > WIDTH or char not in atlas.rects:
+                continue
+            batch.append((atlas.surface, (draw_x, y), atlas.rects[char]))
+        surf.blits(batch, doreturn=False)
     
     def draw(self, surf, cam):
         # Draw sky
@@ -480,35 +977,160 @@ class TileMap:
             pygame.draw.ellipse(surf, NES_PALETTE[31], (x+15, y-5, 25, 15))
         
         # Draw tiles
-        for x, y, char in self.tiles:
-            draw_x = x - cam
-            if draw_x < -TILE or draw_x > WIDTH:
-                continue
-                
-            if char == "G":  # Green ground top
-                pygame.draw.rect(surf, NES_PALETTE[self.theme["ground"]], (draw_x, y, TILE, TILE))
-                pygame.draw.rect(surf, NES_PALETTE[self.theme["ground"]-1], (draw_x, y+8, TILE, TILE-8))
-                pygame.draw.rect(surf, NES_PALETTE[self.theme["ground"]-2], (draw_x+4, y+4, TILE-8, 4))
-            elif char == "B":  # Brown block
-                pygame.draw.rect(surf, NES_PALETTE[self.theme["block"]], (draw_x, y, TILE, TILE))
-                pygame.draw.rect(surf, NES_PALETTE[self.theme["block"]-1], (draw_x+2, y+2, TILE-4, TILE-4))
-            elif char == "P":  # Platform
-                pygame.draw.rect(surf, NES_PALETTE[self.theme["ground"]], (draw_x, y, TILE, TILE))
-            elif char == "T":  # Pipe
-                pygame.draw.rect(surf, NES_PALETTE[self.theme["pipe"]], (draw_x, y, TILE, TILE))
-                pygame.draw.rect(surf, NES_PALETTE[self.theme["pipe"]-1], (draw_x+2, y+2, TILE-4, TILE-4))
-            elif char == "?":  # Question block
-                pygame.draw.rect(surf, NES_PALETTE[self.theme["block"]], (draw_x, y, TILE, TILE))
-                pygame.draw.rect(surf, NES_PALETTE[39], (draw_x+4, y+4, 8, 4))
-                pygame.draw.rect(surf, NES_PALETTE[39], (draw_x+4, y+8, 2, 2))
-                pygame.draw.rect(surf, NES_PALETTE[39], (draw_x+10, y+8, 2, 2))
-            elif char == "F":  # Flag
-                pygame.draw.rect(surf, NES_PALETTE[31], (draw_x+6, y, 4, TILE*4))
-                pygame.draw.rect(surf, NES_PALETTE[33], (draw_x, y, 10, 6))
+        if self.render_mode == "chunks":
+            self.draw_chunks(surf, cam)
+        elif self.render_mode == "blits":
+            self.draw_batches(surf, cam)
+        else:
+            self.draw_tiles(surf, cam)
+
+# Levels wider than this stream through a StreamingTileMap
+STREAM_MIN_WIDTH = 256 * TILE
+
+class StreamingTileMap(TileMap):
+    # Keeps only the chunks around the camera resident: tiles, colliders and
+    # the baked chunk surface are built as a chunk enters the window and
+    # dropped when it leaves, so memory does not grow with the level's length.
+    # The level is only read through cols, rows and column(x).
+    margin = 1  # Chunks kept loaded either side of the screen
+    
+    def __init__(self, level_data, level_id):
+        self.grid = as_level_grid(level_data)
+        self.width = self.grid.cols * TILE
+        self.height = self.grid.rows * TILE
+        self.level_id = level_id
+        world = int(level_id.split("-")[0])
+        self.theme = WORLD_THEMES[world]
+        self.resident = {}  # chunk index -> (tiles, colliders, batch, surface)
+        self.tiles = []
+        self.colliders = []
+        self.left = self.right = 0  # Resident span in pixels
+    
+    def load_chunk(self, i):
+        atlas = get_tile_atlas(self.theme)
+        tiles, colliders, batch, spawns = [], [], [], []
+        first = i * CHUNK_WIDTH // TILE
+        for x, y, char in self.grid.tiles(first, first + CHUNK_WIDTH // TILE):
+            tiles.append((x * TILE, y * TILE, char))
+            if char in ("G", "B", "P", "T", "?"):
+                colliders.append(pygame.Rect(x * TILE, y * TILE, TILE, TILE))
+            if char in atlas.rects:
+                batch.append((atlas.surface, (x * TILE, y * TILE), atlas.rects[char]))
+            if char in ENTITY_TILES:
+                spawns.append((x, y, char))
+        self.resident[i] = (tiles, colliders, batch, self.bake_chunk(i * CHUNK_WIDTH, batch))
+        return spawns
+    
+    def update_window(self, cam):
+        # Load the chunks entering the window and evict the ones leaving it.
+        # Returns the (x, y, char) entity spawns of the newly loaded columns.
+        first = max(int(cam) // CHUNK_WIDTH - self.margin, 0)
+        last = min((int(cam) + WIDTH) // CHUNK_WIDTH + self.margin, (self.width - 1) // CHUNK_WIDTH)
+        if self.resident and (self.left, self.right) == (first * CHUNK_WIDTH, (last + 1) * CHUNK_WIDTH):
+            return []
+        for i in [i for i in self.resident if not first <= i <= last]:
+            del self.resident[i]
+        spawns = []
+        for i in range(first, last + 1):
+            if i not in self.resident:
+                spawns.extend(self.load_chunk(i))
+        
+        self.left, self.right = first * CHUNK_WIDTH, (last + 1) * CHUNK_WIDTH
+        chunks = [self.resident[i] for i in sorted(self.resident)]
+        self.tiles = [tile for tiles, colliders, batch, surface in chunks for tile in tiles]
+        # Collisions resolve in order, so keep them row by row as TileMap does
+        self.colliders = sorted((rect for tiles, colliders, batch, surface in chunks for rect in colliders),
+                                key=lambda rect: (rect.y, rect.x))
+        return sorted(spawns, key=lambda spawn: (spawn[1], spawn[0]))
+    
+    def draw_chunks(self, surf, cam):
+        cam = int(cam)
+        for i, (tiles, colliders, batch, surface) in self.resident.items():
+            if -CHUNK_WIDTH < i * CHUNK_WIDTH - cam < WIDTH:
+                surf.blit(surface, (i * CHUNK_WIDTH - cam, 0))
+    
+    def draw_batches(self, surf, cam):
+        surf.blits([(image, (x - cam, y), area)
+                    for tiles, colliders, batch, surface in self.resident.values()
+                    for image, (x, y), area in batch], doreturn=False)
 
 # ===================
 # KOOPA EDIT - LEVEL EDITOR
 # ===================
+# The editor canvas is cached as column chunks of this many cells, rendered at
+# the current zoom; at most EDIT_CACHE_CHUNKS are kept
+EDIT_CHUNK_COLS = 16
+EDIT_CACHE_CHUNKS = 64
+AUTOSAVE_INTERVAL = 5  # Seconds after an edit before the level is saved
+
+# Undo history: each cell change is a packed (x, y, old, new) record
+JOURNAL_CHANGE = struct.Struct("<IHBB")
+JOURNAL_MAX_BYTES = 1 << 20  # Past this the oldest strokes are coalesced or dropped
+
+class EditJournal:
+    # Undo/redo history of the editor. Each brush stroke is one entry, a
+    # bytearray of packed cell changes in the order they were made.
+    def __init__(self, max_bytes=JOURNAL_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.undo_stack = []
+        self.redo_stack = []
+        self.stroke = None
+        self.size = 0  # Bytes held by both stacks
+    
+    def record(self, x, y, old, new):
+        if self.stroke is None:
+            self.stroke = bytearray()
+            self.undo_stack.append(self.stroke)
+            self.size -= sum(len(entry) for entry in self.redo_stack)
+            self.redo_stack.clear()
+        self.stroke += JOURNAL_CHANGE.pack(x, y, ord(old), ord(new))
+        self.size += JOURNAL_CHANGE.size
+    
+    def end_stroke(self):
+        if self.stroke is not None:
+            self.stroke = None
+            self.trim()
+    
+    def trim(self):
+        # Until the history fits: merge the two oldest strokes when that saves
+        # bytes (keeping each cell's first old and last new value), otherwise
+        # drop the oldest. The newest stroke is never merged or dropped, even
+        # if it alone is over the cap.
+        while self.size > self.max_bytes and len(self.undo_stack) > 1:
+            first = self.undo_stack[0]
+            if len(self.undo_stack) > 2:
+                second = self.undo_stack[1]
+                cells = {}
+                for x, y, old, new in JOURNAL_CHANGE.iter_unpack(first + second):
+                    cells[x, y] = (cells[x, y][0], new) if (x, y) in cells else (old, new)
+                merged = bytearray()
+                for (x, y), (old, new) in cells.items():
+                    if old != new:
+                        merged += JOURNAL_CHANGE.pack(x, y, old, new)
+                if len(merged) < len(first) + len(second):
+                    # Strokes that cancel each other out leave no entry
+                    self.undo_stack[:2] = [merged] if merged else []
+                    self.size += len(merged) - len(first) - len(second)
+                    continue
+            self.size -= len(self.undo_stack.pop(0))
+    
+    def undo(self):
+        # Changes to revert, newest first, as (x, y, char) to set
+        self.end_stroke()
+        if not self.undo_stack:
+            return []
+        entry = self.undo_stack.pop()
+        self.redo_stack.append(entry)
+        return [(x, y, chr(old)) for x, y, old, new in reversed(list(JOURNAL_CHANGE.iter_unpack(entry)))]
+    
+    def redo(self):
+        self.end_stroke()
+        if not self.redo_stack:
+            return []
+        entry = self.redo_stack.pop()
+        self.undo_stack.append(entry)
+        return [(x, y, chr(new)) for x, y, old, new in JOURNAL_CHANGE.iter_unpack(entry)]
+
 class KoopaEdit(Scene):
     def __init__(self, level_id="1-1"):
         self.level_id = level_id
@@ -531,15 +1153,9 @@ class KoopaEdit(Scene):
         
         # Initialize level data
         if level_id in LEVELS:
-            self.level_data = [row[:] for row in LEVELS[level_id]]
+            self.level_data = as_level_grid(LEVELS[level_id]).copy()
         else:
-            self.level_data = [" " * 100 for _ in range(20)]
-            # Add ground
-            for i in range(15, 20):
-                if i == 15:
-                    self.level_data[i] = "G" * 100
-                else:
-                    self.level_data[i] = "B" * 100
+            self.level_data = new_level_grid()
         
         # Create tool palette
         self.tools = [
@@ -555,10 +1171,17 @@ class KoopaEdit(Scene):
             ("f", NES_PALETTE[31]),  # Fish
             ("s", NES_PALETTE[33])   # Spike
         ]
+        self.tool_colors = dict(self.tools)
+        self.canvas = OrderedDict()  # chunk index -> Surface, least recently drawn first
+        self.canvas_zoom = self.zoom
+        self.journal = EditJournal()
+        self.dirty_columns = set()  # Columns changed since the last save
+        self.file_synced = False  # Whether the .klevel on disk matches the grid apart from dirty_columns
+        self.autosave_timer = 0
         
         # UI elements
-        self.font = pygame.font.SysFont(None, 16)
-        self.title_font = pygame.font.SysFont(None, 24)
+        self.font = get_font(16)
+        self.title_font = get_font(24)
         self.ui_elements = []
         
     def handle(self, events, keys):
@@ -584,6 +1207,7 @@ class KoopaEdit(Scene):
             elif event.type == MOUSEBUTTONUP:
                 self.placing = False
                 self.erasing = False
+                self.journal.end_stroke()
                 
             elif event.type == MOUSEMOTION:
                 if self.placing:
@@ -635,6 +1259,12 @@ class KoopaEdit(Scene):
                 if event.key == K_e and pygame.key.get_mods() & KMOD_CTRL:
                     self.export_as_exe()
                 
+                # Undo/redo
+                if event.key == K_z and pygame.key.get_mods() & KMOD_CTRL:
+                    self.apply(self.journal.redo() if pygame.key.get_mods() & KMOD_SHIFT else self.journal.undo())
+                if event.key == K_y and pygame.key.get_mods() & KMOD_CTRL:
+                    self.apply(self.journal.redo())
+                
                 # World selection
                 if K_0 <= event.key <= K_8:
                     self.current_world = event.key - K_0
@@ -660,107 +1290,176 @@ class KoopaEdit(Scene):
         grid_x = int((mouse_x + self.cam_x) // (TILE * self.zoom))
         grid_y = int((mouse_y + self.cam_y) // (TILE * self.zoom))
         
-        if 0 <= grid_x < 100 and 0 <= grid_y < 20:
-            row = list(self.level_data[grid_y])
-            
+        if 0 <= grid_x < self.level_data.cols and 0 <= grid_y < self.level_data.rows:
             # Special handling for player start and flag
-            if self.selected_tool == "S":
-                # Remove existing player start
-                for y in range(20):
-                    if "S" in self.level_data[y]:
-                        row_old = list(self.level_data[y])
-                        row_old[row_old.index("S")] = " "
-                        self.level_data[y] = "".join(row_old)
-            
-            if self.selected_tool == "F":
-                # Remove existing flag
-                for y in range(20):
-                    if "F" in self.level_data[y]:
-                        row_old = list(self.level_data[y])
-                        row_old[row_old.index("F")] = " "
-                        self.level_data[y] = "".join(row_old)
+            if self.selected_tool in ("S", "F"):
+                # Remove existing player start or flag
+                for x, y in self.level_data.find(self.selected_tool):
+                    self.set_cell(x, y, " ")
             
             # Place the new tile
-            row[grid_x] = self.selected_tool
-            self.level_data[grid_y] = "".join(row)
-            self.unsaved_changes = True
+            self.set_cell(grid_x, grid_y, self.selected_tool)
     
     def erase_tile(self, mouse_x, mouse_y):
         grid_x = int((mouse_x + self.cam_x) // (TILE * self.zoom))
         grid_y = int((mouse_y + self.cam_y) // (TILE * self.zoom))
         
-        if 0 <= grid_x < 100 and 0 <= grid_y < 20:
-            row = list(self.level_data[grid_y])
-            row[grid_x] = " "
-            self.level_data[grid_y] = "".join(row)
+        if 0 <= grid_x < self.level_data.cols and 0 <= grid_y < self.level_data.rows:
+            self.set_cell(grid_x, grid_y, " ")
+    
+    def set_cell(self, x, y, char):
+        # Every edit goes through here so it is journaled, redrawn and saved
+        old = self.level_data.get(x, y)
+        if old != char:
+            self.journal.record(x, y, old, char)
+            self.apply([(x, y, char)])
+    
+    def apply(self, changes):
+        for x, y, char in changes:
+            self.level_data.set(x, y, char)
+            self.repaint(x, y)
+            self.dirty_columns.add(x)
+        if changes:
             self.unsaved_changes = True
     
+    def level_path(self):
+        return f"koopa_edit_levels/{self.level_id}.klevel"
+    
     def save_level(self):
-        LEVELS[self.level_id] = self.level_data
+        # Snapshot the changed columns and hand them to LEVEL_SAVER; the write
+        # itself happens off the main loop
+        start = time.perf_counter()
+        grid = self.level_data
+        LEVELS[self.level_id] = grid.copy()
         self.unsaved_changes = False
+        self.autosave_timer = 0
         
         # Save to file
         if not os.path.exists("koopa_edit_levels"):
             os.makedirs("koopa_edit_levels")
         
-        with open(f"koopa_edit_levels/{self.level_id}.klevel", "w") as f:
-            json.dump(self.level_data, f)
+        grid.detach()
+        if self.file_synced:
+            chunks = sorted({x // EDIT_CHUNK_COLS for x in self.dirty_columns})
+            runs = []
+            for i in chunks:
+                if runs and runs[-1][1] == i:
+                    runs[-1][1] = i + 1
+                else:
+                    runs.append([i, i + 1])
+            patches = [(first * EDIT_CHUNK_COLS, grid.columns(first * EDIT_CHUNK_COLS, min(last * EDIT_CHUNK_COLS, grid.cols)))
+                       for first, last in runs]
+        else:
+            patches = [(0, grid.columns(0, grid.cols))]
+        LEVEL_SAVER.submit(self.level_path(), grid.cols, grid.rows, patches, grid.entities(),
+                           (time.perf_counter() - start) * 1000)
+        self.file_synced = True
+        self.dirty_columns.clear()
     
     def load_level(self):
         try:
-            with open(f"koopa_edit_levels/{self.level_id}.klevel", "r") as f:
-                self.level_data = json.load(f)
-            self.unsaved_changes = False
-            return True
-        except:
+            LEVEL_SAVER.wait()
+            level_data = LevelGrid.open(self.level_path())
+        except (OSError, ValueError):
             return False
+        self.level_data.close()
+        self.level_data = level_data
+        self.canvas.clear()
+        self.journal = EditJournal()
+        self.dirty_columns.clear()
+        self.file_synced = True
+        self.unsaved_changes = False
+        return True
     
     def create_new_level(self):
         self.level_id = f"{self.current_world}-{random.randint(1, 100)}"
-        self.level_data = [" " * 100 for _ in range(20)]
-        # Add ground
-        for i in range(15, 20):
-            if i == 15:
-                self.level_data[i] = "G" * 100
-            else:
-                self.level_data[i] = "B" * 100
+        self.level_data.close()
+        self.level_data = new_level_grid()
+        self.canvas.clear()
+        self.journal = EditJournal()
+        self.dirty_columns = set(range(self.level_data.cols))
+        self.file_synced = False
         self.unsaved_changes = True
     
     def export_as_exe(self):
-        # This would be a complex feature to implement fully
-        # For this demo, we'll just save the level data to a file
+        # Save, then package the level as a standalone zipapp
         self.save_level()
-        
-        # Create a standalone Python file that can play this level
-        with open(f"koopa_edit_levels/{self.level_id}.py", "w") as f:
-            f.write("import pygame\n")
-            f.write("import sys\n")
-            f.write("import math\n")
-            f.write("import random\n")
-            f.write("from pygame.locals import *\n\n")
-            
-            f.write("# Level Data\n")
-            f.write(f"LEVEL_DATA = {self.level_data}\n\n")
-            
-            f.write("# The rest of the game code would be included here...\n")
-            f.write("# This file would contain all the game logic to play the level\n")
+        export_level_package(self.level_data, self.level_id, f"koopa_edit_levels/{self.level_id}.pyz")
         
         # Create a batch file to run it
         with open(f"koopa_edit_levels/play_{self.level_id}.bat", "w") as f:
-            f.write(f"python {self.level_id}.py\n")
+            f.write(f"python {self.level_id}.pyz\n")
+    
+    def canvas_chunk(self, i):
+        # Rendered chunk i of the level, painted on first use
+        chunk = self.canvas.get(i)
+        if chunk is not None:
+            self.canvas.move_to_end(i)
+            return chunk
+        cell = TILE * self.zoom
+        first = i * EDIT_CHUNK_COLS
+        left = int(first * cell)
+        chunk = pygame.Surface((int((first + EDIT_CHUNK_COLS) * cell) - left,
+                                int(self.level_data.rows * cell) + 1))
+        if pygame.display.get_surface() is not None:
+            chunk = chunk.convert()
+        chunk.fill(COLORKEY)
+        chunk.set_colorkey(COLORKEY)
+        for x, y, char in self.level_data.tiles(first, first + EDIT_CHUNK_COLS):
+            self.paint_cell(chunk, left, x, y, char)
+        self.canvas[i] = chunk
+        while len(self.canvas) > EDIT_CACHE_CHUNKS:
+            self.canvas.popitem(last=False)
+        return chunk
+    
+    def paint_cell(self, chunk, left, x, y, char):
+        cell = TILE * self.zoom
+        rect = pygame.Rect(int(x * cell) - left, int(y * cell),
+                           int((x + 1) * cell) - int(x * cell), int((y + 1) * cell) - int(y * cell))
+        if char == " ":
+            chunk.fill(COLORKEY, rect)
+            return
+        pygame.draw.rect(chunk, self.tool_colors.get(char, NES_PALETTE[0]), rect)
+        
+        # Draw tool indicator for special tiles, clipped to the cell so
+        # repainting a neighbour never leaves half a letter behind
+        if char in ["S", "F", "g", "k", "f", "s"]:
+            text = render_text(self.font, char, NES_PALETTE[0])
+            chunk.blit(text, (rect.x + 4, rect.y + 4), (0, 0, rect.width - 4, rect.height - 4))
+    
+    def repaint(self, x, y):
+        # Bring a cached chunk up to date after an edit to one cell
+        chunk = self.canvas.get(x // EDIT_CHUNK_COLS)
+        if chunk is not None:
+            left = int(x // EDIT_CHUNK_COLS * EDIT_CHUNK_COLS * TILE * self.zoom)
+            self.paint_cell(chunk, left, x, y, self.level_data.get(x, y))
     
     def update(self, dt):
-        pass
+        if LEVEL_SAVER.take_failure(self.level_path()):
+            # Write everything again next time
+            self.file_synced = False
+            self.unsaved_changes = True
+        
+        # Autosave once a stroke is finished and the level has sat for a while
+        if self.unsaved_changes and not (self.placing or self.erasing):
+            self.autosave_timer += dt
+            if self.autosave_timer >= AUTOSAVE_INTERVAL:
+                self.save_level()
     
     def draw(self, surf):
         # Clear screen
         theme = WORLD_THEMES[self.current_world]
         surf.fill(NES_PALETTE[theme["sky"]])
         
+        # Only the columns on screen are read from the level
+        cell = TILE * self.zoom
+        first = int(self.cam_x // cell)
+        last = int((self.cam_x + WIDTH) // cell) + 1
+        
         # Draw grid
         if self.grid_visible:
-            for x in range(0, 100, 5):
-                for y in range(0, 20, 5):
+            for x in range(max(first - first % 5, 0), min(last, self.level_data.cols), 5):
+                for y in range(0, self.level_data.rows, 5):
                     pygame.draw.rect(
                         surf, NES_PALETTE[28], 
                         (x * TILE * self.zoom - self.cam_x, y * TILE * self.zoom - self.cam_y, 
@@ -768,30 +1467,13 @@ class KoopaEdit(Scene):
                         1
                     )
         
-        # Draw tiles
-        for y, row in enumerate(self.level_data):
-            for x, char in enumerate(row):
-                if char != " ":
-                    # Get color for tile
-                    color = NES_PALETTE[0]  # Default to black
-                    for tool, tool_color in self.tools:
-                        if tool == char:
-                            color = tool_color
-                            break
-                    
-                    # Draw tile
-                    rect = pygame.Rect(
-                        x * TILE * self.zoom - self.cam_x,
-                        y * TILE * self.zoom - self.cam_y,
-                        TILE * self.zoom,
-                        TILE * self.zoom
-                    )
-                    pygame.draw.rect(surf, color, rect)
-                    
-                    # Draw tool indicator for special tiles
-                    if char in ["S", "F", "g", "k", "f", "s"]:
-                        text = self.font.render(char, True, NES_PALETTE[0])
-                        surf.blit(text, (rect.x + 4, rect.y + 4))
+        # Draw tiles from the cached canvas
+        if self.canvas_zoom != self.zoom:
+            self.canvas.clear()
+            self.canvas_zoom = self.zoom
+        last_chunk = min(last // EDIT_CHUNK_COLS, (self.level_data.cols - 1) // EDIT_CHUNK_COLS)
+        for i in range(max(first // EDIT_CHUNK_COLS, 0), last_chunk + 1):
+            surf.blit(self.canvas_chunk(i), (int(i * EDIT_CHUNK_COLS * cell) - self.cam_x, -self.cam_y))
         
         # Draw palette
         if self.show_palette:
@@ -803,37 +1485,40 @@ class KoopaEdit(Scene):
                     pygame.draw.rect(surf, NES_PALETTE[39], rect, 3)
                 
                 # Draw tool name
-                text = self.font.render(tool, True, NES_PALETTE[0])
+                text = render_text(self.font, tool, NES_PALETTE[0])
                 surf.blit(text, (rect.x + 15, rect.y + 15))
         
         # Draw UI
         pygame.draw.rect(surf, NES_PALETTE[0], (0, 0, WIDTH, 24))
         
         # Title
-        title = self.title_font.render(f"KOOPA EDIT: {self.level_id}", True, NES_PALETTE[39])
+        title = render_text(self.title_font, f"KOOPA EDIT: {self.level_id}", NES_PALETTE[39])
         surf.blit(title, (10, 4))
         
         # Tool info
         tool_name = self.tool_names.get(self.selected_tool, "Unknown")
-        tool_text = self.font.render(f"Tool: {tool_name}", True, NES_PALETTE[39])
+        tool_text = render_text(self.font, f"Tool: {tool_name}", NES_PALETTE[39])
         surf.blit(tool_text, (WIDTH - 150, 4))
         
-        # Status info
-        status = "UNSAVED" if self.unsaved_changes else "SAVED"
-        status_text = self.font.render(f"Status: {status}", True, 
-                                      NES_PALETTE[33] if self.unsaved_changes else NES_PALETTE[14])
+        # Status info, with the last save's main-thread and write times
+        stats = LEVEL_SAVER.stats
+        status = "UNSAVED" if self.unsaved_changes else "SAVING" if stats["pending"] else "SAVED"
+        if stats["saves"]:
+            status += f" {stats['snapshot_ms']:.1f}+{stats['write_ms']:.0f}ms"
+        status_text = render_text(self.font, f"Status: {status}", 
+                                  NES_PALETTE[33] if self.unsaved_changes else NES_PALETTE[14])
         surf.blit(status_text, (WIDTH - 300, 4))
         
         # Instructions
         if self.show_palette:
-            inst_text = self.font.render("1-9: Select Tool | G: Toggle Grid | P: Toggle Palette | A: Toggle Auto-Scroll", True, NES_PALETTE[39])
+            inst_text = render_text(self.font, "1-9: Select Tool | G: Toggle Grid | P: Toggle Palette | A: Toggle Auto-Scroll", NES_PALETTE[39])
             surf.blit(inst_text, (10, HEIGHT - 60))
             
-            inst_text2 = self.font.render("CTRL+S: Save | CTRL+L: Load | CTRL+E: Export | ESC: Exit", True, NES_PALETTE[39])
+            inst_text2 = render_text(self.font, "CTRL+S: Save | CTRL+L: Load | CTRL+E: Export | CTRL+Z/Y: Undo/Redo | ESC: Exit", NES_PALETTE[39])
             surf.blit(inst_text2, (10, HEIGHT - 40))
         
         # World indicator
-        world_text = self.font.render(f"World: {self.current_world}", True, NES_PALETTE[39])
+        world_text = render_text(self.font, f"World: {self.current_world}", NES_PALETTE[39])
         surf.blit(world_text, (WIDTH - 400, 4))
 
 class LevelEditorMenu(Scene):
@@ -884,8 +1569,8 @@ class LevelEditorMenu(Scene):
         s.fill(NES_PALETTE[27])
         
         # Title
-        font = pygame.font.SysFont(None, 30)
-        title = font.render("KOOPA EDIT - LEVEL SELECT", True, NES_PALETTE[33])
+        font = get_font(30)
+        title = render_text(font, "KOOPA EDIT - LEVEL SELECT", NES_PALETTE[33])
         s.blit(title, (WIDTH//2 - title.get_width()//2, 20))
         
         # Draw level grid
@@ -902,8 +1587,8 @@ class LevelEditorMenu(Scene):
                     pygame.draw.rect(s, NES_PALETTE[28], (x, y, 60, 30))
                 
                 # Level text
-                level_font = pygame.font.SysFont(None, 20)
-                level_text = level_font.render(level_id, True, NES_PALETTE[39])
+                level_font = get_font(20)
+                level_text = render_text(level_font, level_id, NES_PALETTE[39])
                 s.blit(level_text, (x + 30 - level_text.get_width()//2, 
                                    y + 15 - level_text.get_height()//2))
                 
@@ -914,7 +1599,7 @@ class LevelEditorMenu(Scene):
         # Draw selected level info
         w, l = map(int, self.selected_level.split("-"))
         theme = WORLD_THEMES[w]
-        info_text = font.render(f"Selected: {self.selected_level} - {theme['name']}", True, NES_PALETTE[39])
+        info_text = render_text(font, f"Selected: {self.selected_level} - {theme['name']}", NES_PALETTE[39])
         s.blit(info_text, (WIDTH//2 - info_text.get_width()//2, HEIGHT - 80))
         
         # Draw thumbnail
@@ -923,8 +1608,8 @@ class LevelEditorMenu(Scene):
             s.blit(thumb, (WIDTH//2 - 16, HEIGHT - 60))
         
         # Draw instructions
-        font = pygame.font.SysFont(None, 16)
-        text = font.render("Arrow keys: Select Level | Enter: Edit | N: New Level | Esc: Back", True, NES_PALETTE[39])
+        font = get_font(16)
+        text = render_text(font, "Arrow keys: Select Level | Enter: Edit | N: New Level | Esc: Back", NES_PALETTE[39])
         s.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT - 20))
 
 # Scenes
@@ -950,7 +1635,7 @@ class TitleScreen(Scene):
             
         # Animate logo coming down
         if self.logo_y < self.logo_target_y:
-            self.logo_y += 3
+            self.logo_y += 3 * dt * 60
             
     def draw(self, surf):
         # Background
@@ -966,17 +1651,17 @@ class TitleScreen(Scene):
         pygame.draw.rect(surf, NES_PALETTE[33], (box_x, box_y, box_width, box_height))
         
         # Title inside box
-        title_font = pygame.font.SysFont(None, 32)
-        title = title_font.render("KOOPA ENGINE 1.0A", True, NES_PALETTE[39])
+        title_font = get_font(32)
+        title = render_text(title_font, "KOOPA ENGINE 1.0A", NES_PALETTE[39])
         surf.blit(title, (box_x + (box_width - title.get_width()) // 2, box_y + 15))
         
-        subtitle_font = pygame.font.SysFont(None, 16)
-        subtitle = subtitle_font.render("8 Worlds Edition + KOOPA EDIT", True, NES_PALETTE[21])
+        subtitle_font = get_font(16)
+        subtitle = render_text(subtitle_font, "8 Worlds Edition + KOOPA EDIT", NES_PALETTE[21])
         surf.blit(subtitle, (box_x + (box_width - subtitle.get_width()) // 2, box_y + 50))
         
         # Copyright
-        copyright_font = pygame.font.SysFont(None, 14)
-        copyright = copyright_font.render("[C] Team Flames 20XX [1985] - Nintendo", True, NES_PALETTE[0])
+        copyright_font = get_font(14)
+        copyright = render_text(copyright_font, "[C] Team Flames 20XX [1985] - Nintendo", NES_PALETTE[0])
         surf.blit(copyright, (WIDTH//2 - copyright.get_width()//2, box_y + box_height + 20))
         
         # Mario and enemies
@@ -1009,11 +1694,11 @@ class TitleScreen(Scene):
         
         # Press Start
         if self.logo_y >= self.logo_target_y and int(self.timer * 10) % 2 == 0:
-            font = pygame.font.SysFont(None, 24)
-            text = font.render("PRESS ENTER TO PLAY", True, NES_PALETTE[39])
+            font = get_font(24)
+            text = render_text(font, "PRESS ENTER TO PLAY", NES_PALETTE[39])
             surf.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT - 60))
             
-            text = font.render("PRESS E FOR KOOPA EDIT", True, NES_PALETTE[39])
+            text = render_text(font, "PRESS E FOR KOOPA EDIT", NES_PALETTE[39])
             surf.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT - 30))
 
 class FileSelect(Scene):
@@ -1040,8 +1725,8 @@ class FileSelect(Scene):
         s.fill(NES_PALETTE[27])
         
         # Title
-        font = pygame.font.SysFont(None, 30)
-        title = font.render("SELECT PLAYER", True, NES_PALETTE[33])
+        font = get_font(30)
+        title = render_text(font, "SELECT PLAYER", NES_PALETTE[33])
         s.blit(title, (WIDTH//2 - title.get_width()//2, 20))
         
         # Draw file slots
@@ -1054,8 +1739,8 @@ class FileSelect(Scene):
             pygame.draw.rect(s, NES_PALETTE[33], (x, y, 40, 60))
             
             # Slot number
-            slot_font = pygame.font.SysFont(None, 20)
-            slot_text = slot_font.render(f"{i+1}", True, NES_PALETTE[39])
+            slot_font = get_font(20)
+            slot_text = render_text(slot_font, f"{i+1}", NES_PALETTE[39])
             s.blit(slot_text, (x+18, y+5))
             
             # Selection indicator
@@ -1065,8 +1750,8 @@ class FileSelect(Scene):
             # World preview
             if state.progress[i]:
                 world = state.progress[i]["world"]
-                world_font = pygame.font.SysFont(None, 16)
-                world_text = world_font.render(f"WORLD {world}", True, NES_PALETTE[39])
+                world_font = get_font(16)
+                world_text = render_text(world_font, f"WORLD {world}", NES_PALETTE[39])
                 s.blit(world_text, (x+20 - world_text.get_width()//2, y+50))
                 
                 # Draw thumbnail
@@ -1107,8 +1792,8 @@ class WorldMapScene(Scene):
         s.fill(NES_PALETTE[27])
         
         # Title
-        font = pygame.font.SysFont(None, 30)
-        title = font.render("WORLD MAP", True, NES_PALETTE[33])
+        font = get_font(30)
+        title = render_text(font, "WORLD MAP", NES_PALETTE[33])
         s.blit(title, (WIDTH//2 - title.get_width()//2, 20))
         
         # Draw world grid
@@ -1132,15 +1817,15 @@ class WorldMapScene(Scene):
                 pygame.draw.line(s, NES_PALETTE[33], (x+world_size, y), (x, y+world_size), 3)
             
             # Draw world number
-            world_font = pygame.font.SysFont(None, 20)
-            world_text = world_font.render(f"{world}", True, NES_PALETTE[39])
+            world_font = get_font(20)
+            world_text = render_text(world_font, f"{world}", NES_PALETTE[39])
             s.blit(world_text, (x + world_size//2 - world_text.get_width()//2, 
                                y + world_size//2 - world_text.get_height()//2))
             
             # Draw world name if selected
             if world == self.selection:
-                name_font = pygame.font.SysFont(None, 14)
-                name_text = name_font.render(theme["name"], True, NES_PALETTE[39])
+                name_font = get_font(14)
+                name_text = render_text(name_font, theme["name"], NES_PALETTE[39])
                 s.blit(name_text, (WIDTH//2 - name_text.get_width()//2, HEIGHT - 40))
                 
         # Draw cursor on selected world
@@ -1161,56 +1846,105 @@ class WorldMapScene(Scene):
         pygame.draw.rect(s, NES_PALETTE[39], (mario_x+4, mario_y, 8, 8))
         
         # Draw instructions
-        font = pygame.font.SysFont(None, 14)
-        text = font.render("Arrow keys: Move  Enter: Select  Esc: Back", True, NES_PALETTE[39])
+        font = get_font(14)
+        text = render_text(font, "Arrow keys: Move  Enter: Select  Esc: Back", NES_PALETTE[39])
         s.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT - 20))
         
         # Draw unlocked worlds indicator
-        unlocked_text = font.render(f"Unlocked Worlds: {max(state.unlocked_worlds)}/8", True, NES_PALETTE[39])
+        unlocked_text = render_text(font, f"Unlocked Worlds: {max(state.unlocked_worlds)}/8", NES_PALETTE[39])
         s.blit(unlocked_text, (10, HEIGHT - 20))
 
 class LevelScene(Scene):
     def __init__(self, level_id):
-        self.map = TileMap(LEVELS[level_id], level_id)
+        grid = as_level_grid(LEVELS[level_id])
+        if grid.cols * TILE > STREAM_MIN_WIDTH:
+            self.map = StreamingTileMap(grid, level_id)
+        else:
+            self.map = TileMap(grid, level_id)
         self.player = Player(50, 100)
         self.enemies = []
+        self.spawned = {}  # chunk index -> {(x, y) spawn cell: enemy made there}
         self.cam = 0.0
+        self.prev_cam = 0.0
         self.level_id = level_id
         self.time = 300
         self.coins = 0
         self.end_level = False
         self.end_timer = 0
         self.mushrooms = []
-        world = int(level_id.split("-")[0])
-        self.theme = WORLD_THEMES[world]
+        self.world = int(level_id.split("-")[0])
+        self.theme = WORLD_THEMES[self.world]
         
         # Parse level for enemies and player start
-        for y, row in enumerate(LEVELS[level_id]):
-            for x, char in enumerate(row):
+        if isinstance(self.map, StreamingTileMap):
+            # Enemies spawn as their columns stream in
+            starts = sorted((y, x) for x, y in grid.find("S"))
+            if starts:
+                self.player.y, self.player.x = starts[-1][0] * TILE, starts[-1][1] * TILE
+            self.cam = max(0, min(self.player.x - WIDTH // 2, self.map.width - WIDTH))
+            spawns = self.map.update_window(self.cam)
+        else:
+            spawns = sorted(grid.entities(), key=lambda spawn: (spawn[1], spawn[0]))
+            for x, y, char in spawns:
                 if char == "S":
                     self.player.x = x * TILE
                     self.player.y = y * TILE
-                elif char == "g":
-                    self.enemies.append(Goomba(x * TILE, y * TILE))
-                elif char == "k":
-                    self.enemies.append(Koopa(x * TILE, y * TILE))
-                elif char == "f":  # Fish enemy for water worlds
-                    if self.theme.get("water"):
-                        self.enemies.append(Fish(x * TILE, y * TILE))
-                    else:
-                        self.enemies.append(Goomba(x * TILE, y * TILE))
-                elif char == "s":  # Spike enemy for castle worlds
-                    if world in (7, 8):
-                        self.enemies.append(Spike(x * TILE, y * TILE))
-                    else:
-                        self.enemies.append(Goomba(x * TILE, y * TILE))
+        self.spawn(spawns)
+    
+    def spawn(self, spawns):
+        # Each spawn cell makes its enemy once while its chunk stays loaded,
+        # so an enemy that died or walked off is not made again meanwhile
+        for x, y, char in spawns:
+            if char not in ("g", "k", "f", "s"):
+                continue
+            cells = self.spawned.setdefault(x * TILE // CHUNK_WIDTH, {})
+            if (x, y) in cells:
+                continue
+            if char == "g":
+                enemy = Goomba(x * TILE, y * TILE)
+            elif char == "k":
+                enemy = Koopa(x * TILE, y * TILE)
+            elif char == "f":  # Fish enemy for water worlds
+                if self.theme.get("water"):
+                    enemy = Fish(x * TILE, y * TILE)
+                else:
+                    enemy = Goomba(x * TILE, y * TILE)
+            elif char == "s":  # Spike enemy for castle worlds
+                if self.world in (7, 8):
+                    enemy = Spike(x * TILE, y * TILE)
+                else:
+                    enemy = Goomba(x * TILE, y * TILE)
+            cells[(x, y)] = enemy
+            self.enemies.append(enemy)
+    
+    def evict_spawns(self):
+        # Forget the chunks the map has unloaded, together with every enemy
+        # they spawned, wherever it walked; they spawn afresh if it reloads
+        dropped = set()
+        for i in [i for i in self.spawned if i not in self.map.resident]:
+            dropped.update(id(enemy) for enemy in self.spawned.pop(i).values())
+        if dropped:
+            self.enemies = [enemy for enemy in self.enemies if id(enemy) not in dropped]
     
     def handle(self, evts, keys):
         for e in evts:
             if e.type == KEYDOWN and e.key == K_ESCAPE:
-                push(WorldMapScene())
+                if RUNTIME_ONLY:
+                    SCENES.clear()  # Nothing to go back to in a level package
+                else:
+                    push(WorldMapScene())
                 
+    def movers(self):
+        # Everything whose drawn position is interpolated between steps
+        return [self.player] + self.enemies
+    
     def update(self, dt):
+        # Remember where everything was for interpolated drawing
+        self.prev_cam = self.cam
+        for mover in self.movers():
+            mover.prev_x = mover.x
+            mover.prev_y = mover.y
+        
         # Update time
         self.time -= dt
         
@@ -1224,9 +1958,21 @@ class LevelScene(Scene):
         
         # Camera follow player
         target = self.player.x - WIDTH // 2
-        self.cam += (target - self.cam) * 0.1
+        self.cam += (target - self.cam) * (1 - 0.9 ** (dt * 60))
         self.cam = max(0, min(self.cam, self.map.width - WIDTH))
         
+        if isinstance(self.map, StreamingTileMap):
+            # Only the resident chunks keep enemies and spawn records, so both
+            # stay bounded however long the level is. Enemies outside the
+            # window have no tiles to stand on and are dropped, along with
+            # dead ones; their spawn cells stay used until the chunk unloads.
+            span = self.map.left, self.map.right
+            self.spawn(self.map.update_window(self.cam))
+            if (self.map.left, self.map.right) != span:
+                self.evict_spawns()
+            self.enemies = [enemy for enemy in self.enemies
+                            if enemy.active and self.map.left <= enemy.x < self.map.right]
+        
         # Check for end of level
         if self.player.x > self.map.width - 100 and not self.end_level:
             self.end_level = True
@@ -1240,7 +1986,10 @@ class LevelScene(Scene):
                 world = int(world)
                 level = int(level)
                 
-                if level < 4:
+                if RUNTIME_ONLY:
+                    # A level package holds just this level
+                    push(WinScreen())
+                elif level < 4:
                     next_level = f"{world}-{level+1}"
                     push(LevelScene(next_level))
                 else:
@@ -1252,45 +2001,58 @@ class LevelScene(Scene):
                     push(WorldMapScene())
         
     def draw(self, s):
+        # Draw the world blended between the last two simulation steps
+        alpha = self.alpha
+        movers = self.movers()
+        current = [(mover.x, mover.y) for mover in movers]
+        for mover in movers:
+            mover.x = mover.prev_x + (mover.x - mover.prev_x) * alpha
+            mover.y = mover.prev_y + (mover.y - mover.prev_y) * alpha
+        cam = self.prev_cam + (self.cam - self.prev_cam) * alpha
+        
         # Draw map
-        self.map.draw(s, self.cam)
+        self.map.draw(s, cam)
         
         # Draw enemies
         for enemy in self.enemies:
-            enemy.draw(s, self.cam)
+            enemy.draw(s, cam)
             
         # Draw player
-        self.player.draw(s, self.cam)
+        self.player.draw(s, cam)
+        
+        for mover, (x, y) in zip(movers, current):
+            mover.x = x
+            mover.y = y
         
         # Draw HUD
         pygame.draw.rect(s, NES_PALETTE[0], (0, 0, WIDTH, 20))
         
         # Score
-        font = pygame.font.SysFont(None, 16)
-        score_text = font.render(f"SCORE {state.score:06d}", True, NES_PALETTE[39])
+        font = get_font(16)
+        score_text = render_text(font, f"SCORE {state.score:06d}", NES_PALETTE[39])
         s.blit(score_text, (10, 4))
         
         # Coins
-        coin_text = font.render(f"COINS {state.coins:02d}", True, NES_PALETTE[39])
+        coin_text = render_text(font, f"COINS {state.coins:02d}", NES_PALETTE[39])
         s.blit(coin_text, (WIDTH//2 - coin_text.get_width()//2, 4))
         
         # World
-        world_text = font.render(f"WORLD {self.level_id}", True, NES_PALETTE[39])
+        world_text = render_text(font, f"WORLD {self.level_id}", NES_PALETTE[39])
         s.blit(world_text, (WIDTH - world_text.get_width() - 10, 4))
         
         # Time
-        time_text = font.render(f"TIME {int(self.time):03d}", True, NES_PALETTE[39])
+        time_text = render_text(font, f"TIME {int(self.time):03d}", NES_PALETTE[39])
         s.blit(time_text, (WIDTH//2 - time_text.get_width()//2, 4))
         
         # Lives
-        lives_text = font.render(f"x{state.lives}", True, NES_PALETTE[39])
+        lives_text = render_text(font, f"x{state.lives}", NES_PALETTE[39])
         s.blit(lives_text, (WIDTH - 60, 4))
         # Draw small mario for lives indicator
         pygame.draw.rect(s, NES_PALETTE[33], (WIDTH - 80, 6, 8, 8))
         pygame.draw.rect(s, NES_PALETTE[39], (WIDTH - 80, 2, 8, 8))
         
         # Draw world theme name
-        theme_text = font.render(self.theme["name"], True, NES_PALETTE[39])
+        theme_text = render_text(font, self.theme["name"], NES_PALETTE[39])
         s.blit(theme_text, (WIDTH//2 - theme_text.get_width()//2, HEIGHT - 20))
 
 class GameOverScene(Scene):
@@ -1306,12 +2068,12 @@ class GameOverScene(Scene):
             
     def draw(self, s):
         s.fill(NES_PALETTE[0])
-        font = pygame.font.SysFont(None, 40)
-        text = font.render("GAME OVER", True, NES_PALETTE[33])
+        font = get_font(40)
+        text = render_text(font, "GAME OVER", NES_PALETTE[33])
         s.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 - 20))
         
-        font = pygame.font.SysFont(None, 20)
-        text = font.render(f"FINAL SCORE: {state.score}", True, NES_PALETTE[39])
+        font = get_font(20)
+        text = render_text(font, f"FINAL SCORE: {state.score}", NES_PALETTE[39])
         s.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 + 20))
 
 class WinScreen(Scene):
@@ -1323,7 +2085,7 @@ class WinScreen(Scene):
         self.timer -= dt
         
         # Add fireworks
-        if random.random() < 0.2:
+        if random.random() < 0.2 * dt * 60:
             self.fireworks.append({
                 "x": random.randint(50, WIDTH-50),
                 "y": HEIGHT,
@@ -1334,7 +2096,7 @@ class WinScreen(Scene):
             
         # Update fireworks
         for fw in self.fireworks[:]:
-            fw["y"] -= 3
+            fw["y"] -= 3 * dt * 60
             if fw["y"] < HEIGHT//3:
                 # Explode
                 for i in range(20):
@@ -1352,15 +2114,18 @@ class WinScreen(Scene):
         # Update particles
         for fw in self.fireworks:
             for p in fw["particles"][:]:
-                p["x"] += p["vx"]
-                p["y"] += p["vy"]
-                p["vy"] += 0.1
-                p["life"] -= 0.02
+                p["x"] += p["vx"] * dt * 60
+                p["y"] += p["vy"] * dt * 60
+                p["vy"] += 0.1 * dt * 60
+                p["life"] -= 0.02 * dt * 60
                 if p["life"] <= 0:
                     fw["particles"].remove(p)
                     
         if self.timer <= 0:
-            push(TitleScreen())
+            if RUNTIME_ONLY:
+                SCENES.clear()
+            else:
+                push(TitleScreen())
             
     def draw(self, s):
         s.fill(NES_PALETTE[0])
@@ -1374,45 +2139,134 @@ class WinScreen(Scene):
                 pygame.draw.circle(s, color, (int(p["x"]), int(p["y"])), 2)
         
         # Text
-        font = pygame.font.SysFont(None, 40)
-        text = font.render("CONGRATULATIONS!", True, NES_PALETTE[33])
+        font = get_font(40)
+        text = render_text(font, "CONGRATULATIONS!", NES_PALETTE[33])
         s.blit(text, (WIDTH//2 - text.get_width()//2, 50))
         
-        font = pygame.font.SysFont(None, 30)
-        text = font.render("YOU SAVED THE PRINCESS!", True, NES_PALETTE[39])
+        font = get_font(30)
+        text = render_text(font, "YOU SAVED THE PRINCESS!", NES_PALETTE[39])
         s.blit(text, (WIDTH//2 - text.get_width()//2, 100))
         
-        font = pygame.font.SysFont(None, 24)
-        text = font.render(f"FINAL SCORE: {state.score}", True, NES_PALETTE[31])
+        font = get_font(24)
+        text = render_text(font, f"FINAL SCORE: {state.score}", NES_PALETTE[31])
         s.blit(text, (WIDTH//2 - text.get_width()//2, 150))
 
+# Exported level packages: a zipapp holding this file as the runtime, one
+# level as a binary .klevel and that level's tile atlas baked to PNG
+PACKAGE_MAIN = """import os
+import sys
+os.environ["KOOPA_RUNTIME"] = "1"
+import koopa_engine
+koopa_engine.play_package(os.path.dirname(os.path.abspath(__file__)), {level_id!r})
+"""
+
+def export_level_package(grid, level_id, path):
+    theme = WORLD_THEMES[int(level_id.split("-")[0])]
+    atlas = io.BytesIO()
+    pygame.image.save(TileAtlas(theme).surface, atlas, "atlas.png")
+    with open(os.path.abspath(__file__), "rb") as f:
+        source = f.read()
+    
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(b"#!/usr/bin/env python3\n")
+        with zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as package:
+            package.writestr("__main__.py", PACKAGE_MAIN.format(level_id=level_id))
+            package.writestr("koopa_engine.py", source)
+            package.writestr("level.klevel", grid.to_bytes())
+            package.writestr("atlas.png", atlas.getvalue())
+    os.chmod(temp_path, 0o755)
+    os.replace(temp_path, path)
+
+def play_package(archive, level_id):
+    # Entry point of an exported level package. With --check it plays two
+    # seconds headless and exits, to verify a package without a display.
+    check = "--check" in sys.argv
+    if check:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+    with zipfile.ZipFile(archive) as package:
+        LEVELS[level_id] = LevelGrid.from_buffer(bytearray(package.read("level.klevel")), level_id)
+        atlas = package.read("atlas.png")
+    theme = WORLD_THEMES[int(level_id.split("-")[0])]
+    BAKED_ATLASES[theme["name"]] = pygame.image.load(io.BytesIO(atlas), "atlas.png")
+    if not check:
+        main(LevelScene(level_id))
+        return
+    
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    scene = LevelScene(level_id)
+    push(scene)
+    for frame in range(FPS * 2):
+        for _ in range(SIM_HZ // FPS):
+            scene.update(SIM_DT)
+        scene.draw(screen)
+    print(f"{level_id}: {LEVELS[level_id].cols}x{LEVELS[level_id].rows}, {len(scene.enemies)} enemies, "
+          f"player at {scene.player.x:.0f},{scene.player.y:.0f} after {frame + 1} frames")
+
 # Main game
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("KOOPA ENGINE 1.0A - 8 Worlds Edition + KOOPA EDIT")
-clock = pygame.time.Clock()
-
-# Start with title screen
-push(TitleScreen())
-
-while SCENES:
-    dt = clock.tick(FPS) / 1000
-    events = pygame.event.get()
-    keys = pygame.key.get_pressed()
-    
-    # Handle quit events
-    for e in events:
-        if e.type == QUIT:
-            pygame.quit()
-            sys.exit()
-    
-    # Update current scene
-    scene = SCENES[-1]
-    scene.handle(events, keys)
-    scene.update(dt)
-    scene.draw(screen)
-    
-    pygame.display.flip()
-
-pygame.quit()
-sys.exit()
+def main(scene=None):
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("KOOPA ENGINE 1.0A - 8 Worlds Edition + KOOPA EDIT")
+    clock = pygame.time.Clock()
+
+    # Start with title screen, or the given scene
+    push(scene or TitleScreen())
+
+    accumulator = 0.0
+    try:
+        while SCENES:
+            accumulator += clock.tick(FPS) / 1000
+            events = pygame.event.get()
+            keys = pygame.key.get_pressed()
+        
+            # Handle quit events
+            for e in events:
+                if e.type == QUIT:
+                    sys.exit()
+        
+            SCENES[-1].handle(events, keys)
+            
+            # Step the simulation in fixed increments; if rendering fell too far
+            # behind, drop the backlog rather than spiralling
+            steps = 0
+            while accumulator >= SIM_DT and SCENES:
+                if steps == MAX_SIM_STEPS:
+                    accumulator = 0.0
+                    break
+                SCENES[-1].update(SIM_DT)
+                accumulator -= SIM_DT
+                steps += 1
+            if not SCENES:
+                break
+            
+            # Draw the current scene part way to the next step
+            scene = SCENES[-1]
+            scene.alpha = accumulator / SIM_DT
+            scene.draw(screen)
+        
+            pygame.display.flip()
+    finally:
+        # However the loop ends, let the daemon writer finish queued saves
+        LEVEL_SAVER.wait()
+        pygame.quit()
+    sys.exit()
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--convert"]:
+        # Convert JSON .klevel files to the binary format in place
+        for path in sys.argv[2:]:
+            grid = convert_klevel(path)
+            print(f"{path}: {grid.cols}x{grid.rows} binary .klevel")
+    elif sys.argv[1:2] == ["--export"]:
+        # Package a level as a zipapp: --export LEVEL [OUT.pyz]. A saved
+        # koopa_edit_levels/LEVEL.klevel is used over the built-in level.
+        level_id = sys.argv[2]
+        path = f"koopa_edit_levels/{level_id}.klevel"
+        grid = LevelGrid.open(path) if os.path.exists(path) else LEVELS[level_id]
+        out = sys.argv[3] if len(sys.argv) > 3 else f"{level_id}.pyz"
+        export_level_package(grid, level_id, out)
+        print(f"{out}: {os.path.getsize(out)} bytes")
+    else:
+        main()
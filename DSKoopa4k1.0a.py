@@ -2,6 +2,7 @@ import pygame
 import sys
 import math
 import random
+from collections import OrderedDict
 from pygame.locals import *
 
 # Constants
@@ -135,6 +136,31 @@ for level_id, level_data in LEVELS.items():
                 thumb.set_at((x, y+10), YOSHI_PALETTE[4])  # Red
     THUMBNAILS[level_id] = thumb
 
+# Sprite frames shared by every entity, keyed by (class, frame, facing, power
+# state, palette) and dropped least recently used first. Each is drawn into a
+# padded per-pixel alpha surface, as in the main engine. KOOPA EDIT colorkeys
+# its sprites instead, which is faster there and blits the same pixels.
+SPRITE_PAD = 16  # Room for arms and heads drawn outside the hitbox
+SPRITE_PALETTES = {"yoshi": YOSHI_PALETTE}
+SPRITE_CACHE_SIZE = 64
+SPRITE_CACHE = OrderedDict()
+
+def get_sprite(cls, frame, facing_right, power, palette="yoshi"):
+    key = (cls, frame, facing_right, power, palette)
+    sprite = SPRITE_CACHE.get(key)
+    if sprite is None:
+        width, height = cls.SPRITE_SIZE
+        sprite = pygame.Surface((width + 2 * SPRITE_PAD, height + 2 * SPRITE_PAD), pygame.SRCALPHA)
+        cls.draw_sprite(sprite, SPRITE_PAD, SPRITE_PAD, SPRITE_PALETTES[palette], frame, facing_right, power)
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert_alpha()
+        SPRITE_CACHE[key] = sprite
+        while len(SPRITE_CACHE) > SPRITE_CACHE_SIZE:
+            SPRITE_CACHE.popitem(last=False)
+    else:
+        SPRITE_CACHE.move_to_end(key)
+    return sprite
+
 # Entity classes
 class Entity:
     def __init__(self, x, y):
@@ -184,10 +210,21 @@ class Entity:
                 elif self.vx < 0 and self.x < rect.right and self.x + self.width > rect.right:
                     self.x = rect.right
                     self.vx = 0
-                    
-    def draw(self, surf, cam):
+
+    # Sprite cell size before padding; draw_sprite paints one frame into it
+    SPRITE_SIZE = (TILE, TILE)
+
+    def sprite_key(self):
+        return 0, True, None
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
         pass
 
+    def draw(self, surf, cam):
+        sprite = get_sprite(type(self), *self.sprite_key())
+        surf.blit(sprite, (int(self.x - cam) - SPRITE_PAD, int(self.y) - SPRITE_PAD))
+
 class Player(Entity):
     def __init__(self, x, y):
         super().__init__(x, y)
@@ -196,7 +233,6 @@ class Player(Entity):
         self.invincible = 0
         self.animation_frame = 0
         self.walk_timer = 0
-        self.pre_rendered = None
         
     def update(self, colliders, dt, enemies):
         # Handle input
@@ -256,63 +292,56 @@ class Player(Entity):
                             self.vx = 0
                             self.vy = 0
                     
-    def draw(self, surf, cam):
-        if self.invincible > 0 and int(self.invincible * 10) % 2 == 0:
-            return  # Blink during invincibility
-            
-        x = int(self.x - cam)
-        y = int(self.y)
-        
+    SPRITE_SIZE = (TILE, TILE * 2)
+
+    def sprite_key(self):
+        return 0, True, state.mario_size
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
         # Draw Mario based on size
-        if state.mario_size == "big":
-            # Pre-render to surface for performance
-            if not self.pre_rendered:
-                self.pre_rendered = pygame.Surface((TILE, TILE * 2), pygame.SRCALPHA)
-                # Body
-                pygame.draw.ellipse(self.pre_rendered, YOSHI_PALETTE[4], (4, 8, 8, 16))  # Red
-                pygame.draw.ellipse(self.pre_rendered, YOSHI_PALETTE[5], (5, 9, 6, 14))  # Highlight
-                
-                # Head
-                pygame.draw.circle(self.pre_rendered, YOSHI_PALETTE[2], (8, 6), 6)  # Face
-                pygame.draw.circle(self.pre_rendered, YOSHI_PALETTE[0], (8, 6), 5)  # Highlight
-                
-                # Hat
-                pygame.draw.rect(self.pre_rendered, YOSHI_PALETTE[4], (2, 0, 12, 4))  # Red hat
-                pygame.draw.ellipse(self.pre_rendered, YOSHI_PALETTE[5], (3, 1, 10, 3))  # Highlight
-                
-                # Arms
-                pygame.draw.ellipse(self.pre_rendered, YOSHI_PALETTE[2], (0, 10, 4, 6))  # Left arm
-                pygame.draw.ellipse(self.pre_rendered, YOSHI_PALETTE[0], (0, 10, 4, 6), 1)  # Outline
-                pygame.draw.ellipse(self.pre_rendered, YOSHI_PALETTE[2], (12, 10, 4, 6))  # Right arm
-                pygame.draw.ellipse(self.pre_rendered, YOSHI_PALETTE[0], (12, 10, 4, 6), 1)  # Outline
-                
-                # Legs
-                pygame.draw.ellipse(self.pre_rendered, YOSHI_PALETTE[6], (2, 24, 4, 8))  # Left leg
-                pygame.draw.ellipse(self.pre_rendered, YOSHI_PALETTE[0], (2, 24, 4, 8), 1)  # Outline
-                pygame.draw.ellipse(self.pre_rendered, YOSHI_PALETTE[6], (10, 24, 4, 8))  # Right leg
-                pygame.draw.ellipse(self.pre_rendered, YOSHI_PALETTE[0], (10, 24, 4, 8), 1)  # Outline
+        if power == "big":
+            # Body
+            pygame.draw.ellipse(surf, palette[4], (x+4, y+8, 8, 16))  # Red
+            pygame.draw.ellipse(surf, palette[5], (x+5, y+9, 6, 14))  # Highlight
+            
+            # Head
+            pygame.draw.circle(surf, palette[2], (x+8, y+6), 6)  # Face
+            pygame.draw.circle(surf, palette[0], (x+8, y+6), 5)  # Highlight
             
-            # Draw pre-rendered surface
-            surf.blit(self.pre_rendered, (x, y))
+            # Hat
+            pygame.draw.rect(surf, palette[4], (x+2, y, 12, 4))  # Red hat
+            pygame.draw.ellipse(surf, palette[5], (x+3, y+1, 10, 3))  # Highlight
+            
+            # Arms
+            pygame.draw.ellipse(surf, palette[2], (x, y+10, 4, 6))  # Left arm
+            pygame.draw.ellipse(surf, palette[0], (x, y+10, 4, 6), 1)  # Outline
+            pygame.draw.ellipse(surf, palette[2], (x+12, y+10, 4, 6))  # Right arm
+            pygame.draw.ellipse(surf, palette[0], (x+12, y+10, 4, 6), 1)  # Outline
+            
+            # Legs
+            pygame.draw.ellipse(surf, palette[6], (x+2, y+24, 4, 8))  # Left leg
+            pygame.draw.ellipse(surf, palette[0], (x+2, y+24, 4, 8), 1)  # Outline
+            pygame.draw.ellipse(surf, palette[6], (x+10, y+24, 4, 8))  # Right leg
+            pygame.draw.ellipse(surf, palette[0], (x+10, y+24, 4, 8), 1)  # Outline
         else:
             # Small Mario
-            # Pre-render to surface for performance
-            if not self.pre_rendered:
-                self.pre_rendered = pygame.Surface((TILE, TILE), pygame.SRCALPHA)
-                # Body
-                pygame.draw.ellipse(self.pre_rendered, YOSHI_PALETTE[4], (4, 8, 8, 8))  # Red
-                pygame.draw.ellipse(self.pre_rendered, YOSHI_PALETTE[5], (5, 9, 6, 6))  # Highlight
-                
-                # Head
-                pygame.draw.circle(self.pre_rendered, YOSHI_PALETTE[2], (8, 4), 4)  # Face
-                pygame.draw.circle(self.pre_rendered, YOSHI_PALETTE[0], (8, 4), 3)  # Highlight
-                
-                # Hat
-                pygame.draw.rect(self.pre_rendered, YOSHI_PALETTE[4], (2, 0, 12, 2))  # Red hat
-                pygame.draw.ellipse(self.pre_rendered, YOSHI_PALETTE[5], (3, 1, 10, 1))  # Highlight
+            # Body
+            pygame.draw.ellipse(surf, palette[4], (x+4, y+8, 8, 8))  # Red
+            pygame.draw.ellipse(surf, palette[5], (x+5, y+9, 6, 6))  # Highlight
+            
+            # Head
+            pygame.draw.circle(surf, palette[2], (x+8, y+4), 4)  # Face
+            pygame.draw.circle(surf, palette[0], (x+8, y+4), 3)  # Highlight
             
-            # Draw pre-rendered surface
-            surf.blit(self.pre_rendered, (x, y))
+            # Hat
+            pygame.draw.rect(surf, palette[4], (x+2, y, 12, 2))  # Red hat
+            pygame.draw.ellipse(surf, palette[5], (x+3, y+1, 10, 1))  # Highlight
+
+    def draw(self, surf, cam):
+        if self.invincible > 0 and int(self.invincible * 10) % 2 == 0:
+            return  # Blink during invincibility
+        super().draw(surf, cam)
 
 class Goomba(Entity):
     def __init__(self, x, y):
@@ -320,7 +349,6 @@ class Goomba(Entity):
         self.vx = -0.5
         self.animation_frame = 0
         self.walk_timer = 0
-        self.pre_rendered = [None, None]
         
     def update(self, colliders, dt):
         # Turn around at edges
@@ -346,70 +374,58 @@ class Goomba(Entity):
             self.walk_timer = 0
             self.animation_frame = (self.animation_frame + 1) % 2
             
+    def sprite_key(self):
+        return self.animation_frame, True, None
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
+        # Body
+        pygame.draw.ellipse(surf, palette[8], (x+2, y+4, 12, 12))  # Brown
+        pygame.draw.ellipse(surf, palette[9], (x+3, y+5, 10, 10))  # Highlight
+        
+        # Feet
+        foot_offset = 0 if frame == 0 else 2
+        pygame.draw.ellipse(surf, palette[10], (x+2, y+14, 4, 2))  # Left foot
+        pygame.draw.ellipse(surf, palette[10], (x+10, y+14 + foot_offset, 4, 2))  # Right foot
+        
+        # Eyes
+        pygame.draw.ellipse(surf, palette[0], (x+4, y+6, 2, 2))  # Left eye
+        pygame.draw.ellipse(surf, palette[0], (x+10, y+6, 2, 2))  # Right eye
+        
+        # Outline
+        pygame.draw.ellipse(surf, palette[14], (x+2, y+4, 12, 12), 1)  # Outline
+
     def draw(self, surf, cam):
         if not self.active:
             return
-            
-        x = int(self.x - cam)
-        y = int(self.y)
-        
-        # Pre-render frames for performance
-        if not self.pre_rendered[0]:
-            for frame in range(2):
-                surface = pygame.Surface((TILE, TILE), pygame.SRCALPHA)
-                # Body
-                pygame.draw.ellipse(surface, YOSHI_PALETTE[8], (2, 4, 12, 12))  # Brown
-                pygame.draw.ellipse(surface, YOSHI_PALETTE[9], (3, 5, 10, 10))  # Highlight
-                
-                # Feet
-                foot_offset = 0 if frame == 0 else 2
-                pygame.draw.ellipse(surface, YOSHI_PALETTE[10], (2, 14, 4, 2))  # Left foot
-                pygame.draw.ellipse(surface, YOSHI_PALETTE[10], (10, 14 + foot_offset, 4, 2))  # Right foot
-                
-                # Eyes
-                pygame.draw.ellipse(surface, YOSHI_PALETTE[0], (4, 6, 2, 2))  # Left eye
-                pygame.draw.ellipse(surface, YOSHI_PALETTE[0], (10, 6, 2, 2))  # Right eye
-                
-                # Outline
-                pygame.draw.ellipse(surface, YOSHI_PALETTE[14], (2, 4, 12, 12), 1)  # Outline
-                
-                self.pre_rendered[frame] = surface
-                
-        surf.blit(self.pre_rendered[self.animation_frame], (x, y))
+        super().draw(surf, cam)
 
 class Koopa(Goomba):
+    SHELL_FRAME = "shell"  # Frame shown while retreated into the shell
+
     def __init__(self, x, y):
         super().__init__(x, y)
         self.shell_mode = False
-        self.pre_rendered = [None, None]
         
-    def draw(self, surf, cam):
-        if not self.active:
-            return
-            
-        x = int(self.x - cam)
-        y = int(self.y)
-        
-        # Pre-render frames for performance
-        if not self.pre_rendered[0]:
-            for frame in range(2):
-                surface = pygame.Surface((TILE, TILE), pygame.SRCALPHA)
-                # Shell
-                pygame.draw.ellipse(surface, YOSHI_PALETTE[6], (2, 4, 12, 12))  # Green
-                pygame.draw.ellipse(surface, YOSHI_PALETTE[7], (3, 5, 10, 10))  # Highlight
-                
-                # Head and feet
-                if not self.shell_mode:
-                    pygame.draw.ellipse(surface, YOSHI_PALETTE[2], (4, 0, 8, 6))  # Head
-                    pygame.draw.ellipse(surface, YOSHI_PALETTE[10], (2, 14, 4, 2))  # Left foot
-                    pygame.draw.ellipse(surface, YOSHI_PALETTE[10], (10, 14 + (2 if frame == 0 else 0), 4, 2))  # Right foot
-                
-                # Outline
-                pygame.draw.ellipse(surface, YOSHI_PALETTE[14], (2, 4, 12, 12), 1)  # Outline
-                
-                self.pre_rendered[frame] = surface
-                
-        surf.blit(self.pre_rendered[self.animation_frame], (x, y))
+    def sprite_key(self):
+        if self.shell_mode:
+            return Koopa.SHELL_FRAME, True, None
+        return self.animation_frame, True, None
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
+        # Shell
+        pygame.draw.ellipse(surf, palette[6], (x+2, y+4, 12, 12))  # Green
+        pygame.draw.ellipse(surf, palette[7], (x+3, y+5, 10, 10))  # Highlight
+        
+        # Head and feet, unless retreated into the shell
+        if frame != Koopa.SHELL_FRAME:
+            pygame.draw.ellipse(surf, palette[2], (x+4, y, 8, 6))  # Head
+            pygame.draw.ellipse(surf, palette[10], (x+2, y+14, 4, 2))  # Left foot
+            pygame.draw.ellipse(surf, palette[10], (x+10, y+14 + (2 if frame == 0 else 0), 4, 2))  # Right foot
+        
+        # Outline
+        pygame.draw.ellipse(surf, palette[14], (x+2, y+4, 12, 12), 1)  # Outline
 
 # Pre-rendered tile images for performance
 TILE_IMAGES = {}
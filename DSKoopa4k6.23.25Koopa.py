@@ -2,8 +2,21 @@ import pygame
 import sys
 import math
 import random
+import os
+import zlib
+import struct
+import hashlib
+import inspect
+import bisect
+from collections import OrderedDict
 from pygame.locals import *
 
+# NumPy is optional: without it every walker is stepped as its own object
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # Constants
 SCALE = 2
 TILE = 16
@@ -11,6 +24,11 @@ WIDTH = int(300 * SCALE)
 HEIGHT = int(200 * SCALE)
 FPS = 60
 
+# Simulation runs in fixed steps, independent of the render frame rate
+SIM_HZ = 120
+SIM_DT = 1 / SIM_HZ
+MAX_SIM_STEPS = 8  # Catch-up steps per rendered frame before dropping time
+
 # NES Palette
 NES_PALETTE = [
     (84, 84, 84), (0, 30, 116), (8, 16, 144), (48, 0, 136), 
@@ -57,10 +75,35 @@ def pop():
     return None
 
 class Scene:
+    alpha = 1.0  # How far rendering is between the last two simulation steps
+    
     def handle(self, events, keys): ...
     def update(self, dt): ...
     def draw(self, surf): ...
 
+# Text rendering: each (name, size) font is resolved once, and rendered
+# strings are cached by (font, text, color) with least-recently-used eviction
+FONTS = {}
+TEXT_CACHE = OrderedDict()
+TEXT_CACHE_SIZE = 256
+
+def get_font(size, name=None):
+    font = FONTS.get((name, size))
+    if font is None:
+        font = FONTS[(name, size)] = pygame.font.SysFont(name, size)
+    return font
+
+def render_text(font, text, color):
+    key = (font, text, color)
+    surface = TEXT_CACHE.get(key)
+    if surface is None:
+        surface = TEXT_CACHE[key] = font.render(text, True, color)
+        if len(TEXT_CACHE) > TEXT_CACHE_SIZE:
+            TEXT_CACHE.popitem(last=False)
+    else:
+        TEXT_CACHE.move_to_end(key)
+    return surface
+
 # World themes
 WORLD_THEMES = {
     "1": {"name": "Mushroom Plains", "bg": 27, "ground": 20, "block": 21, "enemies": ["G", "K"]},
@@ -73,240 +116,463 @@ WORLD_THEMES = {
     "8": {"name": "Bowser's Domain", "bg": 1, "ground": 33, "block": 21, "enemies": ["K", "F"]}
 }
 
-# Generate 32 levels with distinct types
-def generate_level_data():
-    levels = {}
-    
-    # Level types for each world
-    level_types = {
-        "1": ["plains", "plains", "plains", "castle"],
-        "2": ["desert", "desert", "desert", "castle"],
-        "3": ["beach", "underwater", "coral", "castle"],
-        "4": ["ice", "ice_cave", "snow", "castle"],
-        "5": ["clouds", "sky", "airship", "castle"],
-        "6": ["caves", "mountains", "mine", "castle"],
-        "7": ["forest", "swamp", "haunted", "castle"],
-        "8": ["volcano", "lava", "fortress", "castle"]
-    }
+# Level types for each world
+LEVEL_TYPES = {
+    "1": ["plains", "plains", "plains", "castle"],
+    "2": ["desert", "desert", "desert", "castle"],
+    "3": ["beach", "underwater", "coral", "castle"],
+    "4": ["ice", "ice_cave", "snow", "castle"],
+    "5": ["clouds", "sky", "airship", "castle"],
+    "6": ["caves", "mountains", "mine", "castle"],
+    "7": ["forest", "swamp", "haunted", "castle"],
+    "8": ["volcano", "lava", "fortress", "castle"]
+}
+
+# 32 levels, 4 per world
+LEVEL_IDS = [f"{world_num}-{level_num}" for world_num in range(1, 9) for level_num in range(1, 5)]
+
+def put(level, x, y, char):
+    # Write one tile into a row buffer. Writing past the end of a row appends,
+    # which is what the old string slicing did.
+    row = level[y]
+    if x < len(row):
+        row[x] = char
+    else:
+        row.append(char)
+
+# Generate one level with a distinct type
+def generate_level(level_id, seed):
+    rng = random.Random(seed)
+    world_str, level_num = level_id.split("-")
+    level_type = LEVEL_TYPES[world_str][int(level_num)-1]
     
-    for world_num in range(1, 9):
-        world_str = str(world_num)
-        for level_num in range(1, 5):  # 4 levels per world
-            level_id = f"{world_num}-{level_num}"
-            level_type = level_types[world_str][level_num-1]
-            
-            # Create level based on type
-            level = []
-            level_height = 20
-            
-            # Sky/background
-            for i in range(level_height):
-                level.append(" " * 100)
-                
-            # Get theme colors
-            theme = WORLD_THEMES[world_str]
-            
-            # Different level types
-            if level_type == "plains":
-                # Plains level - open with platforms
-                # Ground
-                for i in range(15, level_height):
-                    if i == 15:
-                        row = "G" * 100
-                    else:
-                        row = "B" * 100
-                    level[i] = row
-                
-                # Add platforms
-                for i in range(5):
-                    platform_y = random.randint(8, 12)
-                    platform_x = random.randint(10 + i*20, 15 + i*20)
-                    length = random.randint(4, 8)
-                    for j in range(length):
-                        level[platform_y] = level[platform_y][:platform_x+j] + "P" + level[platform_y][platform_x+j+1:]
-                
-                # Add pipes
-                for i in range(2):
-                    pipe_x = random.randint(20 + i*30, 25 + i*30)
-                    pipe_height = random.randint(2, 4)
-                    for j in range(pipe_height):
-                        level[19-j] = level[19-j][:pipe_x] + "T" + level[19-j][pipe_x+1:]
-                        level[19-j] = level[19-j][:pipe_x+1] + "T" + level[19-j][pipe_x+2:]
-                
-                # Add bricks and question blocks
-                for i in range(8):
-                    block_y = random.randint(5, 10)
-                    block_x = random.randint(5 + i*10, 8 + i*10)
-                    block_type = "?" if random.random() > 0.5 else "B"
-                    level[block_y] = level[block_y][:block_x] + block_type + level[block_y][block_x+1:]
-            
-            elif level_type == "desert":
-                # Desert level - sand and pyramids
-                # Sand ground
-                for i in range(15, level_height):
-                    if i == 15:
-                        row = "S" * 100
-                    else:
-                        row = "D" * 100
-                    level[i] = row
-                
-                # Add pyramids
-                pyramid_x = [20, 60]
-                for px in pyramid_x:
-                    height = 5
-                    width = 1
-                    for y in range(15-height, 15):
-                        row = " " * (px - width) + "P" * (width*2+1) + " " * (100 - px - width - 1)
-                        level[y] = row
-                        width += 1
-                
-                # Add quicksand
-                for i in range(3):
-                    qs_x = random.randint(30 + i*20, 40 + i*20)
-                    qs_width = random.randint(3, 6)
-                    level[15] = level[15][:qs_x] + "Q" * qs_width + level[15][qs_x+qs_width:]
-                
-                # Add cacti
-                for i in range(4):
-                    cactus_x = random.randint(10 + i*20, 15 + i*20)
-                    cactus_height = random.randint(3, 5)
-                    for j in range(cactus_height):
-                        level[15-j] = level[15-j][:cactus_x] + "C" + level[15-j][cactus_x+1:]
-            
-            elif level_type == "underwater":
-                # Underwater level - water physics
-                # Water ground
-                for i in range(15, level_height):
-                    if i == 15:
-                        row = "G" * 100
-                    else:
-                        row = "B" * 100
-                    level[i] = row
-                
-                # Add seaweed
-                for i in range(8):
-                    weed_x = random.randint(5 + i*12, 10 + i*12)
-                    weed_height = random.randint(3, 6)
-                    for j in range(weed_height):
-                        level[15-j] = level[15-j][:weed_x] + "W" + level[15-j][weed_x+1:]
-                
-                # Add coral
-                for i in range(5):
-                    coral_x = random.randint(15 + i*15, 20 + i*15)
-                    coral_y = 14
-                    level[coral_y] = level[coral_y][:coral_x] + "C" + level[coral_y][coral_x+1:]
-            
-            elif level_type == "ice":
-                # Ice level - slippery surfaces
-                # Ice ground
-                for i in range(15, level_height):
-                    if i == 15:
-                        row = "I" * 100
-                    else:
-                        row = "B" * 100
-                    level[i] = row
-                
-                # Add ice blocks
-                for i in range(6):
-                    block_y = random.randint(5, 10)
-                    block_x = random.randint(5 + i*15, 10 + i*15)
-                    level[block_y] = level[block_y][:block_x] + "B" + level[block_y][block_x+1:]
-                
-                # Add slopes
-                slope_x = [30, 70]
-                for sx in slope_x:
-                    height = 3
-                    for y in range(15-height, 15):
-                        level[y] = level[y][:sx] + "/" * (15-y) + level[y][sx+(15-y):]
-            
-            elif level_type == "castle":
-                # Castle level - brick structures with lava and boss
-                # Ground
-                for i in range(15, level_height):
-                    if i == 15:
-                        level[i] = "G" * 100
-                    else:
-                        level[i] = "B" * 100
-                
-                # Add lava pits
-                for i in range(3):
-                    pit_x = random.randint(20 + i*25, 30 + i*25)
-                    pit_width = random.randint(4, 8)
-                    for x in range(pit_width):
-                        if pit_x + x < 100:
-                            level[15] = level[15][:pit_x+x] + "L" + level[15][pit_x+x+1:]
-                            level[16] = level[16][:pit_x+x] + "L" + level[16][pit_x+x+1:]
-                
-                # Add brick structures
-                for i in range(5):
-                    struct_x = random.randint(10 + i*15, 15 + i*15)
-                    struct_height = random.randint(4, 8)
-                    struct_width = random.randint(2, 4)
-                    
-                    for y in range(15 - struct_height, 15):
-                        for x in range(struct_width):
-                            if struct_x + x < 100:
-                                level[y] = level[y][:struct_x+x] + "B" + level[y][struct_x+x+1:]
-                
-                # Add platforms
-                for i in range(3):
-                    platform_y = random.randint(8, 12)
-                    platform_x = random.randint(20 + i*25, 25 + i*25)
-                    length = random.randint(3, 5)
-                    for j in range(length):
-                        level[platform_y] = level[platform_y][:platform_x+j] + "P" + level[platform_y][platform_x+j+1:]
-                
-                # Add question blocks
-                for i in range(4):
-                    block_y = random.randint(5, 10)
-                    block_x = random.randint(10 + i*20, 15 + i*20)
-                    level[block_y] = level[block_y][:block_x] + "?" + level[block_y][block_x+1:]
-                
-                # Add boss at the end
-                level[10] = level[10][:90] + "X" + level[10][91:]
-            
-            # Add player start
-            level[14] = level[14][:5] + "S" + level[14][6:]
-            
-            # Add flag at end
-            level[14] = level[14][:95] + "F" + level[14][96:]
-            
-            # Add enemies
-            enemy_types = theme["enemies"]
-            for i in range(5):
-                enemy_y = 14
-                enemy_x = random.randint(20 + i*15, 25 + i*15)
-                enemy_type = random.choice(enemy_types)
-                level[enemy_y] = level[enemy_y][:enemy_x] + enemy_type + level[enemy_y][enemy_x+1:]
-            
-            # Add coins
-            for i in range(10):
-                coin_y = random.randint(5, 12)
-                coin_x = random.randint(10 + i*8, 15 + i*8)
-                level[coin_y] = level[coin_y][:coin_x] + "O" + level[coin_y][coin_x+1:]
-            
-            levels[level_id] = (level, theme)
+    # Create level based on type, one mutable list of characters per row
+    level = []
+    level_height = 20
+    
+    # Sky/background
+    for i in range(level_height):
+        level.append([" "] * 100)
+        
+    # Get theme colors
+    theme = WORLD_THEMES[world_str]
+    
+    # Different level types
+    if level_type == "plains":
+        # Plains level - open with platforms
+        # Ground
+        for i in range(15, level_height):
+            if i == 15:
+                level[i] = ["G"] * 100
+            else:
+                level[i] = ["B"] * 100
+        
+        # Add platforms
+        for i in range(5):
+            platform_y = rng.randint(8, 12)
+            platform_x = rng.randint(10 + i*20, 15 + i*20)
+            length = rng.randint(4, 8)
+            for j in range(length):
+                put(level, platform_x+j, platform_y, "P")
+        
+        # Add pipes
+        for i in range(2):
+            pipe_x = rng.randint(20 + i*30, 25 + i*30)
+            pipe_height = rng.randint(2, 4)
+            for j in range(pipe_height):
+                put(level, pipe_x, 19-j, "T")
+                put(level, pipe_x+1, 19-j, "T")
+        
+        # Add bricks and question blocks
+        for i in range(8):
+            block_y = rng.randint(5, 10)
+            block_x = rng.randint(5 + i*10, 8 + i*10)
+            block_type = "?" if rng.random() > 0.5 else "B"
+            put(level, block_x, block_y, block_type)
+    
+    elif level_type == "desert":
+        # Desert level - sand and pyramids
+        # Sand ground
+        for i in range(15, level_height):
+            if i == 15:
+                level[i] = ["S"] * 100
+            else:
+                level[i] = ["D"] * 100
+        
+        # Add pyramids
+        pyramid_x = [20, 60]
+        for px in pyramid_x:
+            height = 5
+            width = 1
+            for y in range(15-height, 15):
+                level[y] = [" "] * (px - width) + ["P"] * (width*2+1) + [" "] * (100 - px - width - 1)
+                width += 1
+        
+        # Add quicksand
+        for i in range(3):
+            qs_x = rng.randint(30 + i*20, 40 + i*20)
+            qs_width = rng.randint(3, 6)
+            level[15][qs_x:qs_x+qs_width] = ["Q"] * qs_width
+        
+        # Add cacti
+        for i in range(4):
+            cactus_x = rng.randint(10 + i*20, 15 + i*20)
+            cactus_height = rng.randint(3, 5)
+            for j in range(cactus_height):
+                put(level, cactus_x, 15-j, "C")
+    
+    elif level_type == "underwater":
+        # Underwater level - water physics
+        # Water ground
+        for i in range(15, level_height):
+            if i == 15:
+                level[i] = ["G"] * 100
+            else:
+                level[i] = ["B"] * 100
+        
+        # Add seaweed
+        for i in range(8):
+            weed_x = rng.randint(5 + i*12, 10 + i*12)
+            weed_height = rng.randint(3, 6)
+            for j in range(weed_height):
+                put(level, weed_x, 15-j, "W")
+        
+        # Add coral
+        for i in range(5):
+            coral_x = rng.randint(15 + i*15, 20 + i*15)
+            coral_y = 14
+            put(level, coral_x, coral_y, "C")
+    
+    elif level_type == "ice":
+        # Ice level - slippery surfaces
+        # Ice ground
+        for i in range(15, level_height):
+            if i == 15:
+                level[i] = ["I"] * 100
+            else:
+                level[i] = ["B"] * 100
+        
+        # Add ice blocks
+        for i in range(6):
+            block_y = rng.randint(5, 10)
+            block_x = rng.randint(5 + i*15, 10 + i*15)
+            put(level, block_x, block_y, "B")
+        
+        # Add slopes
+        slope_x = [30, 70]
+        for sx in slope_x:
+            height = 3
+            for y in range(15-height, 15):
+                level[y][sx:sx+(15-y)] = ["/"] * (15-y)
+    
+    elif level_type == "castle":
+        # Castle level - brick structures with lava and boss
+        # Ground
+        for i in range(15, level_height):
+            if i == 15:
+                level[i] = ["G"] * 100
+            else:
+                level[i] = ["B"] * 100
+        
+        # Add lava pits
+        for i in range(3):
+            pit_x = rng.randint(20 + i*25, 30 + i*25)
+            pit_width = rng.randint(4, 8)
+            for x in range(pit_width):
+                if pit_x + x < 100:
+                    put(level, pit_x+x, 15, "L")
+                    put(level, pit_x+x, 16, "L")
+        
+        # Add brick structures
+        for i in range(5):
+            struct_x = rng.randint(10 + i*15, 15 + i*15)
+            struct_height = rng.randint(4, 8)
+            struct_width = rng.randint(2, 4)
+            
+            for y in range(15 - struct_height, 15):
+                for x in range(struct_width):
+                    if struct_x + x < 100:
+                        put(level, struct_x+x, y, "B")
+        
+        # Add platforms
+        for i in range(3):
+            platform_y = rng.randint(8, 12)
+            platform_x = rng.randint(20 + i*25, 25 + i*25)
+            length = rng.randint(3, 5)
+            for j in range(length):
+                put(level, platform_x+j, platform_y, "P")
+        
+        # Add question blocks
+        for i in range(4):
+            block_y = rng.randint(5, 10)
+            block_x = rng.randint(10 + i*20, 15 + i*20)
+            put(level, block_x, block_y, "?")
+        
+        # Add boss at the end
+        put(level, 90, 10, "X")
+    
+    # Add player start
+    put(level, 5, 14, "S")
+    
+    # Add flag at end
+    put(level, 95, 14, "F")
+    
+    # Add enemies
+    enemy_types = theme["enemies"]
+    for i in range(5):
+        enemy_y = 14
+        enemy_x = rng.randint(20 + i*15, 25 + i*15)
+        enemy_type = rng.choice(enemy_types)
+        put(level, enemy_x, enemy_y, enemy_type)
+    
+    # Add coins
+    for i in range(10):
+        coin_y = rng.randint(5, 12)
+        coin_x = rng.randint(10 + i*8, 15 + i*8)
+        put(level, coin_x, coin_y, "O")
+    
+    return ["".join(row) for row in level], theme
+
+# Levels are generated from a seed derived from their id, so every launch
+# builds the same levels. Change LEVEL_SEED for a different set.
+LEVEL_SEED = 0
+
+def level_seed(level_id):
+    return zlib.crc32(f"{LEVEL_SEED}:{level_id}".encode())
+
+# Compiled level cache: generated levels are stored on disk as a binary tile
+# grid and spawn list, with a PNG thumbnail beside them, keyed by seed and a
+# hash of the generator code so that editing the generator invalidates old files
+LEVEL_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "level_cache")
+LEVEL_CACHE_MAGIC = b"KLC2"
+LEVEL_CACHE_STATS = {"hits": 0, "misses": 0}
+SPAWN_TILES = ("S", "G", "P", "C", "K", "X", "F")
+THUMB_SIZE = (32, 24)
+THUMB_GROUND_TILES = "GSIBPTL"
+THUMB_BLOCK_TILES = "?"
+
+def thumbnail_palette(theme):
+    # Color of every tile code in a thumbnail
+    palette = [NES_PALETTE[theme["bg"]]] * 256
+    for char in THUMB_BLOCK_TILES:
+        palette[ord(char)] = NES_PALETTE[theme["block"]]
+    for char in THUMB_GROUND_TILES:
+        palette[ord(char)] = NES_PALETTE[theme["ground"]]
+    return palette
+
+def build_thumbnail(level_data, theme):
+    # The whole tile grid as an 8-bit image whose palette maps tile codes to
+    # colors, so the lookup is one blit, then area-averaged down to THUMB_SIZE
+    cols = max(len(row) for row in level_data)
+    grid = b"".join(row.ljust(cols).encode("latin-1") for row in level_data)
+    tiles = pygame.image.frombuffer(grid, (cols, len(level_data)), "P")
+    tiles.set_palette(thumbnail_palette(theme))
+    rgb = pygame.Surface(tiles.get_size(), 0, 24)
+    rgb.blit(tiles, (0, 0))
+    return pygame.transform.smoothscale(rgb, THUMB_SIZE)
+
+def find_spawns(level_data):
+    # Spawn markers in row-major order, the order LevelScene creates them in
+    return [(char, x, y) for y, row in enumerate(level_data)
+            for x, char in enumerate(row) if char in SPAWN_TILES]
+
+def level_cache_path(level_id, extension):
+    return os.path.join(LEVEL_CACHE_DIR, f"{level_id}_{level_seed(level_id):08x}_{GENERATOR_HASH}.{extension}")
+
+def pack_level(level_data, spawns):
+    # Header, row lengths, tile grid, spawn table
+    data = [struct.pack("<4sHH", LEVEL_CACHE_MAGIC, len(level_data), len(spawns))]
+    data.append(struct.pack(f"<{len(level_data)}H", *(len(row) for row in level_data)))
+    data.append("".join(level_data).encode("latin-1"))
+    data.extend(struct.pack("<cHH", char.encode("latin-1"), x, y) for char, x, y in spawns)
+    return b"".join(data)
+
+def unpack_level(data):
+    magic, rows, spawn_count = struct.unpack_from("<4sHH", data)
+    if magic != LEVEL_CACHE_MAGIC:
+        raise ValueError("not a compiled level")
+    offset = 8
+    lengths = struct.unpack_from(f"<{rows}H", data, offset)
+    offset += rows * 2
+    level_data = []
+    for length in lengths:
+        level_data.append(data[offset:offset + length].decode("latin-1"))
+        offset += length
+    spawns = []
+    for _ in range(spawn_count):
+        char, x, y = struct.unpack_from("<cHH", data, offset)
+        spawns.append((char.decode("latin-1"), x, y))
+        offset += 5
+    if offset != len(data):
+        raise ValueError("truncated compiled level")
+    return level_data, spawns
+
+def generator_hash():
+    # Everything that shapes a compiled level: the generator, the spawn
+    # scan and the file layout written and read back by pack/unpack_level
+    functions = (generate_level, put, build_thumbnail, find_spawns, pack_level, unpack_level)
+    try:
+        source = "".join(inspect.getsource(function) for function in functions)
+    except (OSError, TypeError):
+        source = "".join(function.__code__.co_code.hex() + repr(function.__code__.co_consts)
+                         for function in functions)
+    source += repr(LEVEL_TYPES) + repr(WORLD_THEMES) + repr(SPAWN_TILES)
+    return hashlib.sha1(source.encode()).hexdigest()[:12]
+
+GENERATOR_HASH = generator_hash()
+
+def load_level(level_id):
+    # Compiled level from the disk cache, generating and storing it on a miss.
+    # Returns (level_data, theme, spawns).
+    theme = WORLD_THEMES[level_id.split("-")[0]]
+    path = level_cache_path(level_id, "klc")
+    try:
+        with open(path, "rb") as f:
+            level_data, spawns = unpack_level(f.read())
+        LEVEL_CACHE_STATS["hits"] += 1
+        return level_data, theme, spawns
+    except (OSError, ValueError, struct.error):
+        pass
     
-    return levels
+    LEVEL_CACHE_STATS["misses"] += 1
+    level_data, theme = generate_level(level_id, level_seed(level_id))
+    spawns = find_spawns(level_data)
+    try:
+        os.makedirs(LEVEL_CACHE_DIR, exist_ok=True)
+        # Drop files from older generator versions or seeds
+        stem = os.path.basename(path)[:-len("klc")]
+        for name in os.listdir(LEVEL_CACHE_DIR):
+            if name.startswith(f"{level_id}_") and not name.startswith(stem):
+                os.remove(os.path.join(LEVEL_CACHE_DIR, name))
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(pack_level(level_data, spawns))
+        os.replace(temp_path, path)
+    except OSError:
+        pass  # A read-only install just regenerates every launch
+    return level_data, theme, spawns
+
+def load_thumbnail(level_id):
+    # Thumbnail PNG from beside the compiled level, built from the level on a miss
+    path = level_cache_path(level_id, "png")
+    try:
+        thumb = pygame.image.load(path)
+        if thumb.get_size() == THUMB_SIZE:
+            return thumb
+    except (OSError, pygame.error):
+        pass
+    level_data, theme = LEVELS[level_id]
+    thumb = build_thumbnail(level_data, theme)
+    try:
+        os.makedirs(LEVEL_CACHE_DIR, exist_ok=True)
+        temp_path = f"{path[:-len('.png')]}.{os.getpid()}.tmp.png"
+        pygame.image.save(thumb, temp_path)
+        os.replace(temp_path, path)
+    except (OSError, pygame.error):
+        pass
+    return thumb
+
+class LevelProvider:
+    # Loads each level the first time it is asked for and keeps it, so
+    # startup does not pay for levels nobody plays
+    def __init__(self, level_ids, load):
+        self.level_ids = list(level_ids)
+        self.load = load
+        self.cache = {}
+        
+    def compiled(self, level_id):
+        level = self.cache.get(level_id)
+        if level is None:
+            if level_id not in self.level_ids:
+                raise KeyError(level_id)
+            level = self.cache[level_id] = self.load(level_id)
+        return level
+        
+    def __getitem__(self, level_id):
+        level_data, theme, spawns = self.compiled(level_id)
+        return level_data, theme
+        
+    def spawns(self, level_id):
+        return self.compiled(level_id)[2]
+        
+    def __contains__(self, level_id):
+        return level_id in self.level_ids
+        
+    def __iter__(self):
+        return iter(self.level_ids)
+        
+    def __len__(self):
+        return len(self.level_ids)
+        
+    def keys(self):
+        return list(self.level_ids)
+        
+    def values(self):
+        return [self[level_id] for level_id in self.level_ids]
+        
+    def items(self):
+        return [(level_id, self[level_id]) for level_id in self.level_ids]
 
-LEVELS = generate_level_data()
+LEVELS = LevelProvider(LEVEL_IDS, load_level)
 
-# Create thumbnails
+# Thumbnail surfaces, loaded the first time a level select screen shows them
 THUMBNAILS = {}
-for level_id, (level_data, theme) in LEVELS.items():
-    thumb = pygame.Surface((32, 24))
-    thumb.fill(NES_PALETTE[theme["bg"]])
-    # Draw a simple representation of the level
-    for y, row in enumerate(level_data[10:14]):
-        for x, char in enumerate(row[::3]):  # Sample every 3rd column
-            if char in ("G", "S", "I", "B", "P", "T", "L"):
-                thumb.set_at((x, y+10), NES_PALETTE[theme["ground"]])
-            elif char in ("?", "B"):
-                thumb.set_at((x, y+10), NES_PALETTE[theme["block"]])
-    THUMBNAILS[level_id] = thumb
+
+def get_thumbnail(level_id):
+    thumb = THUMBNAILS.get(level_id)
+    if thumb is None:
+        thumb = THUMBNAILS[level_id] = load_thumbnail(level_id)
+    return thumb
+
+# Entity sprites: each (class, frame, facing, power state, palette) is drawn
+# once into a padded surface shared by every instance, so drawing is one blit
+SPRITE_PAD = 16  # Room for arms, heads and spikes drawn outside the hitbox
+SPRITE_PALETTES = {"nes": NES_PALETTE}
+SPRITE_CACHE_SIZE = 128
+SPRITE_CACHE = OrderedDict()
+
+def get_sprite(cls, frame, facing_right, power, palette="nes"):
+    key = (cls, frame, facing_right, power, palette)
+    sprite = SPRITE_CACHE.get(key)
+    if sprite is None:
+        width, height = cls.SPRITE_SIZE
+        sprite = pygame.Surface((width + 2 * SPRITE_PAD, height + 2 * SPRITE_PAD), pygame.SRCALPHA)
+        cls.draw_sprite(sprite, SPRITE_PAD, SPRITE_PAD, SPRITE_PALETTES[palette], frame, facing_right, power)
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert_alpha()
+        SPRITE_CACHE[key] = sprite
+        while len(SPRITE_CACHE) > SPRITE_CACHE_SIZE:
+            SPRITE_CACHE.popitem(last=False)
+    else:
+        SPRITE_CACHE.move_to_end(key)
+    return sprite
+
+# Objects constructed so far, by kind. The F3 overlay shows how many were
+# made each frame; in steady play it should stay at zero.
+ALLOC_COUNTS = {"entities": 0, "rects": 0, "fireballs": 0, "particles": 0}
+
+class Pool:
+    # Free list for short-lived objects. take() hands back a released object,
+    # re-initialized through its reset(), before constructing a new one.
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+    
+    def take(self, *args):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+            return obj
+        return self.cls(*args)
+    
+    def release(self, obj):
+        self.free.append(obj)
 
 # Entity classes
 class Entity:
+    __slots__ = ("x", "y", "vx", "vy", "width", "height", "on_ground", "facing_right",
+                 "active", "prev_x", "prev_y", "rect")
+    
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -317,48 +583,56 @@ class Entity:
         self.on_ground = False
         self.facing_right = True
         self.active = True
+        self.prev_x = x
+        self.prev_y = y
+        self.rect = pygame.Rect(x, y, TILE, TILE)
+        ALLOC_COUNTS["entities"] += 1
+        ALLOC_COUNTS["rects"] += 1
         
     def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.width, self.height)
+        # The entity's own Rect, moved in place; int() truncates like Rect()
+        self.rect.update(int(self.x), int(self.y), self.width, self.height)
+        return self.rect
         
     def check_collision(self, other):
         return self.get_rect().colliderect(other.get_rect())
         
-    def update(self, colliders, dt):
+    def update(self, tilemap, dt):
         # Apply gravity
         if not self.on_ground:
             self.vy += 0.5 * dt * 60
             
-        # Update position
-        self.x += self.vx * dt * 60
-        self.y += self.vy * dt * 60
-        
-        # Check collision with ground
+        # Update position one axis at a time, stopping at solid tiles
+        self.x, hit = tilemap.sweep_x(self.x, self.y, self.width, self.height, self.vx * dt * 60)
+        if hit:
+            self.vx = 0
+            
         self.on_ground = False
-        for rect in colliders:
-            if self.get_rect().colliderect(rect):
-                # Bottom collision
-                if self.vy > 0 and self.y + self.height > rect.top and self.y < rect.top:
-                    self.y = rect.top - self.height
-                    self.vy = 0
-                    self.on_ground = True
-                # Top collision
-                elif self.vy < 0 and self.y < rect.bottom and self.y + self.height > rect.bottom:
-                    self.y = rect.bottom
-                    self.vy = 0
-                # Left collision
-                if self.vx > 0 and self.x + self.width > rect.left and self.x < rect.left:
-                    self.x = rect.left - self.width
-                    self.vx = 0
-                # Right collision
-                elif self.vx < 0 and self.x < rect.right and self.x + self.width > rect.right:
-                    self.x = rect.right
-                    self.vx = 0
-                    
-    def draw(self, surf, cam):
+        self.y, hit = tilemap.sweep_y(self.x, self.y, self.width, self.height, self.vy * dt * 60)
+        if hit:
+            # Landed on ground or bumped a ceiling
+            if self.vy > 0:
+                self.on_ground = True
+            self.vy = 0
+
+    # Sprite cell size before padding; draw_sprite paints one frame into it
+    SPRITE_SIZE = (TILE, TILE)
+
+    def sprite_key(self):
+        return 0, True, None
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
         pass
 
+    def draw(self, surf, cam):
+        sprite = get_sprite(type(self), *self.sprite_key())
+        surf.blit(sprite, (int(self.x - cam) - SPRITE_PAD, int(self.y) - SPRITE_PAD))
+
 class Player(Entity):
+    __slots__ = ("jump_power", "move_speed", "run_speed", "invincible", "animation_frame",
+                 "walk_timer", "fireballs", "fire_cooldown", "star_timer", "underwater")
+    
     def __init__(self, x, y):
         super().__init__(x, y)
         self.jump_power = -5
@@ -372,10 +646,7 @@ class Player(Entity):
         self.star_timer = 0
         self.underwater = False
         
-    def update(self, colliders, dt, enemies, items):
-        # Handle input
-        keys = pygame.key.get_pressed()
-        
+    def update(self, tilemap, dt, enemies, items, keys, walkers=None, nearby=None):
         # Current speed (running if shift pressed)
         current_speed = self.run_speed if keys[K_LSHIFT] else self.move_speed
         
@@ -395,17 +666,21 @@ class Player(Entity):
             
         # Fireballs
         if keys[K_z] and state.mario_size == "fire" and self.fire_cooldown <= 0:
-            self.fireballs.append(Fireball(self.x, self.y, self.facing_right))
+            self.fireballs.append(FIREBALL_POOL.take(self.x, self.y, self.facing_right))
             self.fire_cooldown = 0.5
             
         if self.fire_cooldown > 0:
             self.fire_cooldown -= dt
             
-        # Update fireballs
-        for fb in self.fireballs[:]:
-            fb.update(colliders, dt)
+        # Update fireballs, handing burnt-out ones back to the pool
+        burnt_out = False
+        for fb in self.fireballs:
+            fb.update(tilemap, dt)
             if not fb.active:
-                self.fireballs.remove(fb)
+                FIREBALL_POOL.release(fb)
+                burnt_out = True
+        if burnt_out:
+            self.fireballs[:] = [fb for fb in self.fireballs if fb.active]
                 
         # Update star timer
         if self.star_timer > 0:
@@ -428,12 +703,40 @@ class Player(Entity):
             
         # Underwater physics
         if self.underwater:
-            self.vy *= 0.95  # Water resistance
-            self.vx *= 0.9
-            
-        super().update(colliders, dt)
-        
-        # Check collision with enemies
+            self.vy *= 0.95 ** (dt * 60)  # Water resistance
+            self.vx *= 0.9 ** (dt * 60)
+            
+        super().update(tilemap, dt)
+        
+        # Check collision with enemies, only those near the player if there
+        # is a broad phase to ask
+        if nearby is not None:
+            enemies = nearby.query(self.get_rect(), "enemies")
+        self.collide_enemies(enemies)
+        if walkers is not None:
+            self.collide_enemies(walkers.touching(self.get_rect()))
+
+        # Check collision with items
+        for item in (items[:] if nearby is None else nearby.query(self.get_rect(), "items")):
+            if self.check_collision(item):
+                if item.type == "mushroom":
+                    if state.mario_size == "small":
+                        state.mario_size = "big"
+                    state.progress[state.slot]["powerups"].add("mushroom")
+                elif item.type == "flower":
+                    state.mario_size = "fire"
+                    state.progress[state.slot]["powerups"].add("flower")
+                elif item.type == "star":
+                    self.star_timer = 10
+                    self.invincible = 10
+                    state.progress[state.slot]["powerups"].add("star")
+                items.remove(item)
+                if nearby is not None:
+                    nearby.discard(item)
+                state.score += 1000
+    
+    def collide_enemies(self, enemies):
+        # Stomp or get hurt by any enemy the player now overlaps
         for enemy in enemies:
             if enemy.active and self.check_collision(enemy):
                 # Jumped on enemy
@@ -460,40 +763,25 @@ class Player(Entity):
                             self.y = 100
                             self.vx = 0
                             self.vy = 0
-                    
-        # Check collision with items
-        for item in items[:]:
-            if self.check_collision(item):
-                if item.type == "mushroom":
-                    if state.mario_size == "small":
-                        state.mario_size = "big"
-                    state.progress[state.slot]["powerups"].add("mushroom")
-                elif item.type == "flower":
-                    state.mario_size = "fire"
-                    state.progress[state.slot]["powerups"].add("flower")
-                elif item.type == "star":
-                    self.star_timer = 10
-                    self.invincible = 10
-                    state.progress[state.slot]["powerups"].add("star")
-                items.remove(item)
-                state.score += 1000
                 
-    def draw(self, surf, cam):
-        if self.invincible > 0 and int(self.invincible * 10) % 2 == 0:
-            return  # Blink during invincibility
-            
-        x = int(self.x - cam)
-        y = int(self.y)
-        
+    SPRITE_SIZE = (TILE, TILE * 2)
+
+    def sprite_key(self):
+        if state.mario_size == "small":
+            return 0, True, "small"
+        return (self.animation_frame if self.vx != 0 else 0), self.facing_right, state.mario_size
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
         # Draw Mario based on size
-        color = NES_PALETTE[33]  # Red for overalls
-        skin = NES_PALETTE[39]   # Skin color
+        color = palette[33]  # Red for overalls
+        skin = palette[39]   # Skin color
         
-        if state.mario_size == "fire":
+        if power == "fire":
             # Fire Mario has white overalls
-            color = NES_PALETTE[31]
+            color = palette[31]
         
-        if state.mario_size in ("big", "fire"):
+        if power in ("big", "fire"):
             # Body
             pygame.draw.rect(surf, color, (x+4, y+8, 8, 16))
             
@@ -505,25 +793,25 @@ class Player(Entity):
             
             # Arms
             arm_offset = 0
-            if self.animation_frame == 1 and self.vx != 0:
-                arm_offset = 2 if self.facing_right else -2
+            if frame == 1:
+                arm_offset = 2 if facing_right else -2
                 
             pygame.draw.rect(surf, skin, (x+arm_offset, y+10, 4, 6))  # Left arm
             pygame.draw.rect(surf, skin, (x+12-arm_offset, y+10, 4, 6))  # Right arm
             
             # Legs
             leg_offset = 0
-            if self.animation_frame == 2 and self.vx != 0:
-                leg_offset = 2 if self.facing_right else -2
+            if frame == 2:
+                leg_offset = 2 if facing_right else -2
                 
-            pygame.draw.rect(surf, NES_PALETTE[21], (x+2, y+24, 4, 8))  # Left leg
-            pygame.draw.rect(surf, NES_PALETTE[21], (x+10, y+24-leg_offset, 4, 8+leg_offset))  # Right leg
+            pygame.draw.rect(surf, palette[21], (x+2, y+24, 4, 8))  # Left leg
+            pygame.draw.rect(surf, palette[21], (x+10, y+24-leg_offset, 4, 8+leg_offset))  # Right leg
             
             # Fire flower details
-            if state.mario_size == "fire":
+            if power == "fire":
                 # White cuffs
-                pygame.draw.rect(surf, NES_PALETTE[31], (x+4, y+8, 8, 2))
-                pygame.draw.rect(surf, NES_PALETTE[31], (x+4, y+18, 8, 2))
+                pygame.draw.rect(surf, palette[31], (x+4, y+8, 8, 2))
+                pygame.draw.rect(surf, palette[31], (x+4, y+18, 8, 2))
         else:
             # Small Mario
             # Body
@@ -534,13 +822,25 @@ class Player(Entity):
             
             # Hat
             pygame.draw.rect(surf, color, (x+2, y, 12, 2))
-        
+
+    def draw(self, surf, cam):
+        if self.invincible > 0 and int(self.invincible * 10) % 2 == 0:
+            return  # Blink during invincibility
+
+        super().draw(surf, cam)
+
         # Draw fireballs
         for fb in self.fireballs:
             fb.draw(surf, cam)
 
 class Fireball:
+    __slots__ = ("x", "y", "vx", "vy", "width", "height", "active", "timer", "prev_x", "prev_y")
+    
     def __init__(self, x, y, right):
+        ALLOC_COUNTS["fireballs"] += 1
+        self.reset(x, y, right)
+    
+    def reset(self, x, y, right):
         self.x = x
         self.y = y
         self.vx = 6 if right else -6
@@ -549,51 +849,56 @@ class Fireball:
         self.height = 8
         self.active = True
         self.timer = 1.0
+        self.prev_x = x
+        self.prev_y = y
         
-    def update(self, colliders, dt):
-        self.x += self.vx
-        self.vy += 0.2
-        self.y += self.vy
+    def update(self, tilemap, dt):
+        self.x += self.vx * dt * 60
+        self.vy += 0.2 * dt * 60
+        self.y += self.vy * dt * 60
         
         self.timer -= dt
         if self.timer <= 0:
             self.active = False
             
         # Check collision with walls
-        for rect in colliders:
-            if pygame.Rect(self.x, self.y, self.width, self.height).colliderect(rect):
-                self.active = False
+        if tilemap.overlaps_solid(self.x, self.y, self.width, self.height):
+            self.active = False
                 
+    SPRITE_SIZE = (8, 8)
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
+        pygame.draw.circle(surf, palette[33], (x+4, y+4), 4)
+        pygame.draw.circle(surf, palette[39], (x+4, y+4), 2)
+
     def draw(self, surf, cam):
-        x = int(self.x - cam)
-        y = int(self.y)
-        pygame.draw.circle(surf, NES_PALETTE[33], (x+4, y+4), 4)
-        pygame.draw.circle(surf, NES_PALETTE[39], (x+4, y+4), 2)
+        sprite = get_sprite(Fireball, 0, True, None)
+        surf.blit(sprite, (int(self.x - cam) - SPRITE_PAD, int(self.y) - SPRITE_PAD))
+
+# Released fireballs, reused by the next throw
+FIREBALL_POOL = Pool(Fireball)
 
 class Goomba(Entity):
+    __slots__ = ("animation_frame", "walk_timer")
+    
     def __init__(self, x, y):
         super().__init__(x, y)
         self.vx = -0.5
         self.animation_frame = 0
         self.walk_timer = 0
         
-    def update(self, colliders, dt):
+    def update(self, tilemap, dt):
         # Turn around at edges
         if self.on_ground:
             # Check for edge
-            edge_check = pygame.Rect(self.x + (self.width if self.vx > 0 else -1), 
-                                    self.y + self.height, 
-                                    1, 1)
-            edge_found = False
-            for rect in colliders:
-                if edge_check.colliderect(rect):
-                    edge_found = True
-                    break
+            edge_found = tilemap.solid_at(self.x + (self.width if self.vx > 0 else -1), 
+                                          self.y + self.height)
                     
             if not edge_found:
                 self.vx *= -1
                 
-        super().update(colliders, dt)
+        super().update(tilemap, dt)
         
         # Update animation
         self.walk_timer += dt
@@ -601,27 +906,187 @@ class Goomba(Entity):
             self.walk_timer = 0
             self.animation_frame = (self.animation_frame + 1) % 2
             
+    def sprite_key(self):
+        return self.animation_frame, self.vx > 0, None
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
+        # Body
+        pygame.draw.ellipse(surf, palette[21], (x+2, y+4, 12, 12))  # Brown body
+        
+        # Feet
+        foot_offset = 2 if frame == 0 else -2
+        pygame.draw.rect(surf, palette[21], (x+2, y+14, 4, 2))  # Left foot
+        pygame.draw.rect(surf, palette[21], (x+10, y+14+foot_offset, 4, 2))  # Right foot
+        
+        # Eyes
+        eye_dir = 0 if facing_right else 2
+        pygame.draw.rect(surf, palette[0], (x+4+eye_dir, y+6, 2, 2))  # Left eye
+        pygame.draw.rect(surf, palette[0], (x+10-eye_dir, y+6, 2, 2))  # Right eye
+
     def draw(self, surf, cam):
         if not self.active:
             return
-            
-        x = int(self.x - cam)
-        y = int(self.y)
+        super().draw(surf, cam)
+
+class Walker:
+    # One WalkerStore row, seen through the Entity attributes that the
+    # player's collision code reads and writes
+    __slots__ = ("store", "index")
+    width = TILE
+    height = TILE
+    
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+    
+    @property
+    def x(self):
+        return float(self.store.x[self.index])
+    
+    @property
+    def y(self):
+        return float(self.store.y[self.index])
+    
+    @property
+    def active(self):
+        return bool(self.store.active[self.index])
+    
+    @active.setter
+    def active(self, value):
+        self.store.active[self.index] = value
+    
+    def get_rect(self):
+        return pygame.Rect(self.x, self.y, self.width, self.height)
+
+class WalkerStore:
+    # Goombas kept as NumPy arrays (one row each) and stepped together with
+    # the same arithmetic as Goomba.update. Tile collisions are vectorized for
+    # boxes crossing at most one tile edge per step; anything faster is
+    # resolved one at a time by TileMap.sweep_x/sweep_y.
+    def __init__(self, walkers, tilemap):
+        self.tilemap = tilemap
+        self.x = numpy.array([w.x for w in walkers], dtype=float)
+        self.y = numpy.array([w.y for w in walkers], dtype=float)
+        self.vx = numpy.array([w.vx for w in walkers], dtype=float)
+        self.vy = numpy.array([w.vy for w in walkers], dtype=float)
+        self.on_ground = numpy.array([w.on_ground for w in walkers], dtype=bool)
+        self.active = numpy.array([w.active for w in walkers], dtype=bool)
+        self.walk_timer = numpy.array([w.walk_timer for w in walkers], dtype=float)
+        self.frame = numpy.array([w.animation_frame for w in walkers], dtype=numpy.int8)
+        self.awake = numpy.zeros(len(walkers), dtype=bool)
+        self.prev_x = self.x.copy()
+        self.prev_y = self.y.copy()
+        
+        # Solid flags of every cell, indexed [row, column]
+        codes = numpy.frombuffer(bytes(tilemap.codes), dtype=numpy.uint8)
+        solid_codes = numpy.frombuffer(SOLID_CODES, dtype=numpy.uint8).astype(bool)
+        self.solid = solid_codes[codes].reshape(tilemap.rows, tilemap.cols)
+    
+    def __len__(self):
+        return len(self.x)
+    
+    def wake(self, cam):
+        # Vectorized activation regions, with the same margins as Sleepers
+        near = (self.x > cam - WAKE_MARGIN) & (self.x < cam + WIDTH + WAKE_MARGIN)
+        far = (self.x < cam - SLEEP_MARGIN) | (self.x > cam + WIDTH + SLEEP_MARGIN)
+        self.awake = (self.awake | near) & ~far
+    
+    def counts(self):
+        # Awake and sleeping walkers that are still alive
+        awake = int(numpy.count_nonzero(self.active & self.awake))
+        return awake, int(numpy.count_nonzero(self.active)) - awake
+    
+    def remember(self):
+        self.prev_x[:] = self.x
+        self.prev_y[:] = self.y
+    
+    @staticmethod
+    def cell(pos):
+        # pos // TILE for arrays. TILE is a power of two, so scaling by its
+        # inverse is exact, and floor() is far cheaper than float floor division
+        return numpy.floor(pos * (1 / TILE))
+    
+    def solid_cells(self, tx, ty):
+        # Vectorized TileMap.solid_at on cell coordinates; outside is empty
+        rows, cols = self.solid.shape
+        inside = (tx >= 0) & (tx < cols) & (ty >= 0) & (ty < rows)
+        cells = (ty * cols + tx).astype(numpy.intp)
+        return self.solid.take(cells, mode="clip") & inside
+    
+    def sweep(self, pos, cross, delta, vertical):
+        # Vectorized TileMap.sweep_x (or sweep_y) for TILE-sized boxes.
+        # Returns the new positions and which boxes a solid tile stopped.
+        new = pos + delta
+        forward = delta > 0
+        edge = self.cell(numpy.where(forward, pos + TILE - EDGE, pos))
+        new_edge = self.cell(numpy.where(forward, new + TILE - EDGE, new))
+        crossed = numpy.abs(new_edge - edge)
+        
+        # The one row or column of cells entered, across the box's two lanes
+        lane0 = self.cell(cross)
+        lane1 = self.cell(cross + TILE - EDGE)
+        if vertical:
+            blocked = self.solid_cells(lane0, new_edge) | self.solid_cells(lane1, new_edge)
+        else:
+            blocked = self.solid_cells(new_edge, lane0) | self.solid_cells(new_edge, lane1)
+        hit = (crossed == 1) & blocked
+        new = numpy.where(hit, numpy.where(forward, new_edge * TILE - TILE, (new_edge + 1) * TILE), new)
         
-        # Body
-        pygame.draw.ellipse(surf, NES_PALETTE[21], (x+2, y+4, 12, 12))  # Brown body
+        for i in numpy.flatnonzero(crossed > 1):
+            if vertical:
+                new[i], hit[i] = self.tilemap.sweep_y(float(cross[i]), float(pos[i]), TILE, TILE, float(delta[i]))
+            else:
+                new[i], hit[i] = self.tilemap.sweep_x(float(pos[i]), float(cross[i]), TILE, TILE, float(delta[i]))
+        return new, hit
+    
+    def update(self, dt):
+        live = self.active & self.awake
         
-        # Feet
-        foot_offset = 2 if self.animation_frame == 0 else -2
-        pygame.draw.rect(surf, NES_PALETTE[21], (x+2, y+14, 4, 2))  # Left foot
-        pygame.draw.rect(surf, NES_PALETTE[21], (x+10, y+14+foot_offset, 4, 2))  # Right foot
+        # Turn around at edges
+        ahead = numpy.where(self.vx > 0, self.x + TILE, self.x - 1)
+        edge_found = self.solid_cells(self.cell(ahead), self.cell(self.y + TILE))
+        self.vx[live & self.on_ground & ~edge_found] *= -1
         
-        # Eyes
-        eye_dir = 0 if self.vx > 0 else 2
-        pygame.draw.rect(surf, NES_PALETTE[0], (x+4+eye_dir, y+6, 2, 2))  # Left eye
-        pygame.draw.rect(surf, NES_PALETTE[0], (x+10-eye_dir, y+6, 2, 2))  # Right eye
+        # Apply gravity
+        self.vy[live & ~self.on_ground] += 0.5 * dt * 60
+        
+        # Update position one axis at a time, stopping at solid tiles
+        self.x, hit = self.sweep(self.x, self.y, numpy.where(live, self.vx * dt * 60, 0.0), False)
+        self.vx[hit] = 0
+        
+        self.on_ground[live] = False
+        self.y, hit = self.sweep(self.y, self.x, numpy.where(live, self.vy * dt * 60, 0.0), True)
+        self.on_ground |= hit & (self.vy > 0)
+        self.vy[hit] = 0
+        
+        # Update animation
+        self.walk_timer[live] += dt
+        flip = live & (self.walk_timer > 0.2)
+        self.walk_timer[flip] = 0
+        self.frame[flip] ^= 1
+    
+    def touching(self, rect):
+        # Walkers whose (truncated) box overlaps rect. A float test on x with a
+        # pixel of slack for the truncation finds the few candidates; their
+        # own Rects then give exactly Rect.colliderect's answer.
+        middle = (rect.x + rect.right - TILE) / 2
+        reach = (rect.right - rect.x + TILE) / 2 + 1
+        near = numpy.flatnonzero(self.active & (numpy.abs(self.x - middle) < reach))
+        return [walker for walker in (Walker(self, i) for i in near) if walker.get_rect().colliderect(rect)]
+    
+    def draw(self, surf, cam, alpha):
+        # Blend between the last two steps, then blit the walkers on screen
+        x = (self.prev_x + (self.x - self.prev_x) * alpha - cam).astype(int)
+        y = (self.prev_y + (self.y - self.prev_y) * alpha).astype(int)
+        shown = self.active & self.awake & (x > -TILE - SPRITE_PAD) & (x < WIDTH + SPRITE_PAD)
+        surf.blits([(get_sprite(Goomba, int(self.frame[i]), bool(self.vx[i] > 0), None),
+                      (int(x[i]) - SPRITE_PAD, int(y[i]) - SPRITE_PAD))
+                    for i in numpy.flatnonzero(shown)], doreturn=False)
 
 class PiranhaPlant(Entity):
+    __slots__ = ("max_height", "state", "timer")
+    
     def __init__(self, x, y):
         super().__init__(x, y)
         self.vy = -0.5
@@ -630,11 +1095,11 @@ class PiranhaPlant(Entity):
         self.state = "rising"  # rising, up, lowering
         self.timer = 0
         
-    def update(self, colliders, dt):
+    def update(self, tilemap, dt):
         self.timer += dt
         
         if self.state == "rising":
-            self.y += self.vy
+            self.y += self.vy * dt * 60
             if self.height >= self.max_height:
                 self.state = "up"
                 self.timer = 0
@@ -642,61 +1107,70 @@ class PiranhaPlant(Entity):
             if self.timer > 2.0:
                 self.state = "lowering"
         elif self.state == "lowering":
-            self.y -= self.vy
+            self.y -= self.vy * dt * 60
             if self.height <= 16:
                 self.state = "rising"
                 self.timer = 0
                 
-    def draw(self, surf, cam):
-        x = int(self.x - cam)
-        y = int(self.y)
-        
+    SPRITE_SIZE = (TILE, TILE * 2)
+
+    def sprite_key(self):
+        return int(self.height), True, None  # Frame is the stem height
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
         # Stem
-        pygame.draw.rect(surf, NES_PALETTE[14], (x+6, y, 4, self.height))
+        pygame.draw.rect(surf, palette[14], (x+6, y, 4, frame))
         
         # Head
-        pygame.draw.ellipse(surf, NES_PALETTE[14], (x+2, y-4, 12, 12))
+        pygame.draw.ellipse(surf, palette[14], (x+2, y-4, 12, 12))
         
         # Mouth
-        pygame.draw.ellipse(surf, NES_PALETTE[33], (x+4, y-2, 8, 8))
-        pygame.draw.rect(surf, NES_PALETTE[0], (x+4, y+2, 8, 4))
+        pygame.draw.ellipse(surf, palette[33], (x+4, y-2, 8, 8))
+        pygame.draw.rect(surf, palette[0], (x+4, y+2, 8, 4))
 
 class CheepCheep(Entity):
+    __slots__ = ("amplitude", "offset", "swim_time")
+    
     def __init__(self, x, y):
         super().__init__(x, y)
         self.vx = random.choice([-1, 1])
         self.vy = 0
         self.amplitude = random.uniform(0.5, 1.5)
         self.offset = random.uniform(0, math.pi*2)
+        self.swim_time = 0
         
-    def update(self, colliders, dt):
-        self.x += self.vx
-        self.vy = math.sin(pygame.time.get_ticks() / 500.0 + self.offset) * self.amplitude
-        self.y += self.vy
+    def update(self, tilemap, dt):
+        self.swim_time += dt
+        self.x += self.vx * dt * 60
+        self.vy = math.sin(self.swim_time * 2 + self.offset) * self.amplitude
+        self.y += self.vy * dt * 60
         
         # Bounce off edges
         if self.x < 0:
             self.vx = abs(self.vx)
-        elif self.x > 3000:
+        elif self.x > tilemap.width - self.width:
             self.vx = -abs(self.vx)
             
-    def draw(self, surf, cam):
-        x = int(self.x - cam)
-        y = int(self.y)
-        
+    SPRITE_SIZE = (24, 8)
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
         # Body
-        pygame.draw.ellipse(surf, NES_PALETTE[33], (x, y, 16, 8))
+        pygame.draw.ellipse(surf, palette[33], (x, y, 16, 8))
         
         # Tail
-        pygame.draw.polygon(surf, NES_PALETTE[33], [(x+16, y+4), (x+24, y), (x+24, y+8)])
+        pygame.draw.polygon(surf, palette[33], [(x+16, y+4), (x+24, y), (x+24, y+8)])
         
         # Eye
-        pygame.draw.circle(surf, NES_PALETTE[0], (x+4, y+3), 2)
+        pygame.draw.circle(surf, palette[0], (x+4, y+3), 2)
         
         # Fins
-        pygame.draw.polygon(surf, NES_PALETTE[33], [(x+8, y), (x+12, y-4), (x+16, y)])
+        pygame.draw.polygon(surf, palette[33], [(x+8, y), (x+12, y-4), (x+16, y)])
 
 class Boss(Entity):
+    __slots__ = ("boss_type", "health", "attack_timer", "attack_cooldown")
+    
     def __init__(self, x, y, boss_type):
         super().__init__(x, y)
         self.boss_type = boss_type
@@ -708,7 +1182,7 @@ class Boss(Entity):
         self.width = 32
         self.height = 32
         
-    def update(self, colliders, dt, player):
+    def update(self, tilemap, dt, player):
         self.attack_timer += dt
         
         # Simple AI
@@ -723,98 +1197,106 @@ class Boss(Entity):
                 self.vy = -5
                 
         # Move
-        self.x += self.vx
-        self.y += self.vy
+        self.x += self.vx * dt * 60
+        dy = self.vy * dt * 60
+        self.y, hit = tilemap.sweep_y(self.x, self.y, self.width, self.height, dy)
         
         # Apply gravity
         if not self.on_ground:
-            self.vy += 0.2
+            self.vy += 0.2 * dt * 60
             
         # Check collision with ground
         self.on_ground = False
-        for rect in colliders:
-            if self.get_rect().colliderect(rect):
-                if self.vy > 0 and self.y + self.height > rect.top and self.y < rect.top:
-                    self.y = rect.top - self.height
-                    self.vy = 0
-                    self.on_ground = True
-                    if self.boss_type == "morton":
-                        # Shockwave on ground pound
-                        pass
+        if hit:
+            self.vy = 0
+            if dy > 0:
+                self.on_ground = True
+                if self.boss_type == "morton":
+                    # Shockwave on ground pound
+                    pass
                     
-    def draw(self, surf, cam):
-        x = int(self.x - cam)
-        y = int(self.y)
-        
+    SPRITE_SIZE = (32, 32)
+    ARM_FRAMES = 8  # Arm swing steps each side of centre
+
+    def sprite_key(self):
         if self.boss_type == "boom_boom":
+            return round(math.sin(pygame.time.get_ticks() / 200) * Boss.ARM_FRAMES), True, self.boss_type
+        return 0, True, self.boss_type
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
+        if power == "boom_boom":
             # Boom Boom
             # Body
-            pygame.draw.ellipse(surf, NES_PALETTE[31], (x, y, 32, 32))
+            pygame.draw.ellipse(surf, palette[31], (x, y, 32, 32))
             
             # Arms
-            arm_angle = math.sin(pygame.time.get_ticks() / 200) * 0.5
+            arm_angle = frame / Boss.ARM_FRAMES * 0.5
             arm_length = 20
-            pygame.draw.line(surf, NES_PALETTE[31], (x+16, y+16), 
+            pygame.draw.line(surf, palette[31], (x+16, y+16), 
                             (x+16 + math.cos(arm_angle) * arm_length, y+16 + math.sin(arm_angle) * arm_length), 6)
-            pygame.draw.line(surf, NES_PALETTE[31], (x+16, y+16), 
+            pygame.draw.line(surf, palette[31], (x+16, y+16), 
                             (x+16 + math.cos(arm_angle+math.pi) * arm_length, y+16 + math.sin(arm_angle+math.pi) * arm_length), 6)
             
             # Face
-            pygame.draw.circle(surf, NES_PALETTE[0], (x+16, y+16), 6)
-            pygame.draw.circle(surf, NES_PALETTE[39], (x+16, y+16), 4)
+            pygame.draw.circle(surf, palette[0], (x+16, y+16), 6)
+            pygame.draw.circle(surf, palette[39], (x+16, y+16), 4)
             
-        elif self.boss_type == "morton":
+        elif power == "morton":
             # Morton Koopa Jr.
             # Shell
-            pygame.draw.ellipse(surf, NES_PALETTE[33], (x, y, 32, 24))
+            pygame.draw.ellipse(surf, palette[33], (x, y, 32, 24))
             
             # Head
-            pygame.draw.rect(surf, NES_PALETTE[39], (x+8, y-8, 16, 16))
+            pygame.draw.rect(surf, palette[39], (x+8, y-8, 16, 16))
             
             # Eyes
-            pygame.draw.circle(surf, NES_PALETTE[0], (x+12, y), 3)
-            pygame.draw.circle(surf, NES_PALETTE[0], (x+20, y), 3)
+            pygame.draw.circle(surf, palette[0], (x+12, y), 3)
+            pygame.draw.circle(surf, palette[0], (x+20, y), 3)
             
             # Spike
-            pygame.draw.polygon(surf, NES_PALETTE[21], [(x+16, y-16), (x+12, y-8), (x+20, y-8)])
+            pygame.draw.polygon(surf, palette[21], [(x+16, y-16), (x+12, y-8), (x+20, y-8)])
 
 class Item(Entity):
+    __slots__ = ("type", "bounce_timer")
+    
     def __init__(self, x, y, item_type):
         super().__init__(x, y)
         self.type = item_type
         self.vy = -2
         self.bounce_timer = 0
         
-    def update(self, colliders, dt):
+    def update(self, tilemap, dt):
         self.bounce_timer += dt
-        self.y += math.sin(self.bounce_timer * 5) * 0.5
-        
-    def draw(self, surf, cam):
-        x = int(self.x - cam)
-        y = int(self.y)
+        self.y += math.sin(self.bounce_timer * 5) * 0.5 * dt * 60
         
-        if self.type == "mushroom":
+    def sprite_key(self):
+        return 0, True, self.type
+
+    @staticmethod
+    def draw_sprite(surf, x, y, palette, frame, facing_right, power):
+        if power == "mushroom":
             # Stem
-            pygame.draw.rect(surf, NES_PALETTE[39], (x+6, y+8, 4, 8))
+            pygame.draw.rect(surf, palette[39], (x+6, y+8, 4, 8))
             # Cap
-            pygame.draw.ellipse(surf, NES_PALETTE[33], (x+2, y, 12, 10))
+            pygame.draw.ellipse(surf, palette[33], (x+2, y, 12, 10))
             # Spots
-            pygame.draw.circle(surf, NES_PALETTE[31], (x+5, y+3), 2)
-            pygame.draw.circle(surf, NES_PALETTE[31], (x+11, y+3), 2)
+            pygame.draw.circle(surf, palette[31], (x+5, y+3), 2)
+            pygame.draw.circle(surf, palette[31], (x+11, y+3), 2)
             
-        elif self.type == "flower":
+        elif power == "flower":
             # Stem
-            pygame.draw.rect(surf, NES_PALETTE[14], (x+7, y+8, 2, 8))
+            pygame.draw.rect(surf, palette[14], (x+7, y+8, 2, 8))
             # Flower
-            pygame.draw.circle(surf, NES_PALETTE[33], (x+8, y+8), 6)
-            pygame.draw.circle(surf, NES_PALETTE[39], (x+8, y+8), 4)
+            pygame.draw.circle(surf, palette[33], (x+8, y+8), 6)
+            pygame.draw.circle(surf, palette[39], (x+8, y+8), 4)
             # Petals
             for i in range(4):
                 angle = i * math.pi/2
-                pygame.draw.ellipse(surf, NES_PALETTE[33], 
+                pygame.draw.ellipse(surf, palette[33], 
                                    (x+8 + math.cos(angle)*4 - 4, y+8 + math.sin(angle)*4 - 2, 8, 4))
                 
-        elif self.type == "star":
+        elif power == "star":
             # Star body
             points = []
             for i in range(5):
@@ -822,28 +1304,123 @@ class Item(Entity):
                 points.append((x+8 + math.cos(angle)*6, y+8 + math.sin(angle)*6))
                 points.append((x+8 + math.cos(angle+math.pi/5)*3, y+8 + math.sin(angle+math.pi/5)*3))
                 
-            pygame.draw.polygon(surf, NES_PALETTE[31], points)
-            pygame.draw.polygon(surf, NES_PALETTE[39], points, 1)
+            pygame.draw.polygon(surf, palette[31], points)
+            pygame.draw.polygon(surf, palette[39], points, 1)
+
+# Tile rendering
+def draw_tile(surf, char, draw_x, y, theme):
+    if char == "G":  # Green ground top
+        pygame.draw.rect(surf, NES_PALETTE[theme["ground"]], (draw_x, y, TILE, TILE))
+        pygame.draw.rect(surf, NES_PALETTE[theme["block"]], (draw_x, y+8, TILE, TILE-8))
+        pygame.draw.rect(surf, NES_PALETTE[21], (draw_x+4, y+4, TILE-8, 4))
+    elif char == "S":  # Sand
+        pygame.draw.rect(surf, NES_PALETTE[33], (draw_x, y, TILE, TILE))
+        pygame.draw.rect(surf, NES_PALETTE[21], (draw_x+2, y+2, TILE-4, TILE-4))
+    elif char == "I":  # Ice
+        pygame.draw.rect(surf, NES_PALETTE[39], (draw_x, y, TILE, TILE))
+        pygame.draw.rect(surf, NES_PALETTE[38], (draw_x+2, y+2, TILE-4, TILE-4))
+    elif char == "B":  # Brown block
+        pygame.draw.rect(surf, NES_PALETTE[theme["block"]], (draw_x, y, TILE, TILE))
+        pygame.draw.rect(surf, NES_PALETTE[33], (draw_x+2, y+2, TILE-4, TILE-4))
+    elif char == "P":  # Platform
+        pygame.draw.rect(surf, NES_PALETTE[theme["block"]], (draw_x, y, TILE, TILE))
+    elif char == "T":  # Pipe
+        pygame.draw.rect(surf, NES_PALETTE[14], (draw_x, y, TILE, TILE))
+        pygame.draw.rect(surf, NES_PALETTE[20], (draw_x+2, y+2, TILE-4, TILE-4))
+    elif char == "?":  # Question block
+        pygame.draw.rect(surf, NES_PALETTE[33], (draw_x, y, TILE, TILE))
+        pygame.draw.rect(surf, NES_PALETTE[39], (draw_x+4, y+4, 8, 4))
+        pygame.draw.rect(surf, NES_PALETTE[39], (draw_x+4, y+8, 2, 2))
+        pygame.draw.rect(surf, NES_PALETTE[39], (draw_x+10, y+8, 2, 2))
+    elif char == "F":  # Flag
+        pygame.draw.rect(surf, NES_PALETTE[31], (draw_x+6, y, 4, TILE*4))
+        pygame.draw.rect(surf, NES_PALETTE[33], (draw_x, y, 10, 6))
+    elif char == "L":  # Lava
+        pygame.draw.rect(surf, NES_PALETTE[33], (draw_x, y, TILE, TILE))
+        pygame.draw.rect(surf, NES_PALETTE[21], (draw_x, y+4, TILE, TILE-4))
+    elif char == "C":  # Coral
+        pygame.draw.rect(surf, NES_PALETTE[25], (draw_x, y, TILE, TILE))
+        pygame.draw.rect(surf, NES_PALETTE[33], (draw_x+2, y+2, TILE-4, TILE-4))
+    elif char == "W":  # Seaweed
+        pygame.draw.rect(surf, NES_PALETTE[14], (draw_x+6, y, 4, TILE))
+        pygame.draw.rect(surf, NES_PALETTE[14], (draw_x+2, y+8, 12, 4))
+    elif char == "Q":  # Quicksand
+        pygame.draw.rect(surf, NES_PALETTE[33], (draw_x, y, TILE, TILE))
+        pygame.draw.rect(surf, NES_PALETTE[21], (draw_x+2, y+2, TILE-4, TILE-4))
+        for i in range(3):
+            pygame.draw.circle(surf, NES_PALETTE[21], (draw_x+4+i*4, y+8), 1)
+
+# Static tile layer is baked into column chunks this many pixels wide
+CHUNK_WIDTH = 256
+COLORKEY = (255, 0, 255)  # Not in NES_PALETTE, so safe as "no tile"
+
+# Tile atlases: every tile glyph rasterized once per theme, shared by all
+# TileMaps in the process. Glyphs taller than a tile (the flag) get a taller cell.
+ATLAS_TILES = "GSIBPT?FLCWQ"
+ATLAS_GLYPH_HEIGHT = {"F": TILE * 4}
+ATLAS_CACHE_SIZE = 4  # Themes kept before the least recently used is dropped
+TILE_ATLASES = OrderedDict()
+
+class TileAtlas:
+    def __init__(self, theme):
+        cell_height = max(ATLAS_GLYPH_HEIGHT.values())
+        self.surface = pygame.Surface((TILE * len(ATLAS_TILES), cell_height))
+        self.surface.fill(COLORKEY)
+        self.rects = {}
+        for i, char in enumerate(ATLAS_TILES):
+            draw_tile(self.surface, char, i * TILE, 0, theme)
+            self.rects[char] = pygame.Rect(i * TILE, 0, TILE, ATLAS_GLYPH_HEIGHT.get(char, TILE))
+        self.surface.set_colorkey(COLORKEY, RLEACCEL)
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+
+def get_tile_atlas(theme):
+    key = theme["name"]
+    atlas = TILE_ATLASES.get(key)
+    if atlas is None:
+        atlas = TILE_ATLASES[key] = TileAtlas(theme)
+        while len(TILE_ATLASES) > ATLAS_CACHE_SIZE:
+            TILE_ATLASES.popitem(last=False)
+    else:
+        TILE_ATLASES.move_to_end(key)
+    return atlas
+
+# Tiles that block movement, and a byte-code lookup table for them
+SOLID_TILES = ("G", "B", "P", "T", "L", "?", "S", "D", "I", "C", "W", "Q")
+SOLID_CODES = bytes(1 if chr(code) in SOLID_TILES else 0 for code in range(256))
+
+# Keeps box edges that sit exactly on a tile boundary out of the next tile
+EDGE = 0.001
 
 class TileMap:
+    # "chunks": blit pre-rendered chunks, "blits": one Surface.blits call over
+    # prebuilt per-chunk draw lists, "tiles": cull and blit every tile each frame
+    render_mode = "chunks"
+    
     def __init__(self, level_data, theme):
         self.tiles = []
-        self.colliders = []
         self.items = []
-        self.width = len(level_data[0]) * TILE
-        self.height = len(level_data) * TILE
+        self.cols = len(level_data[0])
+        self.rows = len(level_data)
+        self.width = self.cols * TILE
+        self.height = self.rows * TILE
         self.theme = theme
         
+        # One byte per cell, row-major, holding the tile character
+        self.codes = bytearray(
+            "".join(row.ljust(self.cols)[:self.cols] for row in level_data).encode("latin-1")
+        )
+        
         # Parse level data
         for y, row in enumerate(level_data):
             for x, char in enumerate(row):
                 if char != " ":
-                    rect = pygame.Rect(x * TILE, y * TILE, TILE, TILE)
                     self.tiles.append((x * TILE, y * TILE, char))
                     
-                    if char in ("G", "B", "P", "T", "L", "?", "S", "D", "I", "C", "W", "Q"):
-                        self.colliders.append(rect)
-                    elif char == "O":  # Coin
+                    # Solid tiles are looked up in self.codes
+                    if char in SOLID_TILES:
+                        continue
+                    if char == "O":  # Coin
                         self.items.append(Item(x * TILE, y * TILE, "coin"))
                     elif char == "M":  # Mushroom
                         self.items.append(Item(x * TILE, y * TILE, "mushroom"))
@@ -851,6 +1428,116 @@ class TileMap:
                         self.items.append(Item(x * TILE, y * TILE, "flower"))
                     elif char == "S":  # Star
                         self.items.append(Item(x * TILE, y * TILE, "star"))
+        
+        self.batches = self.build_batches()
+        self.chunks = self.build_chunks()
+    
+    def build_batches(self):
+        # Per-chunk (atlas, (x, y), area) draw lists in level coordinates
+        atlas = get_tile_atlas(self.theme)
+        batches = [[] for _ in range(0, self.width, CHUNK_WIDTH)]
+        for x, y, char in self.tiles:
+            # Rows can run past the first row's length; the camera never shows that
+            if x < self.width and char in atlas.rects:
+                batches[x // CHUNK_WIDTH].append((atlas.surface, (x, y), atlas.rects[char]))
+        return batches
+    
+    def build_chunks(self):
+        # Bake the static tiles into colorkeyed column chunks once per level
+        chunks = []
+        for i, batch in enumerate(self.batches):
+            left = i * CHUNK_WIDTH
+            chunk = pygame.Surface((min(CHUNK_WIDTH, self.width - left), self.height))
+            chunk.fill(COLORKEY)
+            chunk.blits([(image, (x - left, y), area) for image, (x, y), area in batch], doreturn=False)
+            chunk.set_colorkey(COLORKEY, RLEACCEL)
+            if pygame.display.get_surface() is not None:
+                chunk = chunk.convert()
+            chunks.append(chunk)
+        return chunks
+    
+    def solid_at(self, px, py):
+        # Is the tile under pixel (px, py) solid? Outside the map is empty
+        tx = int(px // TILE)
+        ty = int(py // TILE)
+        if 0 <= tx < self.cols and 0 <= ty < self.rows:
+            return SOLID_CODES[self.codes[ty * self.cols + tx]] == 1
+        return False
+    
+    def solid_in_cells(self, tx0, tx1, ty0, ty1):
+        # Any solid tile in the inclusive cell range?
+        tx0 = max(tx0, 0)
+        tx1 = min(tx1, self.cols - 1)
+        ty0 = max(ty0, 0)
+        ty1 = min(ty1, self.rows - 1)
+        codes = self.codes
+        for ty in range(ty0, ty1 + 1):
+            row_start = ty * self.cols
+            for tx in range(tx0, tx1 + 1):
+                if SOLID_CODES[codes[row_start + tx]]:
+                    return True
+        return False
+    
+    def overlaps_solid(self, x, y, w, h):
+        return self.solid_in_cells(int(x // TILE), int((x + w - EDGE) // TILE),
+                                   int(y // TILE), int((y + h - EDGE) // TILE))
+    
+    def sweep_x(self, x, y, w, h, dx):
+        # Move a box horizontally by dx, checking only the tile columns it
+        # enters. Returns the new x and whether a solid tile stopped it.
+        new_x = x + dx
+        ty0 = int(y // TILE)
+        ty1 = int((y + h - EDGE) // TILE)
+        if dx > 0:
+            for tx in range(int((x + w - EDGE) // TILE) + 1, int((new_x + w - EDGE) // TILE) + 1):
+                if self.solid_in_cells(tx, tx, ty0, ty1):
+                    return tx * TILE - w, True
+        elif dx < 0:
+            for tx in range(int(x // TILE) - 1, int(new_x // TILE) - 1, -1):
+                if self.solid_in_cells(tx, tx, ty0, ty1):
+                    return (tx + 1) * TILE, True
+        return new_x, False
+    
+    def sweep_y(self, x, y, w, h, dy):
+        # Vertical counterpart of sweep_x
+        new_y = y + dy
+        tx0 = int(x // TILE)
+        tx1 = int((x + w - EDGE) // TILE)
+        if dy > 0:
+            for ty in range(int((y + h - EDGE) // TILE) + 1, int((new_y + h - EDGE) // TILE) + 1):
+                if self.solid_in_cells(tx0, tx1, ty, ty):
+                    return ty * TILE - h, True
+        elif dy < 0:
+            for ty in range(int(y // TILE) - 1, int(new_y // TILE) - 1, -1):
+                if self.solid_in_cells(tx0, tx1, ty, ty):
+                    return (ty + 1) * TILE, True
+        return new_y, False
+    
+    def draw_chunks(self, surf, cam):
+        # Blit only the chunks overlapping the camera
+        cam = int(cam)
+        first = max(cam // CHUNK_WIDTH, 0)
+        last = min((cam + WIDTH) // CHUNK_WIDTH, len(self.chunks) - 1)
+        for i in range(first, last + 1):
+            surf.blit(self.chunks[i], (i * CHUNK_WIDTH - cam, 0))
+    
+    def draw_batches(self, surf, cam):
+        # Submit the draw lists of the visible chunks in one blits call
+        first = max(int(cam) // CHUNK_WIDTH, 0)
+        last = min((int(cam) + WIDTH) // CHUNK_WIDTH, len(self.batches) - 1)
+        surf.blits([(image, (x - cam, y), area)
+                    for batch in self.batches[first:last + 1]
+                    for image, (x, y), area in batch], doreturn=False)
+    
+    def draw_tiles(self, surf, cam):
+        atlas = get_tile_atlas(self.theme)
+        batch = []
+        for x, y, char in self.tiles:
+            draw_x = x - cam
+            if draw_x < -TILE or draw_x > WIDTH or char not in atlas.rects:
+                continue
+            batch.append((atlas.surface, (draw_x, y), atlas.rects[char]))
+        surf.blits(batch, doreturn=False)
     
     def draw(self, surf, cam):
         # Draw background
@@ -864,51 +1551,12 @@ class TileMap:
             pygame.draw.ellipse(surf, NES_PALETTE[31], (x+15, y-5, 25, 15))
         
         # Draw tiles
-        for x, y, char in self.tiles:
-            draw_x = x - cam
-            if draw_x < -TILE or draw_x > WIDTH:
-                continue
-                
-            if char == "G":  # Green ground top
-                pygame.draw.rect(surf, NES_PALETTE[self.theme["ground"]], (draw_x, y, TILE, TILE))
-                pygame.draw.rect(surf, NES_PALETTE[self.theme["block"]], (draw_x, y+8, TILE, TILE-8))
-                pygame.draw.rect(surf, NES_PALETTE[21], (draw_x+4, y+4, TILE-8, 4))
-            elif char == "S":  # Sand
-                pygame.draw.rect(surf, NES_PALETTE[33], (draw_x, y, TILE, TILE))
-                pygame.draw.rect(surf, NES_PALETTE[21], (draw_x+2, y+2, TILE-4, TILE-4))
-            elif char == "I":  # Ice
-                pygame.draw.rect(surf, NES_PALETTE[39], (draw_x, y, TILE, TILE))
-                pygame.draw.rect(surf, NES_PALETTE[38], (draw_x+2, y+2, TILE-4, TILE-4))
-            elif char == "B":  # Brown block
-                pygame.draw.rect(surf, NES_PALETTE[self.theme["block"]], (draw_x, y, TILE, TILE))
-                pygame.draw.rect(surf, NES_PALETTE[33], (draw_x+2, y+2, TILE-4, TILE-4))
-            elif char == "P":  # Platform
-                pygame.draw.rect(surf, NES_PALETTE[self.theme["block"]], (draw_x, y, TILE, TILE))
-            elif char == "T":  # Pipe
-                pygame.draw.rect(surf, NES_PALETTE[14], (draw_x, y, TILE, TILE))
-                pygame.draw.rect(surf, NES_PALETTE[20], (draw_x+2, y+2, TILE-4, TILE-4))
-            elif char == "?":  # Question block
-                pygame.draw.rect(surf, NES_PALETTE[33], (draw_x, y, TILE, TILE))
-                pygame.draw.rect(surf, NES_PALETTE[39], (draw_x+4, y+4, 8, 4))
-                pygame.draw.rect(surf, NES_PALETTE[39], (draw_x+4, y+8, 2, 2))
-                pygame.draw.rect(surf, NES_PALETTE[39], (draw_x+10, y+8, 2, 2))
-            elif char == "F":  # Flag
-                pygame.draw.rect(surf, NES_PALETTE[31], (draw_x+6, y, 4, TILE*4))
-                pygame.draw.rect(surf, NES_PALETTE[33], (draw_x, y, 10, 6))
-            elif char == "L":  # Lava
-                pygame.draw.rect(surf, NES_PALETTE[33], (draw_x, y, TILE, TILE))
-                pygame.draw.rect(surf, NES_PALETTE[21], (draw_x, y+4, TILE, TILE-4))
-            elif char == "C":  # Coral
-                pygame.draw.rect(surf, NES_PALETTE[25], (draw_x, y, TILE, TILE))
-                pygame.draw.rect(surf, NES_PALETTE[33], (draw_x+2, y+2, TILE-4, TILE-4))
-            elif char == "W":  # Seaweed
-                pygame.draw.rect(surf, NES_PALETTE[14], (draw_x+6, y, 4, TILE))
-                pygame.draw.rect(surf, NES_PALETTE[14], (draw_x+2, y+8, 12, 4))
-            elif char == "Q":  # Quicksand
-                pygame.draw.rect(surf, NES_PALETTE[33], (draw_x, y, TILE, TILE))
-                pygame.draw.rect(surf, NES_PALETTE[21], (draw_x+2, y+2, TILE-4, TILE-4))
-                for i in range(3):
-                    pygame.draw.circle(surf, NES_PALETTE[21], (draw_x+4+i*4, y+8), 1)
+        if self.render_mode == "chunks":
+            self.draw_chunks(surf, cam)
+        elif self.render_mode == "blits":
+            self.draw_batches(surf, cam)
+        else:
+            self.draw_tiles(surf, cam)
         
         # Draw items
         for item in self.items:
@@ -935,7 +1583,7 @@ class TitleScreen(Scene):
             
         # Animate logo coming down
         if self.logo_y < self.logo_target_y:
-            self.logo_y += 3
+            self.logo_y += 3 * dt * 60
             
     def draw(self, surf):
         # Background
@@ -951,17 +1599,17 @@ class TitleScreen(Scene):
         pygame.draw.rect(surf, NES_PALETTE[33], (box_x, box_y, box_width, box_height))
         
         # Title inside box
-        title_font = pygame.font.SysFont(None, 32)
-        title = title_font.render("KOOPA ENGINE 1.0A", True, NES_PALETTE[39])
+        title_font = get_font(32)
+        title = render_text(title_font, "KOOPA ENGINE 1.0A", NES_PALETTE[39])
         surf.blit(title, (box_x + (box_width - title.get_width()) // 2, box_y + 15))
         
-        subtitle_font = pygame.font.SysFont(None, 16)
-        subtitle = subtitle_font.render("Tech demo", True, NES_PALETTE[21])
+        subtitle_font = get_font(16)
+        subtitle = render_text(subtitle_font, "Tech demo", NES_PALETTE[21])
         surf.blit(subtitle, (box_x + (box_width - subtitle.get_width()) // 2, box_y + 50))
         
         # Copyright
-        copyright_font = pygame.font.SysFont(None, 14)
-        copyright = copyright_font.render("[C] Team Flames 20XX [1985] - Nintendo", True, NES_PALETTE[0])
+        copyright_font = get_font(14)
+        copyright = render_text(copyright_font, "[C] Team Flames 20XX [1985] - Nintendo", NES_PALETTE[0])
         surf.blit(copyright, (WIDTH//2 - copyright.get_width()//2, box_y + box_height + 20))
         
         # Mario and enemies
@@ -994,8 +1642,8 @@ class TitleScreen(Scene):
         
         # Press Start
         if self.logo_y >= self.logo_target_y and int(self.timer * 10) % 2 == 0:
-            font = pygame.font.SysFont(None, 24)
-            text = font.render("PRESS ENTER", True, NES_PALETTE[39])
+            font = get_font(24)
+            text = render_text(font, "PRESS ENTER", NES_PALETTE[39])
             surf.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT - 30))
 
 class SlotSelect(Scene):
@@ -1021,8 +1669,8 @@ class SlotSelect(Scene):
         s.fill(NES_PALETTE[27])
         
         # Title
-        font = pygame.font.SysFont(None, 30)
-        title = font.render("SELECT PLAYER", True, NES_PALETTE[33])
+        font = get_font(30)
+        title = render_text(font, "SELECT PLAYER", NES_PALETTE[33])
         s.blit(title, (WIDTH//2 - title.get_width()//2, 20))
         
         # Draw file slots
@@ -1035,8 +1683,8 @@ class SlotSelect(Scene):
             pygame.draw.rect(s, NES_PALETTE[33], (x, y, 40, 60))
             
             # Slot number
-            slot_font = pygame.font.SysFont(None, 20)
-            slot_text = slot_font.render(f"{i+1}", True, NES_PALETTE[39])
+            slot_font = get_font(20)
+            slot_text = render_text(slot_font, f"{i+1}", NES_PALETTE[39])
             s.blit(slot_text, (x+18, y+5))
             
             # Selection indicator
@@ -1046,13 +1694,13 @@ class SlotSelect(Scene):
             # World preview
             if state.progress[i]:
                 world = state.progress[i]["world"]
-                world_font = pygame.font.SysFont(None, 16)
-                world_text = world_font.render(f"WORLD {world}", True, NES_PALETTE[39])
+                world_font = get_font(16)
+                world_text = render_text(world_font, f"WORLD {world}", NES_PALETTE[39])
                 s.blit(world_text, (x+20 - world_text.get_width()//2, y+50))
                 
                 # Draw completed levels
                 completed = len(state.progress[i]["completed"])
-                completed_text = world_font.render(f"{completed}/32", True, NES_PALETTE[31])
+                completed_text = render_text(world_font, f"{completed}/32", NES_PALETTE[31])
                 s.blit(completed_text, (x+20 - completed_text.get_width()//2, y+35))
 
 class WorldSelect(Scene):
@@ -1087,8 +1735,8 @@ class WorldSelect(Scene):
         s.fill(NES_PALETTE[27])
         
         # Title
-        font = pygame.font.SysFont(None, 30)
-        title = font.render(f"SELECT WORLD - SLOT {state.slot+1}", True, NES_PALETTE[33])
+        font = get_font(30)
+        title = render_text(font, f"SELECT WORLD - SLOT {state.slot+1}", NES_PALETTE[33])
         s.blit(title, (WIDTH//2 - title.get_width()//2, 20))
         
         # Draw worlds
@@ -1103,15 +1751,15 @@ class WorldSelect(Scene):
             pygame.draw.rect(s, NES_PALETTE[theme["ground"]], (55, y_pos+5, WIDTH-110, 40))
             
             # World title
-            world_font = pygame.font.SysFont(None, 24)
-            world_text = world_font.render(f"{theme['name']}", True, NES_PALETTE[39])
+            world_font = get_font(24)
+            world_text = render_text(world_font, f"{theme['name']}", NES_PALETTE[39])
             s.blit(world_text, (WIDTH//2 - world_text.get_width()//2, y_pos+15))
             
             # Completed levels
             completed = sum(1 for lvl in range(1,5) 
                            if f"{world}-{lvl}" in state.progress[state.slot]["completed"])
-            comp_font = pygame.font.SysFont(None, 18)
-            comp_text = comp_font.render(f"{completed}/4 completed", True, NES_PALETTE[31])
+            comp_font = get_font(18)
+            comp_text = render_text(comp_font, f"{completed}/4 completed", NES_PALETTE[31])
             s.blit(comp_text, (WIDTH//2 - comp_text.get_width()//2, y_pos+35))
             
             # Selection indicator
@@ -1126,8 +1774,8 @@ class WorldSelect(Scene):
             pygame.draw.rect(s, NES_PALETTE[33], (WIDTH-18, scroll_pos, 6, scroll_height))
         
         # Instructions
-        font = pygame.font.SysFont(None, 16)
-        text = font.render("UP/DOWN: Select World  ENTER: Choose  ESC: Back", True, NES_PALETTE[0])
+        font = get_font(16)
+        text = render_text(font, "UP/DOWN: Select World  ENTER: Choose  ESC: Back", NES_PALETTE[0])
         s.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT - 20))
 
 class LevelSelect(Scene):
@@ -1158,8 +1806,8 @@ class LevelSelect(Scene):
         theme = WORLD_THEMES[str(self.world_num)]
         
         # Title
-        font = pygame.font.SysFont(None, 30)
-        title = font.render(f"{theme['name']} - SLOT {state.slot+1}", True, NES_PALETTE[33])
+        font = get_font(30)
+        title = render_text(font, f"{theme['name']} - SLOT {state.slot+1}", NES_PALETTE[33])
         s.blit(title, (WIDTH//2 - title.get_width()//2, 20))
         
         # Draw levels
@@ -1172,13 +1820,13 @@ class LevelSelect(Scene):
             pygame.draw.rect(s, NES_PALETTE[theme["ground"]], (x_pos+5, y_pos+5, 50, 70))
             
             # Level number
-            level_font = pygame.font.SysFont(None, 24)
-            level_text = level_font.render(f"{level}", True, NES_PALETTE[39])
+            level_font = get_font(24)
+            level_text = render_text(level_font, f"{level}", NES_PALETTE[39])
             s.blit(level_text, (x_pos+30 - level_text.get_width()//2, y_pos+15))
             
             # Draw thumbnail
             level_id = f"{self.world_num}-{level}"
-            thumb = THUMBNAILS.get(level_id, THUMBNAILS["1-1"])
+            thumb = get_thumbnail(level_id)
             s.blit(thumb, (x_pos+15, y_pos+35))
             
             # Castle icon for level 4
@@ -1196,10 +1844,172 @@ class LevelSelect(Scene):
                 pygame.draw.rect(s, NES_PALETTE[39], (x_pos, y_pos, 60, 80), 3)
         
         # Instructions
-        font = pygame.font.SysFont(None, 16)
-        text = font.render("LEFT/RIGHT: Select Level  ENTER: Play  ESC: Back", True, NES_PALETTE[0])
+        font = get_font(16)
+        text = render_text(font, "LEFT/RIGHT: Select Level  ENTER: Play  ESC: Back", NES_PALETTE[0])
         s.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT - 20))
 
+class ScriptedKeys:
+    # Stands in for pygame.key.get_pressed() when input comes from a script
+    def __init__(self, pressed=()):
+        self.pressed = set(pressed)
+        
+    def __getitem__(self, key):
+        return key in self.pressed
+
+class HudLayer:
+    # The HUD bar as one pre-composed surface. A field's text is re-rendered
+    # only when the value behind it changes, and the bar is recomposed only then.
+    FIELDS = (("score", "SCORE {:06d}"), ("coins", "COINS {:02d}"), ("time", "TIME {:03d}"), ("lives", "x{}"))
+    
+    def __init__(self, level_id):
+        self.surface = pygame.Surface((WIDTH, 20))
+        self.values = {}
+        self.texts = {"world": render_text(get_font(16), f"WORLD {level_id}", NES_PALETTE[39])}
+        
+        # Instrumentation: field re-renders, averaged over one second windows
+        self.renders = 0
+        self.renders_per_second = 0.0
+        self.window_start = pygame.time.get_ticks()
+        
+    def update(self, time_left):
+        values = {"score": state.score, "coins": state.coins, "time": int(time_left), "lives": state.lives}
+        dirty = False
+        font = get_font(16)
+        for name, fmt in self.FIELDS:
+            if name not in self.values or self.values[name] != values[name]:
+                self.values[name] = values[name]
+                self.texts[name] = render_text(font, fmt.format(values[name]), NES_PALETTE[39])
+                self.renders += 1
+                dirty = True
+        if dirty:
+            self.compose()
+            
+        now = pygame.time.get_ticks()
+        if now - self.window_start >= 1000:
+            self.renders_per_second = self.renders * 1000 / (now - self.window_start)
+            self.renders = 0
+            self.window_start = now
+            
+    def compose(self):
+        s = self.surface
+        texts = self.texts
+        s.fill(NES_PALETTE[0])
+        s.blit(texts["score"], (10, 4))
+        s.blit(texts["coins"], (WIDTH//2 - texts["coins"].get_width()//2, 4))
+        s.blit(texts["world"], (WIDTH - texts["world"].get_width() - 10, 4))
+        s.blit(texts["time"], (WIDTH//2 - texts["time"].get_width()//2, 4))
+        s.blit(texts["lives"], (WIDTH - 60, 4))
+        # Draw small mario for lives indicator
+        pygame.draw.rect(s, NES_PALETTE[33], (WIDTH - 80, 6, 8, 8))
+        pygame.draw.rect(s, NES_PALETTE[39], (WIDTH - 80, 2, 8, 8))
+
+# Step Goombas in a NumPy WalkerStore instead of one object at a time, in
+# levels with at least WALKER_STORE_MIN of them. Below that NumPy's per-call
+# overhead costs more than it saves (--bench walkers shows the crossover).
+WALKER_STORE = True
+WALKER_STORE_MIN = 64
+
+# Activation regions: enemies sleep (no update, no draw) once they are more
+# than SLEEP_MARGIN outside the camera window and wake within WAKE_MARGIN
+WAKE_MARGIN = TILE * 8
+SLEEP_MARGIN = TILE * 16
+
+class Sleepers:
+    # Sleeping entities kept sorted by x. They do not move while asleep, so
+    # waking the ones in reach is a bisect rather than a scan of the level.
+    def __init__(self, entities=()):
+        self.xs = []
+        self.entities = []
+        for entity in entities:
+            self.add(entity)
+    
+    def __len__(self):
+        return len(self.entities)
+    
+    def add(self, entity):
+        i = bisect.bisect_right(self.xs, entity.x)
+        self.xs.insert(i, entity.x)
+        self.entities.insert(i, entity)
+    
+    def wake(self, cam):
+        # Remove and return the sleepers within WAKE_MARGIN of the window
+        lo = bisect.bisect_right(self.xs, cam - WAKE_MARGIN)
+        hi = bisect.bisect_left(self.xs, cam + WIDTH + WAKE_MARGIN)
+        woken = self.entities[lo:hi]
+        del self.xs[lo:hi]
+        del self.entities[lo:hi]
+        return woken
+
+# Broad phase: entities are filed under every HASH_CELL square their box
+# touches, so overlap tests only look at entities in the same squares
+HASH_CELL = TILE * 4
+
+class SpatialHash:
+    # Each entity belongs to one group ("enemies", "items", ...). move()
+    # re-files an entity only when the squares it covers change. query()
+    # returns candidates in insertion order; callers still do the exact test.
+    def __init__(self):
+        self.buckets = {}
+        self.entries = {}  # entity -> (group, squares)
+        self.order = {}  # entity -> insertion count, for query()
+        self.inserted = 0
+    
+    def squares(self, x, y, w, h):
+        return int(x // HASH_CELL), int((x + w) // HASH_CELL), int(y // HASH_CELL), int((y + h) // HASH_CELL)
+    
+    def file(self, entity, group, squares):
+        x0, x1, y0, y1 = squares
+        for sx in range(x0, x1 + 1):
+            for sy in range(y0, y1 + 1):
+                self.buckets.setdefault((group, sx, sy), {})[entity] = None
+    
+    def unfile(self, entity, group, squares):
+        x0, x1, y0, y1 = squares
+        for sx in range(x0, x1 + 1):
+            for sy in range(y0, y1 + 1):
+                bucket = self.buckets[(group, sx, sy)]
+                del bucket[entity]
+                if not bucket:
+                    del self.buckets[(group, sx, sy)]
+    
+    def insert(self, entity, group):
+        squares = self.squares(entity.x, entity.y, entity.width, entity.height)
+        self.entries[entity] = (group, squares)
+        self.order[entity] = self.inserted
+        self.inserted += 1
+        self.file(entity, group, squares)
+    
+    def move(self, entity):
+        group, squares = self.entries[entity]
+        # Inlined squares(): this runs for every moving entity every step
+        x = entity.x
+        y = entity.y
+        new_squares = (int(x // HASH_CELL), int((x + entity.width) // HASH_CELL),
+                       int(y // HASH_CELL), int((y + entity.height) // HASH_CELL))
+        if new_squares != squares:
+            self.unfile(entity, group, squares)
+            self.file(entity, group, new_squares)
+            self.entries[entity] = (group, new_squares)
+    
+    def discard(self, entity):
+        entry = self.entries.pop(entity, None)
+        if entry is not None:
+            del self.order[entity]
+            self.unfile(entity, entry[0], entry[1])
+    
+    def query(self, rect, group):
+        x, y, w, h = rect
+        x0, x1, y0, y1 = self.squares(x, y, w, h)
+        found = {}
+        for sx in range(x0, x1 + 1):
+            for sy in range(y0, y1 + 1):
+                bucket = self.buckets.get((group, sx, sy))
+                if bucket:
+                    found.update(bucket)
+        if len(found) > 1:
+            return sorted(found, key=self.order.__getitem__)
+        return list(found)
+
 class LevelScene(Scene):
     def __init__(self, level_id):
         level_data, theme = LEVELS[level_id]
@@ -1208,6 +2018,7 @@ class LevelScene(Scene):
         self.enemies = []
         self.items = self.map.items
         self.cam = 0.0
+        self.prev_cam = 0.0
         self.level_id = level_id
         self.time = 300
         self.coins = 0
@@ -1216,43 +2027,106 @@ class LevelScene(Scene):
         self.flag_pos = 0
         self.boss = None
         self.world_num = level_id.split("-")[0]
+        self.hud = HudLayer(level_id)
+        self.debug = False
+        self.keys = ScriptedKeys()  # Replaced by the real key state in handle
         
         # Check if underwater level
         self.player.underwater = self.world_num == "3"
         
-        # Parse level for enemies and player start
-        for y, row in enumerate(level_data):
-            for x, char in enumerate(row):
-                if char == "S":
-                    self.player.x = x * TILE
-                    self.player.y = y * TILE
-                elif char == "G":
-                    self.enemies.append(Goomba(x * TILE, y * TILE))
-                elif char == "P":
-                    self.enemies.append(PiranhaPlant(x * TILE, y * TILE))
-                elif char == "C":
-                    self.enemies.append(CheepCheep(x * TILE, y * TILE))
-                elif char == "K":
-                    self.enemies.append(Goomba(x * TILE, y * TILE))  # Koopa placeholder
-                elif char == "X":  # Boss
-                    if self.world_num == "1":
-                        self.boss = Boss(x * TILE, y * TILE, "boom_boom")
-                    elif self.world_num == "2":
-                        self.boss = Boss(x * TILE, y * TILE, "morton")
-                    else:
-                        self.boss = Boss(x * TILE, y * TILE, "boom_boom")
-                elif char == "F":
-                    self.flag_pos = x * TILE
+        # Create enemies and find the player start from the level's spawn list
+        for char, x, y in LEVELS.spawns(level_id):
+            if char == "S":
+                self.player.x = x * TILE
+                self.player.y = y * TILE
+            elif char == "G":
+                self.enemies.append(Goomba(x * TILE, y * TILE))
+            elif char == "P":
+                self.enemies.append(PiranhaPlant(x * TILE, y * TILE))
+            elif char == "C":
+                self.enemies.append(CheepCheep(x * TILE, y * TILE))
+            elif char == "K":
+                self.enemies.append(Goomba(x * TILE, y * TILE))  # Koopa placeholder
+            elif char == "X":  # Boss
+                if self.world_num == "1":
+                    self.boss = Boss(x * TILE, y * TILE, "boom_boom")
+                elif self.world_num == "2":
+                    self.boss = Boss(x * TILE, y * TILE, "morton")
+                else:
+                    self.boss = Boss(x * TILE, y * TILE, "boom_boom")
+            elif char == "F":
+                self.flag_pos = x * TILE
+        
+        # Crowds of Goombas move into a WalkerStore when there is NumPy to step them
+        self.walkers = None
+        if WALKER_STORE and numpy is not None:
+            walkers = [enemy for enemy in self.enemies if type(enemy) is Goomba]
+            if len(walkers) >= WALKER_STORE_MIN:
+                self.walkers = WalkerStore(walkers, self.map)
+                self.enemies = [enemy for enemy in self.enemies if type(enemy) is not Goomba]
+        
+        # Everything starts asleep; whatever the camera can reach wakes now
+        self.sleepers = Sleepers(self.enemies)
+        self.awake = self.sleepers.wake(self.cam)
+        self.boss_awake = False
+        if self.walkers:
+            self.walkers.wake(self.cam)
+        
+        # Broad phase over what the player and fireballs can run into; only
+        # awake enemies are filed, sleepers join when they wake
+        self.nearby = SpatialHash()
+        for enemy in self.awake:
+            self.nearby.insert(enemy, "enemies")
+        for item in self.items:
+            self.nearby.insert(item, "items")
+        if self.boss:
+            self.nearby.insert(self.boss, "bosses")
+        
+        # Objects constructed up to the last drawn frame
+        self.allocs = sum(ALLOC_COUNTS.values())
     
     def handle(self, evts, keys):
+        self.keys = keys
         for e in evts:
             if e.type == KEYDOWN:
                 if e.key == K_ESCAPE:
                     state.paused = not state.paused
                 elif e.key == K_p:
                     state.paused = not state.paused
+                elif e.key == K_F3:
+                    self.debug = not self.debug
                     
+    def entity_counts(self):
+        # (awake, sleeping) enemies still in play, walkers and boss included
+        awake = sum(1 for enemy in self.awake if enemy.active)
+        asleep = len(self.sleepers)
+        if self.walkers:
+            walkers_awake, walkers_asleep = self.walkers.counts()
+            awake += walkers_awake
+            asleep += walkers_asleep
+        if self.boss and self.boss.active:
+            if self.boss_awake:
+                awake += 1
+            else:
+                asleep += 1
+        return awake, asleep
+    
+    def movers(self):
+        # Everything whose drawn position is interpolated between steps
+        movers = [self.player] + self.player.fireballs + self.awake + self.items
+        if self.boss:
+            movers.append(self.boss)
+        return movers
+        
     def update(self, dt):
+        # Remember where everything was for interpolated drawing
+        self.prev_cam = self.cam
+        for mover in self.movers():
+            mover.prev_x = mover.x
+            mover.prev_y = mover.y
+        if self.walkers:
+            self.walkers.remember()
+            
         if state.paused:
             return
             
@@ -1260,30 +2134,52 @@ class LevelScene(Scene):
         self.time -= dt
         
         # Update player
-        self.player.update(self.map.colliders, dt, self.enemies, self.items)
-        
-        # Update enemies
-        for enemy in self.enemies:
-            if enemy.active:
-                enemy.update(self.map.colliders, dt)
+        self.player.update(self.map, dt, self.awake, self.items, self.keys, self.walkers, self.nearby)
+        
+        # Wake enemies the camera is nearing and update the awake ones,
+        # putting any the camera has left far behind back to sleep
+        for enemy in self.sleepers.wake(self.cam):
+            self.nearby.insert(enemy, "enemies")
+            self.awake.append(enemy)
+        awake = []
+        for enemy in self.awake:
+            if not enemy.active:
+                self.nearby.discard(enemy)
+            elif self.cam - SLEEP_MARGIN <= enemy.x <= self.cam + WIDTH + SLEEP_MARGIN:
+                enemy.update(self.map, dt)
+                self.nearby.move(enemy)
+                awake.append(enemy)
+            else:
+                self.nearby.discard(enemy)
+                self.sleepers.add(enemy)
+        self.awake = awake
+        if self.walkers:
+            self.walkers.wake(self.cam)
+            self.walkers.update(dt)
         
         # Update boss
-        if self.boss and self.boss.active:
-            self.boss.update(self.map.colliders, dt, self.player)
+        if self.boss:
+            boss_x = self.boss.x
+            self.boss_awake = (self.cam - WAKE_MARGIN < boss_x < self.cam + WIDTH + WAKE_MARGIN
+                               or self.boss_awake and self.cam - SLEEP_MARGIN <= boss_x <= self.cam + WIDTH + SLEEP_MARGIN)
+        if self.boss and self.boss.active and self.boss_awake:
+            self.boss.update(self.map, dt, self.player)
+            self.nearby.move(self.boss)
             
             # Check fireball collision with boss
-            for fb in self.player.fireballs[:]:
-                if self.boss.get_rect().colliderect(fb.x, fb.y, fb.width, fb.height):
-                    self.boss.health -= 1
-                    fb.active = False
-                    if self.boss.health <= 0:
-                        self.boss.active = False
-                        state.progress[state.slot]["boss_defeated"] = True
-                        state.score += 5000
+            for fb in self.player.fireballs:
+                for boss in self.nearby.query((fb.x, fb.y, fb.width, fb.height), "bosses"):
+                    if boss.get_rect().colliderect(fb.x, fb.y, fb.width, fb.height):
+                        boss.health -= 1
+                        fb.active = False
+                        if boss.health <= 0:
+                            boss.active = False
+                            state.progress[state.slot]["boss_defeated"] = True
+                            state.score += 5000
         
         # Camera follow player
         target = self.player.x - WIDTH // 2
-        self.cam += (target - self.cam) * 0.1
+        self.cam += (target - self.cam) * (1 - 0.9 ** (dt * 60))
         self.cam = max(0, min(self.cam, self.map.width - WIDTH))
         
         # Check for end of level
@@ -1308,47 +2204,39 @@ class LevelScene(Scene):
                 pop()
         
     def draw(self, s):
+        # Draw the world blended between the last two simulation steps
+        alpha = self.alpha
+        movers = self.movers()
+        current = [(mover.x, mover.y) for mover in movers]
+        for mover in movers:
+            mover.x = mover.prev_x + (mover.x - mover.prev_x) * alpha
+            mover.y = mover.prev_y + (mover.y - mover.prev_y) * alpha
+        cam = self.prev_cam + (self.cam - self.prev_cam) * alpha
+        
         # Draw map
-        self.map.draw(s, self.cam)
+        self.map.draw(s, cam)
         
         # Draw enemies
-        for enemy in self.enemies:
+        for enemy in self.awake:
             if enemy.active:
-                enemy.draw(s, self.cam)
+                enemy.draw(s, cam)
+        if self.walkers:
+            self.walkers.draw(s, cam, alpha)
             
         # Draw boss
-        if self.boss and self.boss.active:
-            self.boss.draw(s, self.cam)
+        if self.boss and self.boss.active and self.boss_awake:
+            self.boss.draw(s, cam)
             
         # Draw player
-        self.player.draw(s, self.cam)
-        
-        # Draw HUD
-        pygame.draw.rect(s, NES_PALETTE[0], (0, 0, WIDTH, 20))
-        
-        # Score
-        font = pygame.font.SysFont(None, 16)
-        score_text = font.render(f"SCORE {state.score:06d}", True, NES_PALETTE[39])
-        s.blit(score_text, (10, 4))
-        
-        # Coins
-        coin_text = font.render(f"COINS {state.coins:02d}", True, NES_PALETTE[39])
-        s.blit(coin_text, (WIDTH//2 - coin_text.get_width()//2, 4))
+        self.player.draw(s, cam)
         
-        # World
-        world_text = font.render(f"WORLD {self.level_id}", True, NES_PALETTE[39])
-        s.blit(world_text, (WIDTH - world_text.get_width() - 10, 4))
+        for mover, (x, y) in zip(movers, current):
+            mover.x = x
+            mover.y = y
         
-        # Time
-        time_text = font.render(f"TIME {int(self.time):03d}", True, NES_PALETTE[39])
-        s.blit(time_text, (WIDTH//2 - time_text.get_width()//2, 4))
-        
-        # Lives
-        lives_text = font.render(f"x{state.lives}", True, NES_PALETTE[39])
-        s.blit(lives_text, (WIDTH - 60, 4))
-        # Draw small mario for lives indicator
-        pygame.draw.rect(s, NES_PALETTE[33], (WIDTH - 80, 6, 8, 8))
-        pygame.draw.rect(s, NES_PALETTE[39], (WIDTH - 80, 2, 8, 8))
+        # Draw HUD
+        self.hud.update(self.time)
+        s.blit(self.hud.surface, (0, 0))
         
         # Power-up indicator
         if state.mario_size == "big":
@@ -1362,13 +2250,28 @@ class LevelScene(Scene):
             overlay.fill((0, 0, 0, 128))
             s.blit(overlay, (0, 0))
             
-            font = pygame.font.SysFont(None, 30)
-            text = font.render("PAUSED", True, NES_PALETTE[39])
+            font = get_font(30)
+            text = render_text(font, "PAUSED", NES_PALETTE[39])
             s.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 - 20))
             
-            font = pygame.font.SysFont(None, 16)
-            text = font.render("Press P or ESC to continue", True, NES_PALETTE[39])
+            font = get_font(16)
+            text = render_text(font, "Press P or ESC to continue", NES_PALETTE[39])
             s.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 + 20))
+        
+        # Debug overlay
+        allocs = sum(ALLOC_COUNTS.values())
+        frame_allocs = allocs - self.allocs
+        self.allocs = allocs
+        if self.debug:
+            font = get_font(16)
+            text = render_text(font, f"HUD renders/s {self.hud.renders_per_second:.1f}", NES_PALETTE[39])
+            s.blit(text, (WIDTH - text.get_width() - 10, HEIGHT - 20))
+            text = render_text(font, f"allocs/frame {frame_allocs}  pooled fireballs {len(FIREBALL_POOL.free)}",
+                               NES_PALETTE[39])
+            s.blit(text, (WIDTH - text.get_width() - 10, HEIGHT - 36))
+            awake, asleep = self.entity_counts()
+            text = render_text(font, f"enemies awake {awake}  asleep {asleep}", NES_PALETTE[39])
+            s.blit(text, (WIDTH - text.get_width() - 10, HEIGHT - 52))
 
 class GameOverScene(Scene):
     def __init__(self):
@@ -1383,60 +2286,82 @@ class GameOverScene(Scene):
             
     def draw(self, s):
         s.fill(NES_PALETTE[0])
-        font = pygame.font.SysFont(None, 40)
-        text = font.render("GAME OVER", True, NES_PALETTE[33])
+        font = get_font(40)
+        text = render_text(font, "GAME OVER", NES_PALETTE[33])
         s.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 - 20))
         
-        font = pygame.font.SysFont(None, 20)
-        text = font.render(f"FINAL SCORE: {state.score}", True, NES_PALETTE[39])
+        font = get_font(20)
+        text = render_text(font, f"FINAL SCORE: {state.score}", NES_PALETTE[39])
         s.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 + 20))
 
+class Particle:
+    __slots__ = ("x", "y", "vx", "vy", "life", "color")
+    
+    def __init__(self, x, y, vx, vy, color):
+        ALLOC_COUNTS["particles"] += 1
+        self.reset(x, y, vx, vy, color)
+    
+    def reset(self, x, y, vx, vy, color):
+        self.x = x
+        self.y = y
+        self.vx = vx
+        self.vy = vy
+        self.life = 1.0
+        self.color = color
+
+# Burnt-out firework sparks, reused by the next burst
+PARTICLE_POOL = Pool(Particle)
+
 class WinScreen(Scene):
     def __init__(self):
         self.timer = 5
         self.fireworks = []
+        self.particles = []
         
     def update(self, dt):
         self.timer -= dt
         
         # Add fireworks
-        if random.random() < 0.2:
+        if random.random() < 0.2 * dt * 60:
             self.fireworks.append({
                 "x": random.randint(50, WIDTH-50),
                 "y": HEIGHT,
                 "size": random.randint(20, 40),
-                "color": random.choice([NES_PALETTE[33], NES_PALETTE[39], NES_PALETTE[31]]),
-                "particles": []
+                "color": random.choice([NES_PALETTE[33], NES_PALETTE[39], NES_PALETTE[31]])
             })
             
         # Update fireworks
-        for fw in self.fireworks[:]:
-            fw["y"] -= 3
+        rising = []
+        for fw in self.fireworks:
+            fw["y"] -= 3 * dt * 60
             if fw["y"] < HEIGHT//3:
-                # Explode
+                # Explode into sparks that outlive the rocket
                 for i in range(20):
                     angle = random.uniform(0, math.pi*2)
                     speed = random.uniform(2, 5)
-                    fw["particles"].append({
-                        "x": fw["x"],
-                        "y": fw["y"],
-                        "vx": math.cos(angle) * speed,
-                        "vy": math.sin(angle) * speed,
-                        "life": 1.0
-                    })
-                self.fireworks.remove(fw)
+                    self.particles.append(PARTICLE_POOL.take(fw["x"], fw["y"], math.cos(angle) * speed,
+                                                             math.sin(angle) * speed, fw["color"]))
+            else:
+                rising.append(fw)
+        self.fireworks = rising
                 
-        # Update particles
-        for fw in self.fireworks:
-            for p in fw["particles"][:]:
-                p["x"] += p["vx"]
-                p["y"] += p["vy"]
-                p["vy"] += 0.1
-                p["life"] -= 0.02
-                if p["life"] <= 0:
-                    fw["particles"].remove(p)
+        # Update particles, handing burnt-out ones back to the pool
+        alive = []
+        for p in self.particles:
+            p.x += p.vx * dt * 60
+            p.y += p.vy * dt * 60
+            p.vy += 0.1 * dt * 60
+            p.life -= 0.02 * dt * 60
+            if p.life > 0:
+                alive.append(p)
+            else:
+                PARTICLE_POOL.release(p)
+        self.particles = alive
                     
         if self.timer <= 0:
+            for p in self.particles:
+                PARTICLE_POOL.release(p)
+            self.particles = []
             push(TitleScreen())
             
     def draw(self, s):
@@ -1445,51 +2370,401 @@ class WinScreen(Scene):
         # Draw fireworks
         for fw in self.fireworks:
             pygame.draw.circle(s, NES_PALETTE[39], (int(fw["x"]), int(fw["y"])), 3)
-            for p in fw["particles"]:
-                alpha = int(p["life"] * 255)
-                color = (min(255, fw["color"][0]), min(255, fw["color"][1]), min(255, fw["color"][2]))
-                pygame.draw.circle(s, color, (int(p["x"]), int(p["y"])), 2)
+        for p in self.particles:
+            pygame.draw.circle(s, p.color, (int(p.x), int(p.y)), 2)
         
         # Text
-        font = pygame.font.SysFont(None, 40)
-        text = font.render("CONGRATULATIONS!", True, NES_PALETTE[33])
+        font = get_font(40)
+        text = render_text(font, "CONGRATULATIONS!", NES_PALETTE[33])
         s.blit(text, (WIDTH//2 - text.get_width()//2, 50))
         
-        font = pygame.font.SysFont(None, 30)
-        text = font.render("YOU SAVED THE PRINCESS!", True, NES_PALETTE[39])
+        font = get_font(30)
+        text = render_text(font, "YOU SAVED THE PRINCESS!", NES_PALETTE[39])
         s.blit(text, (WIDTH//2 - text.get_width()//2, 100))
         
-        font = pygame.font.SysFont(None, 24)
-        text = font.render(f"FINAL SCORE: {state.score}", True, NES_PALETTE[31])
+        font = get_font(24)
+        text = render_text(font, f"FINAL SCORE: {state.score}", NES_PALETTE[31])
         s.blit(text, (WIDTH//2 - text.get_width()//2, 150))
 
+# Benchmarks
+def bench_collision(frames=60, enemy_count=50):
+    # Compare scanning a list of per-tile Rects (the old TileMap.colliders)
+    # with the tile grid lookup, using the same entity boxes on every level
+    import time
+    rect_time = grid_time = 0.0
+    rect_tests = grid_cells = 0
+    rect_hits = grid_hits = 0  # boxes touching a solid tile, summed over frames
+    for level_id, (level_data, theme) in LEVELS.items():
+        tilemap = TileMap(level_data, theme)
+        colliders = [pygame.Rect(x, y, TILE, TILE) for x, y, char in tilemap.tiles if char in SOLID_TILES]
+        spacing = tilemap.width / enemy_count
+        boxes = [pygame.Rect(int(i * spacing), 14 * TILE, TILE, TILE) for i in range(enemy_count)]
+        
+        start = time.perf_counter()
+        for _ in range(frames):
+            for box in boxes:
+                rect_hits += bool([rect for rect in colliders if box.colliderect(rect)])
+        rect_time += time.perf_counter() - start
+        rect_tests += frames * len(boxes) * len(colliders)
+        
+        start = time.perf_counter()
+        for _ in range(frames):
+            for box in boxes:
+                grid_hits += tilemap.overlaps_solid(box.x, box.y, box.w, box.h)
+        grid_time += time.perf_counter() - start
+        grid_cells += frames * len(boxes) * 4  # at most 2x2 cells per box
+        
+        # Same answer either way
+        for box in boxes:
+            assert (box.collidelist(colliders) != -1) == tilemap.overlaps_solid(box.x, box.y, box.w, box.h)
+    
+    assert rect_hits == grid_hits, (rect_hits, grid_hits)
+    print(f"collision: {len(LEVELS)} levels, {enemy_count} entities, {frames} frames, {rect_hits} hits")
+    print(f"  rect list:  {rect_time * 1000:8.1f} ms  {rect_tests:>10} colliderect calls")
+    print(f"  tile grid:  {grid_time * 1000:8.1f} ms  {grid_cells:>10} cell lookups (max)")
+    print(f"  speedup:    {rect_time / grid_time:8.1f}x")
+
+def bench_draw(frames=120):
+    # Frame time of TileMap.draw per render mode, scrolling across every level
+    import time
+    surf = pygame.Surface((WIDTH, HEIGHT))
+    tilemaps = [TileMap(level_data, theme) for level_data, theme in LEVELS.values()]
+    print(f"draw: {len(tilemaps)} levels, {frames} frames each")
+    for mode in ("tiles", "blits", "chunks"):
+        TileMap.render_mode = mode
+        start = time.perf_counter()
+        for tilemap in tilemaps:
+            for frame in range(frames):
+                tilemap.draw(surf, frame * (tilemap.width - WIDTH) / frames)
+        elapsed = time.perf_counter() - start
+        print(f"  {mode:8} {elapsed * 1000 / (frames * len(tilemaps)):6.3f} ms/frame")
+    TileMap.render_mode = "chunks"
+    
+    start = time.perf_counter()
+    for tilemap in tilemaps:
+        tilemap.build_chunks()
+    elapsed = time.perf_counter() - start
+    print(f"  chunk bake {elapsed * 1000 / len(tilemaps):6.3f} ms/level")
+
+def bench_text(frames=120):
+    # Menu frame time with the font/text caches warm versus emptied every
+    # frame, which is what calling SysFont and render per frame used to cost
+    import time
+    pygame.font.init()
+    surf = pygame.Surface((WIDTH, HEIGHT))
+    scenes = [TitleScreen(), SlotSelect(), WorldSelect(), LevelSelect(1), GameOverScene(), WinScreen()]
+    print(f"text: {len(scenes)} menu scenes, {frames} frames each")
+    for label, clear in (("uncached", True), ("cached", False)):
+        start = time.perf_counter()
+        for scene in scenes:
+            for _ in range(frames):
+                if clear:
+                    FONTS.clear()
+                    TEXT_CACHE.clear()
+                scene.draw(surf)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:8} {elapsed * 1000 / (frames * len(scenes)):6.3f} ms/frame")
+
+def bench_levels():
+    # Loading every level with the compiled level cache cold (generate and
+    # write) versus warm (read back from disk)
+    global LEVEL_CACHE_DIR
+    import time
+    import tempfile
+    cache_dir = LEVEL_CACHE_DIR
+    print(f"levels: {len(LEVEL_IDS)} levels, generator {GENERATOR_HASH}")
+    with tempfile.TemporaryDirectory() as LEVEL_CACHE_DIR:
+        for label in ("cold", "warm"):
+            LEVEL_CACHE_STATS.update(hits=0, misses=0)
+            start = time.perf_counter()
+            for level_id in LEVEL_IDS:
+                load_level(level_id)
+            elapsed = time.perf_counter() - start
+            print(f"  {label:5} {elapsed * 1000 / len(LEVEL_IDS):6.3f} ms/level  "
+                  f"({LEVEL_CACHE_STATS['hits']} hits, {LEVEL_CACHE_STATS['misses']} misses)")
+    LEVEL_CACHE_DIR = cache_dir
+
+def bench_walkers(walker_counts=(16, 32, 64, 128, 1000), seconds=2):
+    # Crowds of Goombas stepped and drawn one object at a time versus in a
+    # WalkerStore; both must leave every Goomba in exactly the same state.
+    # The smallest crowd where the store wins is what WALKER_STORE_MIN is for.
+    import time
+    level_data, theme = LEVELS["1-1"]
+    tilemap = TileMap(level_data, theme)
+    surf = pygame.Surface((WIDTH, HEIGHT))
+    frames = seconds * FPS
+    steps_per_frame = SIM_HZ // FPS
+    print(f"walkers: Goombas on 1-1, {frames} frames of {steps_per_frame} steps, "
+          f"store used from {WALKER_STORE_MIN}")
+    for walker_count in walker_counts:
+        spacing = (tilemap.width - TILE) / walker_count
+        goombas = [Goomba(i * spacing, TILE * 4) for i in range(walker_count)]
+        start = time.perf_counter()
+        for frame in range(frames):
+            for _ in range(steps_per_frame):
+                for goomba in goombas:
+                    if goomba.active:
+                        goomba.update(tilemap, SIM_DT)
+            cam = frame * (tilemap.width - WIDTH) / frames
+            for goomba in goombas:
+                goomba.draw(surf, cam)
+        object_time = (time.perf_counter() - start) * 1000 / frames
+
+        if numpy is None:
+            print(f"  {walker_count:5}  objects {object_time:7.3f} ms/frame  store skipped, NumPy is not installed")
+            continue
+        store = WalkerStore([Goomba(i * spacing, TILE * 4) for i in range(walker_count)], tilemap)
+        store.awake[:] = True  # The object path never sleeps either
+        start = time.perf_counter()
+        for frame in range(frames):
+            for _ in range(steps_per_frame):
+                store.update(SIM_DT)
+            store.draw(surf, frame * (tilemap.width - WIDTH) / frames, 1.0)
+        store_time = (time.perf_counter() - start) * 1000 / frames
+        print(f"  {walker_count:5}  objects {object_time:7.3f} ms/frame  store {store_time:7.3f} ms/frame")
+
+        assert store.x.tolist() == [goomba.x for goomba in goombas]
+        assert store.y.tolist() == [goomba.y for goomba in goombas]
+        assert store.vx.tolist() == [goomba.vx for goomba in goombas]
+        assert store.vy.tolist() == [goomba.vy for goomba in goombas]
+        assert store.on_ground.tolist() == [goomba.on_ground for goomba in goombas]
+        assert store.frame.tolist() == [goomba.animation_frame for goomba in goombas]
+
+def bench_broadphase(enemy_count=1000, item_count=200, steps=SIM_HZ * 5):
+    # Player overlap tests against every enemy and item versus asking a
+    # SpatialHash, including the cost of keeping the moved enemies filed.
+    # "motion" only moves the enemies, so the rows above it are what the
+    # overlap tests themselves cost.
+    import time
+    level_data, theme = LEVELS["1-1"]
+    tilemap = TileMap(level_data, theme)
+    spacing = (tilemap.width - TILE) / enemy_count
+    enemies = [Goomba(i * spacing, TILE * 12) for i in range(enemy_count)]
+    items = [Item(i * (tilemap.width - TILE) / item_count, TILE * 10, "coin") for i in range(item_count)]
+    player = Player(0, TILE * 11)
+    nearby = SpatialHash()
+    for enemy in enemies:
+        nearby.insert(enemy, "enemies")
+    for item in items:
+        nearby.insert(item, "items")
+    print(f"broadphase: {enemy_count} enemies, {item_count} items, {steps} steps on 1-1")
+
+    def sweep(hashed, tested=True):
+        hits = []
+        for step in range(steps):
+            player.x = step * (tilemap.width - TILE) / steps
+            for enemy in enemies:
+                enemy.x += 0.5 if step % 64 < 32 else -0.5
+                if hashed:
+                    nearby.move(enemy)
+            if not tested:
+                continue
+            rect = player.get_rect()
+            candidates = nearby.query(rect, "enemies") if hashed else enemies
+            hits.append([enemy for enemy in candidates if player.check_collision(enemy)])
+            candidates = nearby.query(rect, "items") if hashed else items
+            hits.append([item for item in candidates if player.check_collision(item)])
+        return hits
+
+    results = {}
+    for label, hashed, tested in (("motion", False, False), ("all", False, True), ("hashed", True, True)):
+        start = time.perf_counter()
+        results[label] = sweep(hashed, tested)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:6} {elapsed * 1000 / steps:7.3f} ms/step")
+    assert results["all"] == results["hashed"]
+
+BENCHMARKS = {
+    "broadphase": bench_broadphase,
+    "collision": bench_collision,
+    "draw": bench_draw,
+    "text": bench_text,
+    "levels": bench_levels,
+    "walkers": bench_walkers,
+}
+
+# Headless simulation
+# An input script is a list of (steps, keys held) segments, repeated until the run ends
+DEFAULT_SCRIPT = [(SIM_HZ, (K_RIGHT,)), (SIM_HZ // 4, (K_RIGHT, K_SPACE)), (SIM_HZ // 2, (K_RIGHT, K_LSHIFT))]
+
+def run_headless(level_id, script=DEFAULT_SCRIPT, max_time=300, seed=None):
+    # Step a LevelScene without a window or drawing, as fast as possible.
+    # Returns a dict describing how the run ended.
+    global state
+    import time
+    pygame.font.init()
+    if seed is not None:
+        random.seed(seed)
+    state = GameState()
+    SCENES.clear()
+    scene = LevelScene(level_id)
+    push(scene)
+    
+    segments = [(steps, ScriptedKeys(held)) for steps, held in script]
+    segment = 0
+    segment_left = segments[0][0]
+    lives = state.lives
+    deaths = 0
+    steps = 0
+    max_steps = int(max_time * SIM_HZ)
+    outcome = "timeout"
+    start = time.perf_counter()
+    while steps < max_steps:
+        scene.handle([], segments[segment][1])
+        scene.update(SIM_DT)
+        steps += 1
+        segment_left -= 1
+        if segment_left == 0:
+            segment = (segment + 1) % len(segments)
+            segment_left = segments[segment][0]
+        
+        if state.lives < lives:
+            deaths += lives - state.lives
+        lives = state.lives
+        if scene.end_level:
+            outcome = "completed"
+            break
+        if not SCENES or SCENES[-1] is not scene:
+            outcome = "game_over" if state.lives <= 0 else "left"
+            break
+        if scene.player.y > scene.map.height + TILE * 4:
+            outcome = "fell"
+            break
+    elapsed = time.perf_counter() - start
+    SCENES.clear()
+    
+    return {
+        "level": level_id,
+        "seed": seed,
+        "outcome": outcome,
+        "deaths": deaths,
+        "score": state.score,
+        "time": steps * SIM_DT,
+        "steps": steps,
+        "steps_per_second": steps / elapsed if elapsed > 0 else 0.0,
+    }
+
+def headless(level_ids, seed=0):
+    for level_id in level_ids:
+        result = run_headless(level_id, seed=seed)
+        print(f"{result['level']:>4}  {result['outcome']:9}  deaths {result['deaths']}  "
+              f"sim {result['time']:6.1f}s  {result['steps_per_second']:9.0f} steps/s  "
+              f"({result['steps_per_second'] / SIM_HZ:6.1f}x real time)")
+    print(f"level cache: {LEVEL_CACHE_STATS['hits']} hits, {LEVEL_CACHE_STATS['misses']} misses")
+
+# Soak testing: many (level, seed, input script) runs spread over a process pool
+SOAK_KEYS = [(K_RIGHT,), (K_RIGHT, K_SPACE), (K_RIGHT, K_LSHIFT), (K_RIGHT, K_LSHIFT, K_SPACE),
+             (K_LEFT,), (K_SPACE,), ()]
+
+def random_script(seed, segments=12):
+    # Reproducible input script for a soak run
+    rng = random.Random(seed)
+    return [(rng.randint(SIM_HZ // 8, SIM_HZ), rng.choice(SOAK_KEYS)) for _ in range(segments)]
+
+def soak_worker_init(levels):
+    # Workers simulate the parent's levels, not ones they would generate themselves
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    LEVELS.cache.update(levels)
+
+def soak_job(job):
+    level_id, seed, script, max_time = job
+    return run_headless(level_id, script, max_time=max_time, seed=seed)
+
+def soak(level_ids, runs=8, workers=None, max_time=60):
+    import time
+    from concurrent.futures import ProcessPoolExecutor
+    jobs = [(level_id, seed, random_script(seed), max_time) for level_id in level_ids for seed in range(runs)]
+    start = time.perf_counter()
+    levels = {level_id: LEVELS.compiled(level_id) for level_id in level_ids}
+    with ProcessPoolExecutor(max_workers=workers, initializer=soak_worker_init, initargs=(levels,)) as pool:
+        results = list(pool.map(soak_job, jobs))
+    elapsed = time.perf_counter() - start
+    
+    print(f"soak: {len(jobs)} runs ({len(level_ids)} levels x {runs} seeds), "
+          f"{workers or os.cpu_count()} workers")
+    print(f"{'level':>5}  {'done':>5}  {'over':>5}  {'fell':>5}  {'t/o':>5}  {'deaths':>6}  {'sim s':>7}")
+    for level_id in level_ids:
+        level_results = [r for r in results if r["level"] == level_id]
+        outcomes = [r["outcome"] for r in level_results]
+        deaths = sum(r["deaths"] for r in level_results) / len(level_results)
+        sim_time = sum(r["time"] for r in level_results) / len(level_results)
+        print(f"{level_id:>5}  {outcomes.count('completed'):5}  {outcomes.count('game_over'):5}  "
+              f"{outcomes.count('fell'):5}  {outcomes.count('timeout'):5}  {deaths:6.2f}  {sim_time:7.1f}")
+    
+    steps = sum(r["steps"] for r in results)
+    print(f"total: {steps} steps in {elapsed:.1f}s wall, {steps / elapsed:.0f} steps/s "
+          f"({steps / elapsed / SIM_HZ:.0f}x real time), "
+          f"{sum(r['steps_per_second'] for r in results) / len(results):.0f} steps/s per worker")
+    return results
+
 # Main game
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("KOOPA ENGINE 1.0A Tech Demo")
-clock = pygame.time.Clock()
-
-# Start with title screen
-push(TitleScreen())
-
-while SCENES:
-    dt = clock.tick(FPS) / 1000
-    events = pygame.event.get()
-    keys = pygame.key.get_pressed()
-    
-    # Handle quit events
-    for e in events:
-        if e.type == QUIT:
-            pygame.quit()
-            sys.exit()
-    
-    # Update current scene
-    scene = SCENES[-1]
-    scene.handle(events, keys)
-    scene.update(dt)
-    scene.draw(screen)
-    
-    pygame.display.flip()
-
-pygame.quit()
-sys.exit()
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("KOOPA ENGINE 1.0A Tech Demo")
+    clock = pygame.time.Clock()
+    
+    # Start with title screen
+    push(TitleScreen())
+    
+    accumulator = 0.0
+    while SCENES:
+        accumulator += clock.tick(FPS) / 1000
+        events = pygame.event.get()
+        keys = pygame.key.get_pressed()
+        
+        # Handle quit events
+        for e in events:
+            if e.type == QUIT:
+                pygame.quit()
+                sys.exit()
+        
+        SCENES[-1].handle(events, keys)
+        
+        # Step the simulation in fixed increments; if rendering fell too far
+        # behind, drop the backlog rather than spiralling
+        steps = 0
+        while accumulator >= SIM_DT and SCENES:
+            if steps == MAX_SIM_STEPS:
+                accumulator = 0.0
+                break
+            SCENES[-1].update(SIM_DT)
+            accumulator -= SIM_DT
+            steps += 1
+        if not SCENES:
+            break
+        
+        # Draw the current scene part way to the next step
+        scene = SCENES[-1]
+        scene.alpha = accumulator / SIM_DT
+        scene.draw(screen)
+        
+        pygame.display.flip()
+    
+    pygame.quit()
+    sys.exit()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="KOOPA ENGINE 1.0A")
+    parser.add_argument("--bench", choices=sorted(BENCHMARKS), help="run a benchmark instead of the game")
+    parser.add_argument("--headless", nargs="*", metavar="LEVEL",
+                        help="simulate levels without a window (all levels if none are given)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for headless runs")
+    parser.add_argument("--soak", nargs="*", metavar="LEVEL",
+                        help="soak-test levels across a process pool (all levels if none are given)")
+    parser.add_argument("--runs", type=int, default=8, help="seeds per level for --soak")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --soak")
+    parser.add_argument("--max-time", type=float, default=60, help="simulated seconds per --soak run")
+    args = parser.parse_args()
+    
+    if args.bench:
+        BENCHMARKS[args.bench]()
+    elif args.headless is not None:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        headless(args.headless or list(LEVELS), args.seed)
+    elif args.soak is not None:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        soak(args.soak or list(LEVELS), args.runs, args.workers, args.max_time)
+    else:
+        main()